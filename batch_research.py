@@ -0,0 +1,129 @@
+"""
+Run research questions from a JSONL file and stream the reports as JSONL.
+
+    python batch_research.py questions.jsonl --output reports.jsonl \\
+        --workers 8 --openai-concurrency 6 --serper-concurrency 4 --timeout 300
+
+Each output line carries the input ``offset``; rerun with ``--resume`` to skip
+questions already answered in the output file (failed and timed-out ones are
+run again), or ``--offset`` to start further in. Results are the only thing
+written to stdout; agent progress goes to stderr.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import sys
+
+from src.builder.batch import BatchRunner, completed_offsets, read_questions
+from src.builder.config import GraphConfig
+from src.builder.graph import AgentGraphBuilder
+from src.utils.convergence import convergence_stats
+from src.utils.prompt_budget import prompt_stats
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("input", help="JSONL file of questions")
+    parser.add_argument("--output", help="JSONL results file (default: stdout)")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument(
+        "--mode",
+        choices=["thread", "async"],
+        default="thread",
+        help="thread pool over invoke, or coroutines over ainvoke",
+    )
+    parser.add_argument("--openai-concurrency", type=int, default=None)
+    parser.add_argument("--serper-concurrency", type=int, default=None)
+    parser.add_argument(
+        "--timeout", type=float, default=None, help="seconds allowed per question"
+    )
+    parser.add_argument("--offset", type=int, default=0, help="first input line")
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="skip offsets already answered in --output and append to it",
+    )
+    parser.add_argument("--recursion-limit", type=int, default=40)
+    parser.add_argument(
+        "--tracing", action="store_true", help="record node, LLM and HTTP spans"
+    )
+    parser.add_argument(
+        "--trace-dir",
+        default=None,
+        help="write a Chrome trace per run (implies --tracing)",
+    )
+    cassette = parser.add_mutually_exclusive_group()
+    cassette.add_argument(
+        "--record", metavar="CASSETTE", help="save every LLM, search and page response"
+    )
+    cassette.add_argument(
+        "--replay", metavar="CASSETTE", help="answer from a recorded cassette, offline"
+    )
+    parser.add_argument("--model", default="gpt-4o-mini")
+    parser.add_argument("--model-endpoint", default=None)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.resume and not args.output:
+        sys.exit("--resume needs --output")
+
+    # Agents print their progress to stdout; keep it for the results only
+    results = sys.stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        run(args, results)
+
+
+def run(args, results):
+    config = GraphConfig(
+        server="openai",
+        model=args.model,
+        model_endpoint=args.model_endpoint,
+        async_mode=args.mode == "async",
+        openai_concurrency=args.openai_concurrency,
+        serper_concurrency=args.serper_concurrency,
+        tracing=args.tracing or bool(args.trace_dir),
+        trace_dir=args.trace_dir,
+        cassette_path=args.record or args.replay,
+        cassette_mode="record" if args.record else "replay",
+        # Searches answered from the disk cache would never reach the cassette
+        **({"serper_cache_path": None} if args.record or args.replay else {}),
+    )
+    # Compiled once and shared by every worker
+    builder = AgentGraphBuilder(config)
+    workflow = builder.build().compile()
+
+    skip = completed_offsets(args.output) if args.resume else set()
+    items = read_questions(args.input, offset=args.offset, skip=skip)
+
+    output = (
+        open(args.output, "a" if args.resume else "w", encoding="utf-8")
+        if args.output
+        else results
+    )
+    try:
+        runner = BatchRunner(
+            workflow,
+            output,
+            workers=args.workers,
+            timeout=args.timeout,
+            recursion_limit=args.recursion_limit,
+        )
+        if args.mode == "async":
+            stats = asyncio.run(runner.arun(items))
+        else:
+            stats = runner.run(items)
+    finally:
+        if output is not results:
+            output.close()
+    print(f"Batch finished: {stats}", file=sys.stderr)
+    if builder.prefetcher is not None:
+        print(f"Prefetch: {builder.prefetcher.stats()}", file=sys.stderr)
+    print(f"Prompt tokens: {prompt_stats.stats()}", file=sys.stderr)
+    print(f"Convergence: {convergence_stats.stats()}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""
+End-to-end graph benchmark against the offline stand-ins in ``benchmarks.fakes``.
+
+Compiles the graph from ``AgentGraphBuilder(config).build()`` and drives
+``--runs`` research questions through it, ``--concurrency`` at a time, with
+every OpenAI, Serper and page request answered locally after the configured
+latency. Reports run latency p50/p99 and throughput, wall time and loop
+counts per node (from the node spans of each run) and, with
+``--tracemalloc``, peak traced memory and what the runs left allocated,
+measured in a second, untimed pass.
+
+    python -m benchmarks.e2e_benchmark --runs 40 --concurrency 8 --llm-latency 0.05
+    python -m benchmarks.e2e_benchmark --mode async --review-loops 2
+    python -m benchmarks.e2e_benchmark --save-baseline     # refresh the baseline
+
+The exit status is 1 when p50 or p99 is more than ``--max-regression`` over
+the baseline recorded for the same scenario.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+from benchmarks.fakes import AGENTS, FakeServices
+
+# settings.py insists on both keys; the stand-ins ignore them
+os.environ.setdefault("OPENAI_API_KEY", "offline")
+os.environ.setdefault("SERPER_API_KEY", "offline")
+os.environ.setdefault("PYTHONPATH", ".")
+
+from src.builder.config import GraphConfig  # noqa: E402
+from src.builder.graph import AgentGraphBuilder  # noqa: E402
+from src.utils.tracing import trace_run  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "e2e_baseline.json")
+
+
+def _percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile; exact for the small samples used here."""
+    ordered = sorted(values)
+    rank = max(1, round(q / 100 * len(ordered) + 0.5 - 1e-9))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def _question(index: int) -> str:
+    # The fakes tell runs apart by the "#<n>" tag
+    return f"Benchmark question #{index}: what does the page say about the topic?"
+
+
+def _summarize_run(trace, elapsed: float, state: Dict[str, Any]) -> Dict[str, Any]:
+    node_seconds = defaultdict(float)
+    for event in trace.events if trace is not None else []:
+        if event["cat"] == "node":
+            node_seconds[event["name"]] += event["dur"] / 1e6
+    return {
+        "elapsed": elapsed,
+        "nodes": dict(node_seconds),
+        "loops": dict(trace.iterations) if trace is not None else {},
+        "reported": bool(state.get("final_reports")),
+    }
+
+
+def _run_one(workflow, index: int, recursion_limit: int) -> Dict[str, Any]:
+    config = {"recursion_limit": recursion_limit}
+    with trace_run(f"bench-{index}") as trace:
+        started = time.perf_counter()
+        state = workflow.invoke({"research_question": _question(index)}, config)
+        elapsed = time.perf_counter() - started
+    return _summarize_run(trace, elapsed, state)
+
+
+async def _arun_one(workflow, index: int, recursion_limit: int) -> Dict[str, Any]:
+    config = {"recursion_limit": recursion_limit}
+    with trace_run(f"bench-{index}") as trace:
+        started = time.perf_counter()
+        state = await workflow.ainvoke(
+            {"research_question": _question(index)}, config
+        )
+        elapsed = time.perf_counter() - started
+    return _summarize_run(trace, elapsed, state)
+
+
+def _run_threads(workflow, indexes, concurrency, recursion_limit):
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(
+            executor.map(lambda i: _run_one(workflow, i, recursion_limit), indexes)
+        )
+
+
+async def _run_tasks(workflow, indexes, concurrency, recursion_limit):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(index):
+        async with semaphore:
+            return await _arun_one(workflow, index, recursion_limit)
+
+    return await asyncio.gather(*(bounded(index) for index in indexes))
+
+
+def _drive(workflow, indexes, args, loop):
+    if args.mode == "async":
+        # One loop for warmup and measurement: the shared async HTTP clients
+        # are bound to the loop that first used them.
+        return loop.run_until_complete(
+            _run_tasks(workflow, indexes, args.concurrency, args.recursion_limit)
+        )
+    return _run_threads(workflow, indexes, args.concurrency, args.recursion_limit)
+
+
+def _scenario(args) -> str:
+    return (
+        f"{args.mode}-runs{args.runs}-c{args.concurrency}-llm{args.llm_latency}"
+        f"-serper{args.serper_latency}-page{args.page_latency}"
+        f"-loops{args.review_loops}"
+    )
+
+
+def _report(runs: List[Dict[str, Any]], wall: float) -> Dict[str, Any]:
+    latencies = [run["elapsed"] for run in runs]
+    nodes: Dict[str, Dict[str, float]] = {}
+    names = sorted({name for run in runs for name in run["nodes"]})
+    for name in names:
+        seconds = [run["nodes"].get(name, 0.0) for run in runs]
+        loops = [run["loops"].get(name, 0) for run in runs]
+        nodes[name] = {
+            "ms_per_run": round(sum(seconds) / len(runs) * 1000, 2),
+            "ms_p99": round(_percentile(seconds, 99) * 1000, 2),
+            "calls_per_run": round(sum(loops) / len(runs), 2),
+        }
+    return {
+        "runs": len(runs),
+        "failed": sum(not run["reported"] for run in runs),
+        "p50": round(_percentile(latencies, 50), 4),
+        "p99": round(_percentile(latencies, 99), 4),
+        "max": round(max(latencies), 4),
+        "throughput": round(len(runs) / wall, 2),
+        "nodes": nodes,
+    }
+
+
+def _print_report(report: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    def change(key):
+        before = baseline.get(key)
+        if not before:
+            return ""
+        return f"  ({(report[key] - before) / before:+.0%} vs baseline)"
+
+    print(f"runs        {report['runs']} ({report['failed']} without a report)")
+    print(f"p50         {report['p50'] * 1000:.1f} ms{change('p50')}")
+    print(f"p99         {report['p99'] * 1000:.1f} ms{change('p99')}")
+    print(f"max         {report['max'] * 1000:.1f} ms")
+    print(f"throughput  {report['throughput']} runs/s{change('throughput')}")
+    print(f"\n{'node':<16}{'ms/run':>10}{'ms p99':>10}{'calls/run':>11}")
+    for name, node in report["nodes"].items():
+        print(
+            f"{name:<16}{node['ms_per_run']:>10.1f}{node['ms_p99']:>10.1f}"
+            f"{node['calls_per_run']:>11.2f}"
+        )
+    if "memory" in report:
+        memory = report["memory"]
+        print(
+            f"\npeak traced {memory['peak_mb']} MB, "
+            f"left allocated {memory['retained_kb_per_run']} KB per run"
+        )
+        for site in memory["top_sites"]:
+            print(f"    {site}")
+
+
+def _regressions(report, baseline, max_regression) -> List[str]:
+    return [
+        f"{key} {report[key] * 1000:.1f} ms vs baseline {baseline[key] * 1000:.1f} ms"
+        for key in ("p50", "p99")
+        if baseline.get(key) and report[key] > baseline[key] * (1 + max_regression)
+    ]
+
+
+def run(args) -> int:
+    latency = {agent: args.llm_latency for agent in AGENTS}
+    latency.update(serper=args.serper_latency, page=args.page_latency)
+
+    with FakeServices(
+        latency=latency, token_delay=args.token_delay, review_loops=args.review_loops
+    ) as fakes:
+        config = GraphConfig(
+            server="openai",
+            model="gpt-4o-mini",
+            model_endpoint=fakes.openai_url,
+            serper_base_url=fakes.serper_url,
+            async_mode=args.mode == "async",
+            serper_cache_path=None,
+            checkpoint_path=None,
+            # Node spans give the per-node times; nothing is written to disk
+            tracing=True,
+            trace_dir=None,
+            reporter_streaming=args.streaming,
+        )
+        workflow = AgentGraphBuilder(config).build().compile()
+
+        loop = asyncio.new_event_loop()
+        # Agents print every response; keep the report readable
+        quiet = contextlib.redirect_stdout(open(os.devnull, "w"))
+        with quiet if not args.verbose else contextlib.nullcontext():
+            _drive(workflow, range(-args.warmup, 0), args, loop)
+            started = time.perf_counter()
+            runs = _drive(workflow, range(args.runs), args, loop)
+            wall = time.perf_counter() - started
+            if args.tracemalloc:
+                # A separate pass: tracing allocations slows runs several-fold
+                tracemalloc.start()
+                before = tracemalloc.take_snapshot()
+                _drive(workflow, range(args.runs, 2 * args.runs), args, loop)
+                after = tracemalloc.take_snapshot()
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+        loop.close()
+
+    report = _report(runs, wall)
+    if args.tracemalloc:
+        growth = after.compare_to(before, "lineno")
+        report["memory"] = {
+            "peak_mb": round(peak / 2**20, 1),
+            "retained_kb_per_run": round(
+                sum(stat.size_diff for stat in growth) / 1024 / args.runs, 1
+            ),
+            "top_sites": [str(stat) for stat in growth[: args.top]],
+        }
+
+    baselines = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            baselines = json.load(f)
+    scenario = _scenario(args)
+    baseline = baselines.get(scenario, {})
+
+    print(f"scenario    {scenario}")
+    _print_report(report, baseline)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"scenario": scenario, **report}, f, indent=2)
+
+    if args.save_baseline:
+        baselines[scenario] = {
+            key: report[key] for key in ("p50", "p99", "throughput", "nodes")
+        }
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\nBaseline written to {BASELINE_PATH}")
+        return 0
+
+    regressions = _regressions(report, baseline, args.max_regression)
+    for regression in regressions:
+        print(f"REGRESSION: {regression}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--mode", choices=["thread", "async"], default="thread")
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--llm-latency", type=float, default=0.02)
+    parser.add_argument("--serper-latency", type=float, default=0.01)
+    parser.add_argument("--page-latency", type=float, default=0.01)
+    parser.add_argument("--token-delay", type=float, default=0.0)
+    parser.add_argument(
+        "--review-loops", type=int, default=1, help="failed reviews per question"
+    )
+    parser.add_argument("--streaming", action="store_true", help="stream the report")
+    parser.add_argument("--recursion-limit", type=int, default=40)
+    parser.add_argument("--tracemalloc", action="store_true")
+    parser.add_argument("--top", type=int, default=5, help="allocation sites shown")
+    parser.add_argument("--json", help="also write the report to this file")
+    parser.add_argument("--max-regression", type=float, default=0.25)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--verbose", action="store_true", help="keep agent output")
+    sys.exit(run(parser.parse_args()))
@@ -0,0 +1,107 @@
+"""
+Throughput benchmark for the HTML-to-text extractors.
+
+Runs every available extractor over a directory of saved HTML pages and
+reports pages/s, MB/s and how much of the first ``--budget`` characters is
+article text rather than boilerplate.
+
+    python -m benchmarks.extract_benchmark --corpus benchmarks/corpus --rounds 20
+"""
+
+import argparse
+import glob
+import os
+import time
+
+from src.tools.extractors import EXTRACTORS
+
+# Words that only appear in the boilerplate of the sample corpus.
+BOILERPLATE_MARKERS = ("cookie", "newsletter", "Related story", "Legal notice", "Section")
+
+
+def _load_corpus(directory):
+    pages = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.html"))):
+        with open(path, encoding="utf-8", errors="replace") as f:
+            pages.append((os.path.basename(path), f.read()))
+    return pages
+
+
+def _bs4_baseline():
+    """The extraction ScraperNode used before: every stripped string, in order."""
+    from bs4 import BeautifulSoup
+
+    class BeautifulSoupBaseline:
+        name = "bs4 (baseline)"
+
+        def extract(self, html):
+            return " ".join(BeautifulSoup(html, "html.parser").stripped_strings)
+
+    return BeautifulSoupBaseline()
+
+
+def _extractors():
+    extractors = []
+    for name, cls in EXTRACTORS.items():
+        try:
+            extractors.append(cls())
+        except ImportError:
+            print(f"skipping {name}: not installed")
+    try:
+        extractors.append(_bs4_baseline())
+    except ImportError:
+        print("skipping bs4 baseline: not installed")
+    return extractors
+
+
+def _boilerplate_share(text, budget):
+    window = text[:budget]
+    if not window:
+        return 0.0
+    hits = sum(window.count(marker) * len(marker) for marker in BOILERPLATE_MARKERS)
+    return hits / len(window)
+
+
+def run(corpus_dir, rounds, budget):
+    pages = _load_corpus(corpus_dir)
+    if not pages:
+        raise SystemExit(f"No .html files found in {corpus_dir}")
+
+    total_bytes = sum(len(html.encode("utf-8")) for _, html in pages)
+    print(
+        f"{len(pages)} pages, {total_bytes / 1024:.0f} KiB, {rounds} rounds, "
+        f"budget {budget} chars\n"
+    )
+    print(
+        f"{'extractor':<16}{'pages/s':>10}{'MB/s':>10}{'avg chars':>12}"
+        f"{'boilerplate':>14}"
+    )
+
+    for extractor in _extractors():
+        outputs = [extractor.extract(html) for _, html in pages]
+
+        started = time.perf_counter()
+        for _ in range(rounds):
+            for _, html in pages:
+                extractor.extract(html)
+        elapsed = time.perf_counter() - started
+
+        processed = len(pages) * rounds
+        avg_chars = sum(len(text) for text in outputs) / len(outputs)
+        boilerplate = sum(_boilerplate_share(t, budget) for t in outputs) / len(outputs)
+        print(
+            f"{extractor.name:<16}{processed / elapsed:>10.1f}"
+            f"{total_bytes * rounds / elapsed / 1e6:>10.2f}"
+            f"{avg_chars:>12.0f}{boilerplate:>13.1%}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--corpus", default=os.path.join(os.path.dirname(__file__), "corpus")
+    )
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--budget", type=int, default=4000)
+    args = parser.parse_args()
+    run(args.corpus, args.rounds, args.budget)
@@ -0,0 +1,335 @@
+"""
+Offline stand-ins for OpenAI, Serper and the web, for benchmarks and demos.
+
+One local HTTP server answers:
+
+* ``POST /v1/chat/completions`` like the OpenAI API (plain and streamed),
+  with a scripted JSON answer per agent, recognised by its system prompt;
+* ``POST /search`` like Serper, with organic results pointing at the site;
+* ``GET /site/<page>.html`` with the HTML pages in ``benchmarks/corpus``.
+
+Each kind of call can be given a latency. The reviewer fails the first
+``review_loops`` reports of every question (questions are told apart by a
+``#<n>`` tag in their text), so runs go round the review loop a known number
+of times.
+
+    python -m benchmarks.fakes --port 8900 --llm-latency 0.2
+"""
+
+import argparse
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional, Union
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+AGENTS = ("planner", "selector", "reporter", "reviewer", "router")
+USAGE = {"prompt_tokens": 400, "completion_tokens": 60, "total_tokens": 460}
+# Characters per streamed chunk; about two tokens
+STREAM_CHUNK_CHARS = 8
+QUESTION_TAG = re.compile(r"#(\d+)")
+
+
+def _agent_of(system_prompt: str) -> str:
+    for agent in AGENTS:
+        if f"You are a {agent}" in system_prompt:
+            return agent
+    return "reporter"
+
+
+def _question_of(messages) -> str:
+    for message in messages:
+        match = QUESTION_TAG.search(str(message.get("content", "")))
+        if match:
+            return match.group(1)
+    return ""
+
+
+class FakeServices:
+    """
+    The fake OpenAI, Serper and web endpoints on one local server.
+
+    Args:
+        latency: Seconds per call, by agent name, ``"serper"`` or ``"page"``;
+            a number applies to every LLM agent.
+        token_delay: Seconds between streamed chunks.
+        review_loops: Reports failed per question before the reviewer passes.
+        responses: Per-agent answers replacing the scripted ones; a callable
+            gets ``(question_tag, call_number)`` and returns the answer.
+    """
+
+    def __init__(
+        self,
+        latency: Union[float, Dict[str, float], None] = None,
+        token_delay: float = 0.0,
+        review_loops: int = 0,
+        responses: Optional[Dict[str, Union[Any, Callable]]] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        if isinstance(latency, (int, float)):
+            latency = {agent: float(latency) for agent in AGENTS}
+        self.latency = latency or {}
+        self.token_delay = token_delay
+        self.review_loops = review_loops
+        self.responses = responses or {}
+        self.pages = sorted(
+            name for name in os.listdir(CORPUS_DIR) if name.endswith(".html")
+        )
+        self.calls = Counter()
+        self._reviews = Counter()
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def openai_url(self) -> str:
+        """Use as ``GraphConfig.model_endpoint``."""
+        return f"{self.url}/v1"
+
+    @property
+    def serper_url(self) -> str:
+        """Use as ``GraphConfig.serper_base_url``."""
+        return self.url
+
+    def start(self) -> "FakeServices":
+        self._thread = threading.Thread(
+            target=self.server.serve_forever, name="fake-services", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> "FakeServices":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+        return False
+
+    def _wait(self, name: str) -> None:
+        seconds = self.latency.get(name)
+        if seconds:
+            time.sleep(seconds)
+
+    def _count(self, name: str, question: str = "") -> int:
+        with self._lock:
+            self.calls[name] += 1
+            if name == "reviewer":
+                self._reviews[question] += 1
+                return self._reviews[question]
+            return self.calls[name]
+
+    def page_urls(self):
+        return [f"{self.url}/site/{name}" for name in self.pages]
+
+    def answer(self, agent: str, question: str, call: int) -> str:
+        scripted = self.responses.get(agent)
+        if callable(scripted):
+            scripted = scripted(question, call)
+        if scripted is None:
+            scripted = self._scripted(agent, question, call)
+        return scripted if isinstance(scripted, str) else json.dumps(scripted)
+
+    def _scripted(self, agent: str, question: str, call: int) -> Any:
+        urls = self.page_urls()
+        if agent == "planner":
+            return {
+                "search_term": f"benchmark topic {question}",
+                "search_terms": [
+                    f"benchmark topic {question}",
+                    f"benchmark topic {question} background",
+                ],
+                "overall_strategy": "Search, read the best page, report.",
+                "additional_information": "",
+            }
+        if agent == "selector":
+            return {
+                "selected_page_url": urls[0],
+                "selected_page_urls": urls[:3],
+                "description": "The most relevant result.",
+                "reason_for_selection": "It answers the question directly.",
+            }
+        if agent == "reviewer":
+            passed = call > self.review_loops
+            return {
+                "feedback": "Good answer." if passed else "Add citations.",
+                "pass_review": passed,
+                "comprehensive": True,
+                "citations_provided": passed,
+                "relevant_to_research_question": True,
+            }
+        if agent == "router":
+            with self._lock:
+                passed = self._reviews[question] > self.review_loops
+            return {"next_agent": "final_report" if passed else "reporter"}
+        return (
+            f"Answer to question {question}: the page covers it in detail [1].\n\n"
+            f"Sources:\n[1] {urls[0]}"
+        )
+
+    def _handler(self):
+        services = self
+
+        class FakeHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _send(self, status, body, content_type="application/json"):
+                data = body.encode("utf-8") if isinstance(body, str) else body
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _read_json(self) -> Dict[str, Any]:
+                length = int(self.headers.get("Content-Length") or 0)
+                return json.loads(self.rfile.read(length) or b"{}")
+
+            def do_GET(self):
+                name = self.path.split("?")[0].rsplit("/", 1)[-1]
+                if not self.path.startswith("/site/") or name not in services.pages:
+                    self._send(HTTPStatus.NOT_FOUND, "not found", "text/plain")
+                    return
+                services._count("page")
+                services._wait("page")
+                with open(os.path.join(CORPUS_DIR, name), "rb") as f:
+                    self._send(HTTPStatus.OK, f.read(), "text/html; charset=utf-8")
+
+            def do_POST(self):
+                body = self._read_json()
+                if self.path.endswith("/search"):
+                    self._search(body)
+                elif self.path.endswith("/chat/completions"):
+                    self._chat(body)
+                else:
+                    self._send(HTTPStatus.NOT_FOUND, json.dumps({"error": "not found"}))
+
+            def _search(self, body):
+                services._count("serper")
+                services._wait("serper")
+                query = body.get("q", "")
+                organic = [
+                    {
+                        "title": f"{query} - {name[:-5].replace('_', ' ')}",
+                        "link": url,
+                        "snippet": f"Everything about {query}.",
+                        "position": position,
+                    }
+                    for position, (name, url) in enumerate(
+                        zip(services.pages, services.page_urls()), start=1
+                    )
+                ]
+                self._send(HTTPStatus.OK, json.dumps({"organic": organic}))
+
+            def _chat(self, body):
+                messages = body.get("messages") or [{}]
+                agent = _agent_of(str(messages[0].get("content", "")))
+                question = _question_of(messages)
+                call = services._count(agent, question)
+                services._wait(agent)
+                content = services.answer(agent, question, call)
+                if body.get("stream"):
+                    self._stream(body, content)
+                    return
+                self._send(
+                    HTTPStatus.OK,
+                    json.dumps(
+                        {
+                            "id": f"fake-{agent}-{call}",
+                            "object": "chat.completion",
+                            "created": int(time.time()),
+                            "model": body.get("model", "fake"),
+                            "choices": [
+                                {
+                                    "index": 0,
+                                    "message": {
+                                        "role": "assistant",
+                                        "content": content,
+                                    },
+                                    "finish_reason": "stop",
+                                }
+                            ],
+                            "usage": USAGE,
+                        }
+                    ),
+                )
+
+            def _stream(self, body, content: str):
+                self.send_response(HTTPStatus.OK)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+
+                def send(payload: str) -> None:
+                    data = f"data: {payload}\n\n".encode("utf-8")
+                    self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                    self.wfile.flush()
+
+                def chunk(delta, finish_reason=None, usage=None) -> str:
+                    event = {
+                        "id": "fake-stream",
+                        "object": "chat.completion.chunk",
+                        "created": int(time.time()),
+                        "model": body.get("model", "fake"),
+                        "choices": [
+                            {"index": 0, "delta": delta, "finish_reason": finish_reason}
+                        ],
+                    }
+                    if usage:
+                        event["usage"] = usage
+                    return json.dumps(event)
+
+                for start in range(0, len(content), STREAM_CHUNK_CHARS):
+                    if services.token_delay:
+                        time.sleep(services.token_delay)
+                    text = content[start : start + STREAM_CHUNK_CHARS]
+                    send(chunk({"content": text}))
+                send(chunk({}, "stop", USAGE))
+                send("[DONE]")
+                self.wfile.write(b"0\r\n\r\n")
+
+            def log_message(self, format, *args):
+                pass
+
+        return FakeHandler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--llm-latency", type=float, default=0.0)
+    parser.add_argument("--serper-latency", type=float, default=0.0)
+    parser.add_argument("--page-latency", type=float, default=0.0)
+    parser.add_argument("--token-delay", type=float, default=0.0)
+    parser.add_argument("--review-loops", type=int, default=0)
+    args = parser.parse_args()
+
+    latency = {agent: args.llm_latency for agent in AGENTS}
+    latency.update(serper=args.serper_latency, page=args.page_latency)
+    services = FakeServices(
+        latency=latency,
+        token_delay=args.token_delay,
+        review_loops=args.review_loops,
+        host=args.host,
+        port=args.port,
+    )
+    print(f"OpenAI endpoint: {services.openai_url}")
+    print(f"Serper base URL: {services.serper_url}")
+    print(f"Pages:           {services.url}/site/")
+    services.server.serve_forever()
@@ -0,0 +1,96 @@
+"""
+Import-time audit for the modules a worker or CLI loads at startup.
+
+Each target is imported in a fresh interpreter under ``python -X importtime``;
+the best of ``--rounds`` runs is reported next to the checked-in baseline,
+along with the heaviest third-party packages it pulled in.
+
+    python -m benchmarks.import_benchmark
+    python -m benchmarks.import_benchmark --save-baseline   # refresh the baseline
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+TARGETS = [
+    "src.builder.graph",
+    "src.builder.batch",
+    "src.builder.server",
+    "src.nodes.scraper",
+    "src.nodes.serper",
+]
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "import_baseline.json")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _import_profile(module):
+    """Return ``{module: cumulative_us}`` for one cold import of ``module``."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONPATH": ROOT},
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"importing {module} failed:\n{result.stderr[-2000:]}")
+
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if cumulative.strip().isdigit():
+            profile[name.strip()] = int(cumulative)
+    return profile
+
+
+def _top_packages(profile, limit):
+    packages = defaultdict(int)
+    for name, cumulative in profile.items():
+        if "." not in name and not name.startswith("src"):
+            packages[name] = max(packages[name], cumulative)
+    return sorted(packages.items(), key=lambda item: -item[1])[:limit]
+
+
+def run(rounds, top, save_baseline):
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)
+
+    results = {}
+    print(f"{'module':<24}{'import ms':>12}{'baseline ms':>14}{'change':>10}")
+    for module in TARGETS:
+        profiles = [_import_profile(module) for _ in range(rounds)]
+        best = min(profiles, key=lambda p: p[module])
+        millis = best[module] / 1000
+        results[module] = round(millis, 1)
+
+        before = baseline.get(module)
+        change = f"{(millis - before) / before:+.0%}" if before else "-"
+        before_text = f"{before:.1f}" if before else "-"
+        print(f"{module:<24}{millis:>12.1f}{before_text:>14}{change:>10}")
+        heaviest = ", ".join(
+            f"{name} {us / 1000:.0f}" for name, us in _top_packages(best, top)
+        )
+        print(f"    heaviest (ms): {heaviest}")
+
+    if save_baseline:
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+        print(f"\nBaseline written to {BASELINE_PATH}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+    run(args.rounds, args.top, args.save_baseline)
@@ -0,0 +1,71 @@
+"""
+Per-step state merge cost: full-state node returns versus delta returns.
+
+Nodes used to return ``{**state, key: [...]}``, which sends every message
+channel back through ``add_messages`` on every step. This replays the review
+loop (reporter -> reviewer -> router) for a growing number of iterations and
+times the reducer work of one step in both styles.
+
+    python -m benchmarks.merge_benchmark --loops 1 5 10 25 50 100
+"""
+
+import argparse
+import time
+
+from langchain_core.messages import AIMessage
+from langgraph.graph.message import add_messages
+
+from src.states.state import AgentGraphState
+
+CHANNELS = [key for key in AgentGraphState.__annotations__ if key != "research_question"]
+LOOP_CHANNELS = ("reporter_response", "reviewer_response", "router_response")
+
+
+def _state_after(loops):
+    state = {key: add_messages([], [AIMessage(content="seed")]) for key in CHANNELS}
+    for i in range(loops):
+        for key in LOOP_CHANNELS:
+            state[key] = add_messages(state[key], [AIMessage(content=f"{key} {i}")])
+    return state
+
+
+def _merge(state, update):
+    """Apply an update the way LangGraph does: one reducer call per returned channel."""
+    return {
+        key: add_messages(state[key], update[key]) if key in update else state[key]
+        for key in CHANNELS
+    }
+
+
+def _time_step(state, full_state, repeat):
+    new_message = [AIMessage(content="next report")]
+    if full_state:
+        update = {**state, "reporter_response": new_message}
+    else:
+        update = {"reporter_response": new_message}
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        _merge(state, update)
+    return (time.perf_counter() - started) / repeat
+
+
+def run(loop_counts, repeat):
+    print(f"{'loops':>6}{'messages':>10}{'full state (us)':>18}{'delta (us)':>13}{'ratio':>8}")
+    for loops in loop_counts:
+        state = _state_after(loops)
+        messages = sum(len(state[key]) for key in CHANNELS)
+        full = _time_step(state, True, repeat)
+        delta = _time_step(state, False, repeat)
+        print(
+            f"{loops:>6}{messages:>10}{full * 1e6:>18.1f}{delta * 1e6:>13.1f}"
+            f"{full / delta:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--loops", type=int, nargs="+", default=[1, 5, 10, 25, 50, 100])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    run(args.loops, args.repeat)
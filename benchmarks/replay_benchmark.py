@@ -0,0 +1,188 @@
+"""
+Replay a recorded cassette through the full graph and time the CPU side.
+
+Record real runs first, e.g. ``python batch_research.py questions.jsonl
+--record runs.json.gz``. Replaying answers every LLM call, search and page
+from the cassette without network access or waiting, so what is left is the
+work of the nodes, reducers, prompt building and message (de)serialization
+on realistic payloads. Each recorded question is run ``--rounds`` times.
+
+Reports wall and CPU time per run, time per node and LLM calls per node;
+``--json`` saves the report and ``--compare`` diffs it with one saved from
+another version of the code. Requests the recording never saw (a prompt
+changed, a new call was added) are counted as misses. The scraper keeps the
+first selected page to finish, so a replay can read a different page than
+the recording did and miss the reporter call that followed; a few misses
+against a cassette of concurrent scrapes are expected.
+
+    python -m benchmarks.replay_benchmark runs.json.gz --rounds 5 --json after.json
+    python -m benchmarks.replay_benchmark runs.json.gz --compare before.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Dict, List
+
+from benchmarks.e2e_benchmark import _percentile
+from src.builder.config import GraphConfig
+from src.builder.graph import AgentGraphBuilder
+from src.utils.cassette import get_cassette
+from src.utils.tracing import trace_run
+
+
+def _summarize(trace, wall: float, cpu: float, state: Dict[str, Any]):
+    node_seconds = defaultdict(float)
+    for event in trace.events if trace is not None else []:
+        if event["cat"] == "node":
+            node_seconds[event["name"]] += event["dur"] / 1e6
+    usage_nodes = (state.get("usage") or {}).get("nodes", {})
+    return {
+        "wall": wall,
+        "cpu": cpu,
+        "nodes": dict(node_seconds),
+        "llm_calls": {name: counts["calls"] for name, counts in usage_nodes.items()},
+    }
+
+
+def _run_one(workflow, question: str, recursion_limit: int):
+    config = {"recursion_limit": recursion_limit}
+    with trace_run() as trace:
+        wall, cpu = time.perf_counter(), time.process_time()
+        state = workflow.invoke({"research_question": question}, config)
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    return _summarize(trace, wall, cpu, state)
+
+
+async def _arun_one(workflow, question: str, recursion_limit: int):
+    config = {"recursion_limit": recursion_limit}
+    with trace_run() as trace:
+        wall, cpu = time.perf_counter(), time.process_time()
+        state = await workflow.ainvoke({"research_question": question}, config)
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    return _summarize(trace, wall, cpu, state)
+
+
+async def _arun_all(workflow, questions, recursion_limit):
+    return [await _arun_one(workflow, q, recursion_limit) for q in questions]
+
+
+def _report(runs: List[Dict[str, Any]], cassette_stats: Dict[str, Any]):
+    nodes = {}
+    for name in sorted({name for run in runs for name in run["nodes"]}):
+        seconds = [run["nodes"].get(name, 0.0) for run in runs]
+        calls = [run["llm_calls"].get(name, 0) for run in runs]
+        nodes[name] = {
+            "ms_per_run": round(sum(seconds) / len(runs) * 1000, 3),
+            "ms_p99": round(_percentile(seconds, 99) * 1000, 3),
+            "llm_calls_per_run": round(sum(calls) / len(runs), 2),
+        }
+    walls = [run["wall"] for run in runs]
+    return {
+        "runs": len(runs),
+        "wall_ms_p50": round(_percentile(walls, 50) * 1000, 3),
+        "wall_ms_p99": round(_percentile(walls, 99) * 1000, 3),
+        "cpu_ms_per_run": round(sum(run["cpu"] for run in runs) / len(runs) * 1000, 3),
+        "llm_calls_per_run": round(
+            sum(sum(run["llm_calls"].values()) for run in runs) / len(runs), 2
+        ),
+        "misses": {
+            key.split(":")[0]: value
+            for key, value in cassette_stats.items()
+            if key.endswith(":misses")
+        },
+        "nodes": nodes,
+    }
+
+
+def _delta(now: float, before: float) -> str:
+    if not before:
+        return ""
+    return f" ({(now - before) / before:+.0%})"
+
+
+def _print_report(report: Dict[str, Any], before: Dict[str, Any]) -> None:
+    print(f"runs          {report['runs']}")
+    for key in ("wall_ms_p50", "wall_ms_p99", "cpu_ms_per_run", "llm_calls_per_run"):
+        print(f"{key:<18}{report[key]:>10}{_delta(report[key], before.get(key))}")
+    print(f"misses        {report['misses'] or 'none'}")
+    print(f"\n{'node':<16}{'ms/run':>10}{'ms p99':>10}{'LLM calls/run':>15}")
+    before_nodes = before.get("nodes", {})
+    for name, node in report["nodes"].items():
+        old = before_nodes.get(name, {})
+        calls = f"{node['llm_calls_per_run']:.2f}"
+        if old and old.get("llm_calls_per_run") != node["llm_calls_per_run"]:
+            calls += f" (was {old['llm_calls_per_run']:.2f})"
+        print(
+            f"{name:<16}{node['ms_per_run']:>10.2f}{node['ms_p99']:>10.2f}"
+            f"{calls:>15}{_delta(node['ms_per_run'], old.get('ms_per_run'))}"
+        )
+
+
+def run(args) -> int:
+    config = GraphConfig(
+        server="openai",
+        model=args.model,
+        async_mode=args.mode == "async",
+        cassette_path=args.cassette,
+        cassette_mode="replay",
+        serper_cache_path=None,
+        checkpoint_path=None,
+        # Recorded pages are read on demand; background fetches only add noise
+        prefetch_top_n=0,
+        tracing=True,
+        trace_dir=None,
+        reporter_streaming=args.streaming,
+    )
+    workflow = AgentGraphBuilder(config).build().compile()
+    cassette = get_cassette()
+    questions = list(dict.fromkeys(cassette.questions))
+    if not questions:
+        sys.exit(f"{args.cassette} has no recorded questions")
+    schedule = [q for _ in range(args.rounds) for q in questions]
+
+    quiet = contextlib.redirect_stdout(open(os.devnull, "w"))
+    with quiet if not args.verbose else contextlib.nullcontext():
+        # First pass warms imports, model clients and regex caches
+        warmup = questions[:1]
+        if args.mode == "async":
+            loop = asyncio.new_event_loop()
+            loop.run_until_complete(_arun_all(workflow, warmup, args.recursion_limit))
+            runs = loop.run_until_complete(
+                _arun_all(workflow, schedule, args.recursion_limit)
+            )
+            loop.close()
+        else:
+            _run_one(workflow, warmup[0], args.recursion_limit)
+            runs = [_run_one(workflow, q, args.recursion_limit) for q in schedule]
+
+    report = _report(runs, cassette.stats())
+    before = {}
+    if args.compare:
+        with open(args.compare) as f:
+            before = json.load(f)
+    print(f"cassette      {args.cassette} ({len(questions)} questions recorded)")
+    _print_report(report, before)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("cassette", help="cassette recorded with --record")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--mode", choices=["thread", "async"], default="thread")
+    parser.add_argument("--streaming", action="store_true", help="stream the report")
+    parser.add_argument("--recursion-limit", type=int, default=40)
+    parser.add_argument("--model", default="gpt-4o-mini")
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--compare", help="report saved by an earlier --json run")
+    parser.add_argument("--verbose", action="store_true", help="keep agent output")
+    sys.exit(run(parser.parse_args()))
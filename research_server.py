@@ -0,0 +1,77 @@
+"""
+Serve research questions over HTTP from a graph compiled once at startup.
+
+    python research_server.py --port 8000 --workers 8 --queue-size 32
+
+    curl -X POST localhost:8000/research -d '{"research_question": "..."}'
+    curl -N -H 'Accept: text/event-stream' -X POST localhost:8000/research \\
+        -d '{"research_question": "..."}'
+
+POST /research returns the final report as JSON, or streams per-node
+progress and the reporter's tokens as server-sent events when the client
+accepts text/event-stream.
+Requests beyond the queue size get 429. GET /health reports queue and worker
+state; with --tracing, GET /metrics serves Prometheus latency histograms. The service keeps no per-request state, so instances can be run side
+by side behind a load balancer.
+"""
+
+import argparse
+
+from src.builder.config import GraphConfig
+from src.builder.graph import AgentGraphBuilder
+from src.builder.server import create_server
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--queue-size", type=int, default=16)
+    parser.add_argument("--recursion-limit", type=int, default=40)
+    parser.add_argument("--openai-concurrency", type=int, default=None)
+    parser.add_argument("--serper-concurrency", type=int, default=None)
+    parser.add_argument(
+        "--tracing", action="store_true", help="record node, LLM and HTTP spans"
+    )
+    parser.add_argument(
+        "--trace-dir",
+        default=None,
+        help="write a Chrome trace per run (implies --tracing)",
+    )
+    parser.add_argument("--model", default="gpt-4o-mini")
+    parser.add_argument("--model-endpoint", default=None)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    config = GraphConfig(
+        server="openai",
+        model=args.model,
+        model_endpoint=args.model_endpoint,
+        openai_concurrency=args.openai_concurrency,
+        serper_concurrency=args.serper_concurrency,
+        tracing=args.tracing or bool(args.trace_dir),
+        trace_dir=args.trace_dir,
+        reporter_streaming=True,
+    )
+    workflow = AgentGraphBuilder(config).build().compile()
+    server = create_server(
+        workflow,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        queue_size=args.queue_size,
+        recursion_limit=args.recursion_limit,
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,10 @@
-from src.models.openai_models import get_open_ai, get_open_ai_json
+from src.models.llm_cache import with_cache
+from src.models.openai_models import get_chat_model
 from src.states.state import AgentGraphState
+from src.utils.cassette import with_cassette
+from src.utils.limits import get_retry_policy, with_limit
+from src.utils.tracing import with_tracing
+from src.utils.usage import with_usage
 
 
 class Agent:
@@ -23,11 +28,23 @@ class Agent:
 
     def get_llm(self, json_model=True):
         if self.server == "openai":
-            return (
-                get_open_ai_json(model=self.model, temperature=self.temperature)
-                if json_model
-                else get_open_ai(model=self.model, temperature=self.temperature)
+            # With our own retry policy the SDK must not retry underneath it.
+            sdk_retries = 0 if get_retry_policy("openai") is not None else None
+            llm = get_chat_model(
+                server=self.server,
+                model=self.model,
+                temperature=self.temperature,
+                json_mode=json_model,
+                endpoint=self.model_endpoint,
+                max_retries=sdk_retries,
             )
+            # The cassette sits innermost so replayed answers still pass the
+            # limit, span and meter. The cache sits outside the limit so hits
+            # never wait for a slot, and outside the span and meter so only
+            # real calls are counted.
+            llm = with_cassette(llm)
+            llm = with_tracing(with_limit(llm, "openai"), self.model)
+            return with_cache(with_usage(llm, self.model))
 
     def update_state(self, key, value):
         self.state = {**self.state, key: value}
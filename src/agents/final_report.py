@@ -11,5 +11,4 @@ class FinalReportAgent(Agent):
         response = final_response_value.content
 
         print(colored(f"Final Report 📝: {response}", "blue"))
-        self.update_state("final_reports", response)
-        return self.state
+        return {"final_reports": response}
@@ -1,28 +1,78 @@
+import json
+
 from termcolor import colored
 
 from src.agents.base import Agent
 from src.prompts.planner import planner_prompt_template
+from src.utils.cassette import CassetteMiss
 from src.utils.helper_functions import check_for_content, get_current_utc_datetime
+from src.utils.prompt_budget import fit_prompt
 
 
 class PlannerAgent(Agent):
-    def invoke(self, research_question, prompt=planner_prompt_template, feedback=None):
+    def _build_messages(self, research_question, prompt, feedback, num_search_terms):
         feedback_value = feedback() if callable(feedback) else feedback
         feedback_value = check_for_content(feedback_value)
 
+        question = f"research question: {research_question}"
+        sections = fit_prompt(
+            "planner",
+            fixed=[prompt, question],
+            sections={"feedback": feedback_value},
+        )
+
         planner_prompt = prompt.format(
-            feedback=feedback_value, datetime=get_current_utc_datetime()
+            feedback=sections["feedback"],
+            datetime=get_current_utc_datetime(),
+            num_search_terms=num_search_terms,
         )
 
-        messages = [
+        return [
             {"role": "system", "content": planner_prompt},
-            {"role": "user", "content": f"research question: {research_question}"},
+            {"role": "user", "content": question},
         ]
 
+    def _handle_response(self, response):
+        print(colored(f"Planner 👩🏿‍💻: {response}", "cyan"))
+        return {"planner_response": response}
+
+    def _handle_error(self, e: Exception):
+        print(colored(f"Error in planner processing: {str(e)}", "red"))
+        # No search term, so the search node reports the plan as unusable
+        return {"planner_response": json.dumps({"error": str(e)})}
+
+    def invoke(
+        self,
+        research_question,
+        prompt=planner_prompt_template,
+        feedback=None,
+        num_search_terms=1,
+    ):
+        messages = self._build_messages(
+            research_question, prompt, feedback, num_search_terms
+        )
+
         llm = self.get_llm()
-        ai_msg = llm.invoke(messages)
-        response = ai_msg.content
+        try:
+            ai_msg = llm.invoke(messages)
+        except CassetteMiss as e:
+            return self._handle_error(e)
+        return self._handle_response(ai_msg.content)
 
-        self.update_state("planner_response", response)
-        print(colored(f"Planner 👩🏿‍💻: {response}", "cyan"))
-        return self.state
+    async def ainvoke(
+        self,
+        research_question,
+        prompt=planner_prompt_template,
+        feedback=None,
+        num_search_terms=1,
+    ):
+        messages = self._build_messages(
+            research_question, prompt, feedback, num_search_terms
+        )
+
+        llm = self.get_llm()
+        try:
+            ai_msg = await llm.ainvoke(messages)
+        except CassetteMiss as e:
+            return self._handle_error(e)
+        return self._handle_response(ai_msg.content)
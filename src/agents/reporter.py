@@ -1,18 +1,74 @@
+import statistics
+import threading
+import time
+from typing import Callable, Optional
+
 from termcolor import colored
 
 from src.agents.base import Agent
 from src.prompts.reporter import reporter_prompt_template
 from src.utils.helper_functions import check_for_content, get_current_utc_datetime
+from src.utils.prompt_budget import fit_prompt
+
+
+class StreamStats:
+    """Time-to-first-token and duration of streamed reports."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ttfts = []
+        self._durations = []
+
+    def record(self, ttft: Optional[float], duration: float) -> None:
+        with self._lock:
+            if ttft is not None:
+                self._ttfts.append(ttft)
+            self._durations.append(duration)
+
+    def stats(self) -> dict:
+        with self._lock:
+            ttfts, durations = list(self._ttfts), list(self._durations)
+        return {
+            "streams": len(durations),
+            "ttft_p50": statistics.median(ttfts) if ttfts else None,
+            "ttft_max": max(ttfts) if ttfts else None,
+            "duration_p50": statistics.median(durations) if durations else None,
+        }
+
+
+# Shared by every reporter agent in the process.
+stream_stats = StreamStats()
+
+
+class TokenCollector:
+    """Joins streamed chunks and reports each one, timing the first."""
+
+    def __init__(self, on_token: Callable[[str], None], on_first_token=None):
+        self.on_token = on_token
+        self.on_first_token = on_first_token
+        self.started = time.perf_counter()
+        self.ttft: Optional[float] = None
+        self.parts = []
+
+    def add(self, chunk) -> None:
+        text = chunk.content if isinstance(chunk.content, str) else ""
+        if not text:
+            return
+        if self.ttft is None:
+            self.ttft = time.perf_counter() - self.started
+            if self.on_first_token:
+                self.on_first_token(self.ttft)
+        self.parts.append(text)
+        self.on_token(text)
+
+    def finish(self) -> str:
+        stream_stats.record(self.ttft, time.perf_counter() - self.started)
+        return "".join(self.parts)
 
 
 class ReporterAgent(Agent):
-    def invoke(
-        self,
-        research_question,
-        prompt=reporter_prompt_template,
-        feedback=None,
-        previous_reports=None,
-        research=None,
+    def _build_messages(
+        self, research_question, prompt, feedback, previous_reports, research
     ):
         feedback_value = feedback() if callable(feedback) else feedback
         previous_reports_value = (
@@ -24,22 +80,101 @@ class ReporterAgent(Agent):
         previous_reports_value = check_for_content(previous_reports_value)
         research_value = check_for_content(research_value)
 
+        # ReporterNode hands over the search results and scraped pages inside
+        # the question payload; they are the sections that grow with the run.
+        payload = {}
+        if isinstance(research_question, dict):
+            payload = research_question.get("input") or {}
+        rest = {
+            key: value
+            for key, value in payload.items()
+            if key not in ("scraped_content", "search_results")
+        }
+        sections = fit_prompt(
+            "reporter",
+            fixed=[prompt, str(research_value or ""), str(rest or research_question)],
+            sections={
+                "scraped_content": payload.get("scraped_content"),
+                "search_results": payload.get("search_results"),
+                "feedback": feedback_value,
+                "previous_reports": previous_reports_value,
+            },
+        )
+        if payload:
+            research_question = {
+                **research_question,
+                "input": {
+                    **payload,
+                    "scraped_content": sections["scraped_content"],
+                    "search_results": sections["search_results"],
+                },
+            }
+
         reporter_prompt = prompt.format(
-            feedback=feedback_value,
-            previous_reports=previous_reports_value,
+            feedback=sections["feedback"],
+            previous_reports=sections["previous_reports"],
             datetime=get_current_utc_datetime(),
             research=research_value,
         )
 
-        messages = [
+        return [
             {"role": "system", "content": reporter_prompt},
             {"role": "user", "content": f"research question: {research_question}"},
         ]
 
+    def _handle_response(self, response):
+        print(colored(f"Reporter 👨‍💻: {response}", "yellow"))
+        return {"reporter_response": response}
+
+    def invoke(
+        self,
+        research_question,
+        prompt=reporter_prompt_template,
+        feedback=None,
+        previous_reports=None,
+        research=None,
+        on_token=None,
+        on_first_token=None,
+    ):
+        """
+        Write the report. With ``on_token`` the model is streamed and every
+        text chunk is passed to it as it arrives; ``on_first_token`` receives
+        the time to first token in seconds.
+        """
+        messages = self._build_messages(
+            research_question, prompt, feedback, previous_reports, research
+        )
+
         llm = self.get_llm(json_model=False)
-        ai_msg = llm.invoke(messages)
-        response = ai_msg.content
+        if on_token is None:
+            ai_msg = llm.invoke(messages)
+            return self._handle_response(ai_msg.content)
 
-        print(colored(f"Reporter 👨‍💻: {response}", "yellow"))
-        self.update_state("reporter_response", response)
-        return self.state
+        collector = TokenCollector(on_token, on_first_token)
+        for chunk in llm.stream(messages):
+            collector.add(chunk)
+        return self._handle_response(collector.finish())
+
+    async def ainvoke(
+        self,
+        research_question,
+        prompt=reporter_prompt_template,
+        feedback=None,
+        previous_reports=None,
+        research=None,
+        on_token=None,
+        on_first_token=None,
+    ):
+        messages = self._build_messages(
+            research_question, prompt, feedback, previous_reports, research
+        )
+
+        llm = self.get_llm(json_model=False)
+        if on_token is None:
+            ai_msg = await llm.ainvoke(messages)
+            return self._handle_response(ai_msg.content)
+
+        collector = TokenCollector(on_token, on_first_token)
+        async for chunk in llm.astream(messages):
+            collector.add(chunk)
+        return self._handle_response(collector.finish())
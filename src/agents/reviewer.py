@@ -1,11 +1,73 @@
+import json
+
 from termcolor import colored
 
 from src.agents.base import Agent
 from src.prompts.reviewer import reviewer_prompt_template
 from src.utils.helper_functions import get_current_utc_datetime
+from src.utils.prompt_budget import fit_prompt
+
+
+def latest_review(state: dict):
+    """Return ``(parsed_review, feedback_text)`` from the latest review in ``state``."""
+    reviewer_messages = state.get("reviewer_response", [])
+    if not reviewer_messages:
+        return None, "No reviewer feedback available"
+
+    last_review = reviewer_messages[-1]
+    try:
+        # Parse the nested structure
+        review_data = json.loads(last_review.content)
+        reviewer_response = json.loads(review_data["content"]["reviewer_response"])
+        return reviewer_response, json.dumps(reviewer_response, indent=2)
+    except (json.JSONDecodeError, KeyError, TypeError):
+        return None, str(last_review.content)
 
 
 class ReviewerAgent(Agent):
+    def _build_messages(self, state_input: dict, prompt, feedback, state):
+        # Extract input values
+        input_data = state_input.get("input", {})
+        research_question = input_data.get("research_question", "")
+        report_content = input_data.get("report_content", "")
+
+        print(colored(f"Reviewing report for question: {research_question}", "cyan"))
+
+        question = f"research question: {research_question}"
+        sections = fit_prompt(
+            "reviewer",
+            fixed=[prompt, question],
+            sections={
+                "report_content": report_content,
+                "feedback": feedback,
+                "state": str(state) if state is not None else None,
+            },
+        )
+
+        # Format the prompt with the report content
+        reviewer_prompt = prompt.format(
+            report_content=sections["report_content"],
+            datetime=get_current_utc_datetime(),
+            feedback=sections["feedback"],
+            state=sections["state"],
+        )
+
+        # Create messages for LLM
+        return [
+            {"role": "system", "content": reviewer_prompt},
+            {"role": "user", "content": question},
+        ]
+
+    def _handle_response(self, response):
+        # Update state with the response
+        print(colored(f"Reviewer 👩🏽‍⚖️: {response}", "magenta"))
+
+        return {"reviewer_response": response}
+
+    def _handle_error(self, e: Exception):
+        print(colored(f"Error in ReviewerAgent: {str(e)}", "red"))
+        return {"reviewer_response": f"Error in review: {str(e)}"}
+
     def invoke(
         self,
         state_input: dict,
@@ -21,42 +83,30 @@ class ReviewerAgent(Agent):
             prompt: The prompt template to use
         """
         try:
-            # Extract input values
-            input_data = state_input.get("input", {})
-            research_question = input_data.get("research_question", "")
-            report_content = input_data.get("report_content", "")
-
-            print(
-                colored(f"Reviewing report for question: {research_question}", "cyan")
-            )
-
-            # Format the prompt with the report content
-            reviewer_prompt = prompt.format(
-                report_content=report_content,  # Changed from reporter to report_content
-                datetime=get_current_utc_datetime(),
-                feedback=feedback,
-                state=state,
-            )
-
-            # Create messages for LLM
-            messages = [
-                {"role": "system", "content": reviewer_prompt},
-                {"role": "user", "content": f"research question: {research_question}"},
-            ]
+            messages = self._build_messages(state_input, prompt, feedback, state)
 
             # Get LLM response
             llm = self.get_llm()
             ai_msg = llm.invoke(messages)
-            response = ai_msg.content
+            return self._handle_response(ai_msg.content)
 
-            # Update state with the response
-            self.state = {"reviewer_response": response}
+        except Exception as e:
+            return self._handle_error(e)
 
-            print(colored(f"Reviewer 👩🏽‍⚖️: {response}", "magenta"))
+    async def ainvoke(
+        self,
+        state_input: dict,
+        prompt=reviewer_prompt_template,
+        feedback=None,
+        state=None,
+    ):
+        """Async variant of ``invoke``."""
+        try:
+            messages = self._build_messages(state_input, prompt, feedback, state)
 
-            return self.state
+            llm = self.get_llm()
+            ai_msg = await llm.ainvoke(messages)
+            return self._handle_response(ai_msg.content)
 
         except Exception as e:
-            print(colored(f"Error in ReviewerAgent: {str(e)}", "red"))
-            self.state = {"reviewer_response": f"Error in review: {str(e)}"}
-            return self.state
+            return self._handle_error(e)
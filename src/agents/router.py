@@ -1,12 +1,158 @@
 import json
+import threading
+from collections import Counter
+from typing import Optional
 
 from termcolor import colored
 
 from src.agents.base import Agent
+from src.agents.reviewer import latest_review
+from src.custom_logging import setup_logger
 from src.prompts.router import router_guided_json, router_prompt_template
+from src.utils.prompt_budget import fit_prompt
+
+logger = setup_logger(__name__)
+
+SCRAPE_FAILURE_HINTS = (
+    "403",
+    "forbidden",
+    "garbled",
+    "error in scraping",
+    "could not access",
+    "unable to access",
+    "paywall",
+)
+SEARCH_FAILURE_HINTS = ("no organic results", "no search results", "no plan provided")
+
+
+def _as_bool(value) -> Optional[bool]:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        lowered = value.strip().lower()
+        if lowered in ("true", "yes"):
+            return True
+        if lowered in ("false", "no"):
+            return False
+    return None
+
+
+class RouterRules:
+    """
+    Deterministic routing for reviewer feedback that does not need an LLM.
+
+    ``route`` returns the next agent, or None when the feedback is ambiguous
+    and the router LLM should decide. Counts of both outcomes are kept so the
+    fast-path rate can be monitored.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = Counter()
+
+    def _decide(self, review: Optional[dict]) -> Optional[str]:
+        if not isinstance(review, dict):
+            return None
+
+        if _as_bool(review.get("pass_review")):
+            return "final_report"
+
+        feedback = str(review.get("feedback", "")).lower()
+        if any(hint in feedback for hint in SEARCH_FAILURE_HINTS):
+            return "planner"
+        if any(hint in feedback for hint in SCRAPE_FAILURE_HINTS):
+            return "selector"
+
+        relevant = _as_bool(review.get("relevant_to_research_question"))
+        comprehensive = _as_bool(review.get("comprehensive"))
+        citations = _as_bool(review.get("citations_provided"))
+        if relevant is False:
+            return "selector"
+        if relevant and (comprehensive is False or citations is False):
+            return "reporter"
+        return None
+
+    def route(self, review: Optional[dict]) -> Optional[str]:
+        decision = self._decide(review)
+        with self._lock:
+            self._counts["fast_path" if decision else "llm"] += 1
+            if decision:
+                self._counts[f"fast_path:{decision}"] += 1
+        return decision
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self._counts["fast_path"] + self._counts["llm"]
+            return {
+                **self._counts,
+                "fast_path_rate": self._counts["fast_path"] / total if total else 0.0,
+            }
+
+
+# Shared across router agents so the fast-path rate covers the whole process.
+router_rules = RouterRules()
 
 
 class RouterAgent(Agent):
+    def __init__(self, *args, rules: Optional[RouterRules] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.rules = rules
+
+    @staticmethod
+    def _reviewer_feedback(current_state: dict):
+        """Return ``(parsed_review, feedback_text)`` from the latest review."""
+        return latest_review(current_state)
+
+    def _fast_route(self, state_input: dict) -> Optional[str]:
+        if self.rules is None:
+            return None
+        current_state = state_input.get("input", {}).get("current_state", {})
+        review, _ = self._reviewer_feedback(current_state)
+        decision = self.rules.route(review)
+        if decision:
+            logger.info(f"Router fast path chose {decision}")
+        return decision
+
+    def _build_messages(self, state_input: dict, prompt):
+        input_data = state_input.get("input", {})
+        research_question = input_data.get("research_question", "")
+        current_state = input_data.get("current_state", {})
+
+        # Get the reviewer feedback from the state
+        _, feedback = self._reviewer_feedback(current_state)
+
+        question = f"research question: {research_question}"
+        instructions = f"Please provide your response in the following JSON structure: {router_guided_json}"
+        sections = fit_prompt(
+            "router",
+            fixed=[prompt, question, instructions],
+            sections={"feedback": feedback},
+        )
+
+        # Format prompt
+        router_prompt = prompt.format(feedback=sections["feedback"])
+
+        # Create messages for LLM
+        return [
+            {"role": "system", "content": router_prompt},
+            {"role": "user", "content": question},
+            {"role": "system", "content": instructions},
+        ]
+
+    def _handle_response(self, response):
+        print(colored(f"Router 🧭: {response}", "blue"))
+        return {"router_response": response}
+
+    def _handle_error(self, e: Exception):
+        print(colored(f"Error in RouterAgent: {str(e)}", "red"))
+        return {
+            "router_response": json.dumps(
+                {
+                    "next_agent": "final_report",  # Default to final_report on error
+                }
+            )
+        }
+
     def invoke(self, state_input: dict, prompt=router_prompt_template):
         """
         Invoke the router agent with input state.
@@ -16,57 +162,32 @@ class RouterAgent(Agent):
             prompt: The prompt template to use
         """
         try:
-            input_data = state_input.get("input", {})
-            research_question = input_data.get("research_question", "")
-            current_state = input_data.get("current_state", {})
-
-            # Get the reviewer feedback from the state
-            reviewer_messages = current_state.get("reviewer_response", [])
-            if not reviewer_messages:
-                feedback = "No reviewer feedback available"
-            else:
-                last_review = reviewer_messages[-1]
-                try:
-                    # Parse the nested structure
-                    review_data = json.loads(last_review.content)
-                    reviewer_response = json.loads(
-                        review_data["content"]["reviewer_response"]
-                    )
-                    feedback = json.dumps(reviewer_response, indent=2)
-                except json.JSONDecodeError:
-                    feedback = str(last_review.content)
-
-            # Format prompt
-            router_prompt = prompt.format(feedback=feedback)
-
-            # Create messages for LLM
-            messages = [
-                {"role": "system", "content": router_prompt},
-                {"role": "user", "content": f"research question: {research_question}"},
-                {
-                    "role": "system",
-                    "content": f"Please provide your response in the following JSON structure: {router_guided_json}",
-                },
-            ]
+            decision = self._fast_route(state_input)
+            if decision:
+                return self._handle_response(json.dumps({"next_agent": decision}))
+
+            messages = self._build_messages(state_input, prompt)
 
             # Get LLM response
             llm = self.get_llm()
             ai_msg = llm.invoke(messages)
-            response = ai_msg.content
+            return self._handle_response(ai_msg.content)
 
-            print(colored(f"Router 🧭: {response}", "blue"))
+        except Exception as e:
+            return self._handle_error(e)
 
-            # Update state
-            self.state = {"router_response": response}
-            return self.state
+    async def ainvoke(self, state_input: dict, prompt=router_prompt_template):
+        """Async variant of ``invoke``."""
+        try:
+            decision = self._fast_route(state_input)
+            if decision:
+                return self._handle_response(json.dumps({"next_agent": decision}))
+
+            messages = self._build_messages(state_input, prompt)
+
+            llm = self.get_llm()
+            ai_msg = await llm.ainvoke(messages)
+            return self._handle_response(ai_msg.content)
 
         except Exception as e:
-            print(colored(f"Error in RouterAgent: {str(e)}", "red"))
-            self.state = {
-                "router_response": json.dumps(
-                    {
-                        "next_agent": "final_report",  # Default to final_report on error
-                    }
-                )
-            }
-            return self.state
+            return self._handle_error(e)
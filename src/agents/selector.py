@@ -3,16 +3,12 @@ from termcolor import colored
 from src.agents.base import Agent
 from src.prompts.selector import selector_prompt_template
 from src.utils.helper_functions import check_for_content, get_current_utc_datetime
+from src.utils.prompt_budget import fit_prompt
 
 
 class SelectorAgent(Agent):
-    def invoke(
-        self,
-        research_question,
-        prompt=selector_prompt_template,
-        feedback=None,
-        previous_selections=None,
-        serp=None,
+    def _build_messages(
+        self, research_question, prompt, feedback, previous_selections, serp, num_pages
     ):
         # Safely handle potentially callable inputs
         try:
@@ -40,29 +36,75 @@ class SelectorAgent(Agent):
         feedback_value = check_for_content(feedback_value)
         previous_selections_value = check_for_content(previous_selections_value)
 
+        question = f"research question: {research_question}"
+        sections = fit_prompt(
+            "selector",
+            fixed=[prompt, question],
+            sections={
+                "serp": serp_content,
+                "feedback": feedback_value,
+                "previous_selections": previous_selections_value,
+            },
+        )
+
         # Format prompt with safe values
         selector_prompt = prompt.format(
-            feedback=feedback_value,
-            previous_selections=previous_selections_value,
-            serp=serp_content,
+            feedback=sections["feedback"],
+            previous_selections=sections["previous_selections"],
+            serp=sections["serp"],
             datetime=get_current_utc_datetime(),
+            num_pages=num_pages,
         )
 
         # Create messages for LLM
-        messages = [
+        return [
             {"role": "system", "content": selector_prompt},
-            {"role": "user", "content": f"research question: {research_question}"},
+            {"role": "user", "content": question},
         ]
 
+    def _handle_response(self, response):
+        print(colored(f"Selector 🧑🏼‍💻: {response}", "green"))
+        return {"selector_response": response}
+
+    def invoke(
+        self,
+        research_question,
+        prompt=selector_prompt_template,
+        feedback=None,
+        previous_selections=None,
+        serp=None,
+        num_pages=1,
+    ):
+        messages = self._build_messages(
+            research_question, prompt, feedback, previous_selections, serp, num_pages
+        )
+
         # Get LLM response
         try:
             llm = self.get_llm()
             ai_msg = llm.invoke(messages)
-            response = ai_msg.content
-            print(colored(f"Selector 🧑🏼‍💻: {response}", "green"))
-            self.update_state("selector_response", response)
+            return self._handle_response(ai_msg.content)
         except Exception as e:
             print(colored(f"Error in selector processing: {str(e)}", "red"))
-            response = ""
+            return {}
+
+    async def ainvoke(
+        self,
+        research_question,
+        prompt=selector_prompt_template,
+        feedback=None,
+        previous_selections=None,
+        serp=None,
+        num_pages=1,
+    ):
+        messages = self._build_messages(
+            research_question, prompt, feedback, previous_selections, serp, num_pages
+        )
 
-        return self.state
+        try:
+            llm = self.get_llm()
+            ai_msg = await llm.ainvoke(messages)
+            return self._handle_response(ai_msg.content)
+        except Exception as e:
+            print(colored(f"Error in selector processing: {str(e)}", "red"))
+            return {}
@@ -0,0 +1,259 @@
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterator, Optional, Set, TextIO, Tuple
+
+from src.custom_logging import setup_logger
+from src.utils.tracing import trace_run
+
+logger = setup_logger(__name__)
+
+
+def _invalid(reason: str) -> Dict[str, Any]:
+    return {"research_question": None, "invalid": reason}
+
+
+def read_questions(
+    path: str, offset: int = 0, skip: Optional[Set[int]] = None
+) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Yield ``(offset, item)`` for every question line at or after ``offset``.
+
+    A line is either a JSON object with ``research_question`` (or ``question``)
+    and an optional ``id``, or a bare JSON string. Any other line is yielded
+    with an ``invalid`` reason, which the runner reports as an error instead
+    of stopping the batch. Offsets in ``skip`` are left out.
+    """
+    with open(path, encoding="utf-8") as f:
+        for line_offset, line in enumerate(f):
+            if line_offset < offset or not line.strip():
+                continue
+            if skip and line_offset in skip:
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_offset, _invalid(f"malformed JSON: {e}")
+                continue
+            if isinstance(item, str):
+                item = {"research_question": item}
+            elif not isinstance(item, dict):
+                reason = f"expected a JSON object or string, got {type(item).__name__}"
+                yield line_offset, _invalid(reason)
+                continue
+            item.setdefault("research_question", item.get("question", ""))
+            yield line_offset, item
+
+
+def completed_offsets(path: str) -> Set[int]:
+    """
+    Offsets answered successfully in an output file, used to resume a batch.
+    Errors and timeouts are left out so they are tried again.
+    """
+    done = set()
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    if record.get("status", "ok") == "ok":
+                        done.add(record["offset"])
+                except (json.JSONDecodeError, KeyError, TypeError, AttributeError):
+                    continue
+    except FileNotFoundError:
+        pass
+    return done
+
+
+def _final_report(state: Dict[str, Any]) -> Optional[str]:
+    reports = state.get("final_reports") or []
+    if not reports:
+        return None
+    report = reports[-1]
+    return getattr(report, "content", report)
+
+
+class BatchRunner:
+    """
+    Runs research questions through one compiled workflow on a worker pool.
+
+    Results are written to ``output`` as JSON lines in completion order, each
+    tagged with the input ``offset`` so a batch can be resumed. In async mode
+    a timed-out item is cancelled. A thread cannot be interrupted, so in thread
+    mode a timed-out item is reported and its worker runs on until the graph
+    returns (``recursion_limit`` bounds how long); its result is dropped. Such
+    a worker keeps its pool slot, so at most ``workers`` graphs ever run at
+    once, timed out or not; ``stats["abandoned"]`` counts them.
+    """
+
+    def __init__(
+        self,
+        workflow,
+        output: TextIO,
+        workers: int = 4,
+        timeout: Optional[float] = None,
+        recursion_limit: int = 40,
+    ):
+        self.workflow = workflow
+        self.output = output
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.recursion_limit = recursion_limit
+        self._write_lock = threading.Lock()
+        # Offsets with a result line; a timed-out thread finishing later is dropped.
+        self._written: Set[int] = set()
+        # offset -> start time of items currently running in a worker thread
+        self._running: Dict[int, float] = {}
+        self.stats = {"ok": 0, "error": 0, "timeout": 0, "abandoned": 0}
+
+    def _inputs(self, item: Dict[str, Any]):
+        return (
+            {"research_question": item["research_question"]},
+            {"recursion_limit": self.recursion_limit},
+        )
+
+    def _write(
+        self,
+        offset: int,
+        item: Dict[str, Any],
+        status: str,
+        started: float,
+        state: Optional[Dict[str, Any]] = None,
+        error: Optional[BaseException] = None,
+    ) -> None:
+        record = {
+            "offset": offset,
+            "id": item.get("id", offset),
+            "research_question": item["research_question"],
+            "status": status,
+            "final_report": _final_report(state) if state else None,
+            "usage": (state.get("usage") or {}).get("total") if state else None,
+            "error": f"{type(error).__name__}: {error}" if error else None,
+            "elapsed": round(time.perf_counter() - started, 3),
+        }
+        with self._write_lock:
+            if offset in self._written:
+                return
+            self._written.add(offset)
+            self.stats[status] += 1
+            self.output.write(json.dumps(record) + "\n")
+            self.output.flush()
+
+    def _reject(self, offset: int, item: Dict[str, Any]) -> None:
+        logger.error(f"Line at offset {offset} skipped: {item['invalid']}")
+        self._write(
+            offset, item, "error", time.perf_counter(), error=ValueError(item["invalid"])
+        )
+
+    def _run_one(self, offset: int, item: Dict[str, Any]) -> None:
+        if "invalid" in item:
+            return self._reject(offset, item)
+        started = time.perf_counter()
+        with self._write_lock:
+            self._running[offset] = started
+        try:
+            with trace_run(f"batch-{item.get('id', offset)}"):
+                state = self.workflow.invoke(*self._inputs(item))
+            self._write(offset, item, "ok", started, state)
+        except Exception as e:
+            logger.error(f"Question at offset {offset} failed: {e}")
+            self._write(offset, item, "error", started, error=e)
+        finally:
+            with self._write_lock:
+                self._running.pop(offset, None)
+
+    def run(self, items) -> Dict[str, int]:
+        """Run with a thread pool, keeping at most ``2 * workers`` items queued."""
+        executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="batch"
+        )
+        # future -> (offset, item)
+        pending: Dict[Any, Tuple[int, Dict[str, Any]]] = {}
+        items = iter(items)
+        exhausted = False
+        try:
+            while pending or not exhausted:
+                while not exhausted and len(pending) < self.workers * 2:
+                    try:
+                        offset, item = next(items)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    future = executor.submit(self._run_one, offset, item)
+                    pending[future] = (offset, item)
+
+                if not pending:
+                    break
+                done, _ = wait(pending, timeout=1.0, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.pop(future)
+                if self.timeout is None:
+                    continue
+
+                now = time.perf_counter()
+                for future, (offset, item) in list(pending.items()):
+                    with self._write_lock:
+                        started = self._running.get(offset)
+                    # Items still queued have not used any of their time yet.
+                    if started is None or now - started < self.timeout:
+                        continue
+                    # A thread cannot be interrupted; report the item and let
+                    # its worker finish in the background.
+                    pending.pop(future)
+                    future.cancel()
+                    with self._write_lock:
+                        self.stats["abandoned"] += 1
+                    logger.warning(
+                        f"Question at offset {offset} timed out; its worker "
+                        "stays busy until the graph returns"
+                    )
+                    self._write(
+                        offset,
+                        item,
+                        "timeout",
+                        started,
+                        error=TimeoutError(f"no result after {self.timeout}s"),
+                    )
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        return self.stats
+
+    async def _arun_one(self, offset: int, item: Dict[str, Any]) -> None:
+        if "invalid" in item:
+            return self._reject(offset, item)
+        started = time.perf_counter()
+        try:
+            with trace_run(f"batch-{item.get('id', offset)}"):
+                state = await asyncio.wait_for(
+                    self.workflow.ainvoke(*self._inputs(item)), self.timeout
+                )
+            self._write(offset, item, "ok", started, state)
+        except asyncio.TimeoutError as e:
+            self._write(offset, item, "timeout", started, error=e)
+        except Exception as e:
+            logger.error(f"Question at offset {offset} failed: {e}")
+            self._write(offset, item, "error", started, error=e)
+
+    async def arun(self, items) -> Dict[str, int]:
+        """Run with ``workers`` coroutines pulling from a bounded queue."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.workers * 2)
+
+        async def _worker():
+            while True:
+                entry = await queue.get()
+                try:
+                    if entry is None:
+                        return
+                    await self._arun_one(*entry)
+                finally:
+                    queue.task_done()
+
+        workers = [asyncio.create_task(_worker()) for _ in range(self.workers)]
+        for entry in items:
+            await queue.put(entry)
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+        return self.stats
@@ -1,5 +1,5 @@
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import Dict, Optional
 
 
 @dataclass
@@ -11,3 +11,112 @@ class GraphConfig:
     stop: Optional[list] = None
     model_endpoint: Optional[str] = None
     temperature: float = 0
+    # Register the async node variants; run the compiled graph with ainvoke/astream
+    async_mode: bool = False
+    llm_max_connections: int = 20
+    llm_max_keepalive_connections: int = 10
+    # Process-wide caps on in-flight OpenAI / Serper calls (None: no cap)
+    openai_concurrency: Optional[int] = None
+    serper_concurrency: Optional[int] = None
+    # Per-provider quotas shared across threads (None: unlimited)
+    openai_rpm: Optional[int] = None
+    openai_tpm: Optional[int] = None
+    serper_rpm: Optional[int] = None
+    # Retries for 429/5xx/connection errors with jittered exponential backoff
+    # honoring Retry-After; 0 disables them (and leaves the OpenAI SDK's own)
+    provider_max_retries: int = 4
+    retry_base_delay: float = 0.5
+    retry_max_delay: float = 30.0
+    llm_cache: bool = False
+    llm_cache_path: Optional[str] = ".cache/llm_responses.sqlite"
+    llm_cache_ttl: Optional[float] = 86400
+    llm_cache_max_entries: int = 1024
+    llm_cache_max_disk_entries: int = 10000
+    # Prompt timestamps are floored to this many seconds when building cache keys
+    llm_cache_datetime_bucket: Optional[int] = 3600
+    # Number of search terms the planner emits; they are searched concurrently
+    search_fanout: int = 1
+    search_concurrency: int = 4
+    # Number of ranked URLs the selector returns; they are scraped concurrently
+    selector_top_k: int = 1
+    # Successful pages handed to the reporter
+    scraper_max_pages: int = 1
+    scraper_per_host_limit: int = 2
+    scraper_concurrency: int = 4
+    scraper_deadline: float = 20.0
+    scraper_timeout: tuple = (3.05, 10)
+    # Stop reading a page once this many bytes or characters of text were read
+    scraper_max_bytes: int = 2 * 1024 * 1024
+    scraper_text_budget: int = 4000
+    # Visible characters downloaded before extraction; defaults to 4x the text budget
+    scraper_read_budget: Optional[int] = None
+    # "auto", "lxml", "selectolax", "stdlib", or None for raw visible text
+    scraper_extractor: Optional[str] = "auto"
+    # Token budget for BM25-ranked passages per page; None keeps the first
+    # scraper_text_budget characters instead
+    scraper_passage_token_budget: Optional[int] = 1000
+    # Top organic results fetched while the selector decides; 0 disables it
+    prefetch_top_n: int = 3
+    # Prefetched pages no scraper released are dropped after this many seconds
+    prefetch_ttl: float = 120.0
+    # Messages kept per state channel; nodes only read the latest one.
+    # None keeps everything, history_limits overrides per channel.
+    history_limit: Optional[int] = 10
+    history_limits: Dict[str, Optional[int]] = field(
+        default_factory=lambda: {
+            "serper_response": 2,
+            "scraper_response": 2,
+            "reporter_response": 3,
+        }
+    )
+    # Older messages are cut to this many characters instead of dropped (0 drops)
+    history_digest_chars: int = 0
+    # SQLite file used by AgentGraphBuilder.compile to checkpoint runs, e.g.
+    # ".cache/checkpoints.sqlite"; None disables
+    checkpoint_path: Optional[str] = None
+    # Checkpoints kept per thread; resuming only needs the latest. None keeps all
+    checkpoint_keep: Optional[int] = 10
+    # Record spans of nodes, LLM and HTTP calls (Chrome traces, Prometheus
+    # histograms); nodes are not wrapped at all when off
+    tracing: bool = False
+    # Chrome trace JSON per run; None keeps only the histograms. A run is what
+    # happens inside src.utils.tracing.trace_run, which the batch runner,
+    # server and resume_run open; wrap direct invoke/stream calls in one too
+    trace_dir: Optional[str] = ".cache/traces"
+    # Fail fast when a node returns more than its own channels (for development)
+    check_node_outputs: bool = False
+    # Stream the reporter's answer to stream_mode="custom" consumers token by token
+    reporter_streaming: bool = False
+    # Send the run to final_report once it used this many tokens or dollars;
+    # checked after each LLM node, so the last call may overshoot it
+    token_budget: Optional[int] = None
+    cost_budget: Optional[float] = None
+    # USD per million (input, output) tokens, added to the built-in prices
+    model_prices: Dict[str, tuple] = field(default_factory=dict)
+    # Tokens a whole prompt may use (None: only per-section limits apply);
+    # sections are cut to prompt_section_limits first, then by priority
+    max_prompt_tokens: Optional[int] = 24000
+    prompt_section_limits: Dict[str, Optional[int]] = field(default_factory=dict)
+    # tiktoken encoding used to count prompt tokens, e.g. "o200k_base" (it must
+    # be in tiktoken's cache when offline); None uses a 4-chars-per-token estimate
+    prompt_tokenizer: Optional[str] = None
+    # Gzipped JSON of every LLM answer, search result and page: "record" writes
+    # it at exit, "replay" answers from it offline (see benchmarks/replay_benchmark)
+    cassette_path: Optional[str] = None
+    cassette_mode: str = "replay"
+    # Route clear-cut reviewer verdicts without calling the router LLM
+    router_fast_path: bool = True
+    # Review loops that may repeat earlier work before the run goes to
+    # final_report; a stalled loop is first sent one branch up. None turns the
+    # check off
+    convergence_max_stalls: Optional[int] = 2
+    # Serper-compatible service to query instead of google.serper.dev, e.g. the
+    # stand-in in benchmarks/fakes.py
+    serper_base_url: Optional[str] = None
+    serper_timeout: tuple = (3.05, 10)
+    serper_pool_size: int = 10
+    serper_cache_ttl: float = 3600
+    # Expired results are still served for this long while being refreshed
+    serper_stale_ttl: float = 86400
+    serper_cache_max_entries: int = 1024
+    serper_cache_path: Optional[str] = ".cache/serper_results.sqlite"
@@ -1,12 +1,13 @@
 import json
 import logging
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
-from IPython.display import Image, display
 from langchain_core.messages import HumanMessage
-from langchain_core.runnables.graph import CurveStyle, MermaidDrawMethod, NodeStyles
 from langgraph.graph import END, StateGraph
 
+from src.models.llm_cache import configure_llm_cache
+from src.models.openai_models import configure_client_pool
+from src.nodes.base import enforce_delta_contract
 from src.nodes.final_report import FinalReportNode
 from src.nodes.planner import PlannerNode
 from src.nodes.reporter import ReporterNode
@@ -15,10 +16,28 @@ from src.nodes.router import RouterNode
 from src.nodes.scraper import ScraperNode
 from src.nodes.selector import SelectorNode
 from src.nodes.serper import SerperNode
-from src.states.state import AgentGraphState
+from src.states.checkpoint import SqliteCheckpointSaver
+from src.states.state import AgentGraphState, make_agent_graph_state
+from src.tools.prefetch import PagePrefetcher
+from src.tools.serper_client import configure_serper_client
+from src.utils.cassette import configure_cassette, get_cassette
+from src.utils.convergence import ConvergenceMonitor
+from src.utils.limits import (
+    RetryPolicy,
+    configure_concurrency_limits,
+    configure_rate_limits,
+    configure_retries,
+)
+from src.utils.prompt_budget import configure_prompt_budget
+from src.utils.tracing import configure_tracing, trace_node, trace_run
+from src.utils.usage import budget_exceeded, configure_prices, meter_node
 
 logger = logging.getLogger(__name__)
 
+# Nodes whose LLM calls spend the budget; once it is gone the run leaves for
+# final_report right after the one that spent it, not at the next router.
+BUDGETED_NODES = ("planner", "selector", "reporter", "reviewer")
+
 
 class AgentGraphBuilder:
     """
@@ -30,21 +49,90 @@ class AgentGraphBuilder:
         Initialize the graph builder.
 
         Args:
-            config: Configuration containing model settings and other parameters
+            config: Configuration containing model settings and other parameters.
+                With ``config.async_mode`` set, nodes are registered through their
+                ``aprocess`` coroutines and the compiled graph must be driven with
+                ``ainvoke`` / ``astream``.
         """
         self.config = config
-        self.graph = StateGraph(AgentGraphState)
+        # Shared by the search and scraper nodes; see _create_prefetcher
+        self.prefetcher = None
+        self.graph = StateGraph(
+            make_agent_graph_state(
+                history_limit=config.history_limit,
+                history_limits=config.history_limits,
+                digest_chars=config.history_digest_chars,
+            )
+        )
+        configure_client_pool(
+            max_connections=config.llm_max_connections,
+            max_keepalive_connections=config.llm_max_keepalive_connections,
+        )
+        configure_tracing(enabled=config.tracing, trace_dir=config.trace_dir)
+        configure_prices(config.model_prices)
+        configure_cassette(config.cassette_path, config.cassette_mode)
+        configure_prompt_budget(
+            max_prompt_tokens=config.max_prompt_tokens,
+            section_limits=config.prompt_section_limits,
+            tokenizer=config.prompt_tokenizer,
+        )
+        configure_concurrency_limits(
+            openai=config.openai_concurrency, serper=config.serper_concurrency
+        )
+        configure_rate_limits(
+            openai={"rpm": config.openai_rpm, "tpm": config.openai_tpm},
+            serper={"rpm": config.serper_rpm},
+        )
+        retry_policy = (
+            RetryPolicy(
+                max_retries=config.provider_max_retries,
+                base_delay=config.retry_base_delay,
+                max_delay=config.retry_max_delay,
+            )
+            if config.provider_max_retries > 0
+            else None
+        )
+        configure_retries(openai=retry_policy, serper=retry_policy)
+        configure_llm_cache(
+            enabled=config.llm_cache,
+            max_entries=config.llm_cache_max_entries,
+            ttl=config.llm_cache_ttl,
+            path=config.llm_cache_path,
+            max_disk_entries=config.llm_cache_max_disk_entries,
+            datetime_bucket=config.llm_cache_datetime_bucket,
+        )
+        serper_options = (
+            {"base_url": config.serper_base_url} if config.serper_base_url else {}
+        )
+        configure_serper_client(
+            **serper_options,
+            timeout=config.serper_timeout,
+            pool_size=config.serper_pool_size,
+            cache_ttl=config.serper_cache_ttl,
+            stale_ttl=config.serper_stale_ttl,
+            cache_max_entries=config.serper_cache_max_entries,
+            cache_path=config.serper_cache_path,
+        )
+
+    def _create_prefetcher(self) -> Optional[PagePrefetcher]:
+        """Prefetcher fetching pages exactly as the scraper would, if enabled."""
+        if self.config.prefetch_top_n <= 0:
+            return None
+        return PagePrefetcher(
+            top_n=self.config.prefetch_top_n,
+            workers=self.config.scraper_concurrency,
+            ttl=self.config.prefetch_ttl,
+            timeout=self.config.scraper_timeout,
+            max_bytes=self.config.scraper_max_bytes,
+            text_budget=self.config.scraper_read_budget
+            or self.config.scraper_text_budget * 4,
+        )
 
     def _create_nodes(self) -> Dict[str, Any]:
         """
         Create all nodes for the graph.
         """
-
-        # Create a named function instead of a lambda
-        def final_report_func(state):
-            return {"final_report": state.get("reporter_latest")}
-
-        final_report_func.name = "final_report"  # Add name attribute
+        self.prefetcher = self._create_prefetcher()
 
         nodes = {
             "planner": PlannerNode(
@@ -53,22 +141,42 @@ class AgentGraphBuilder:
                 stop=self.config.stop,
                 model_endpoint=self.config.model_endpoint,
                 temperature=self.config.temperature,
+                search_fanout=self.config.search_fanout,
+            ),
+            "serper_search": SerperNode(
+                model=self.config.model,
+                search_fanout=self.config.search_fanout,
+                search_concurrency=self.config.search_concurrency,
+                prefetcher=self.prefetcher,
             ),
-            "serper_search": SerperNode(model=self.config.model),
             "selector": SelectorNode(
                 model=self.config.model,
                 server=self.config.server,
                 stop=self.config.stop,
                 model_endpoint=self.config.model_endpoint,
                 temperature=self.config.temperature,
+                top_k=self.config.selector_top_k,
+            ),
+            "scraper": ScraperNode(
+                max_pages=self.config.scraper_max_pages,
+                per_host_limit=self.config.scraper_per_host_limit,
+                deadline=self.config.scraper_deadline,
+                concurrency=self.config.scraper_concurrency,
+                timeout=self.config.scraper_timeout,
+                max_bytes=self.config.scraper_max_bytes,
+                text_budget=self.config.scraper_text_budget,
+                read_budget=self.config.scraper_read_budget,
+                extractor=self.config.scraper_extractor,
+                passage_token_budget=self.config.scraper_passage_token_budget,
+                prefetcher=self.prefetcher,
             ),
-            "scraper": ScraperNode(),
             "reporter": ReporterNode(
                 model=self.config.model,
                 server=self.config.server,
                 stop=self.config.stop,
                 model_endpoint=self.config.model_endpoint,
                 temperature=self.config.temperature,
+                stream_tokens=self.config.reporter_streaming,
             ),
             "reviewer": ReviewerNode(
                 model=self.config.model,
@@ -83,6 +191,12 @@ class AgentGraphBuilder:
                 stop=self.config.stop,
                 model_endpoint=self.config.model_endpoint,
                 temperature=self.config.temperature,
+                fast_path=self.config.router_fast_path,
+                convergence=(
+                    ConvergenceMonitor(self.config.convergence_max_stalls)
+                    if self.config.convergence_max_stalls is not None
+                    else None
+                ),
             ),
             "final_report": FinalReportNode(),
         }
@@ -94,18 +208,47 @@ class AgentGraphBuilder:
         """
         try:
             for name, node in nodes.items():
-                if hasattr(node, "process"):
-                    self.graph.add_node(name, node.process)
+                if self.config.async_mode and hasattr(node, "aprocess"):
+                    func = node.aprocess
+                elif hasattr(node, "process"):
+                    func = node.process
                 else:
-                    self.graph.add_node(name, node)  # For the final_report function
+                    self.graph.add_node(name, node)
+                    continue
+                if self.config.check_node_outputs:
+                    func = enforce_delta_contract(node, func)
+                # Outside the contract check: usage is not the node's own channel
+                func = meter_node(name, func)
+                if self.config.tracing:
+                    func = trace_node(name, func)
+                self.graph.add_node(name, func)
             logger.info(f"Successfully added {len(nodes)} nodes to graph")
         except Exception as e:
             logger.error(f"Failed to add nodes to graph: {str(e)}")
 
+    def _over_budget(self, state: AgentGraphState) -> bool:
+        exceeded = budget_exceeded(
+            state.get("usage"), self.config.token_budget, self.config.cost_budget
+        )
+        if exceeded:
+            logger.warning(f"Budget exhausted ({exceeded}), finishing the report")
+        return bool(exceeded)
+
+    def _budget_gate(self, target: str):
+        """Edge function going to ``target`` while the budget lasts."""
+
+        def gate(state: AgentGraphState) -> str:
+            return "final_report" if self._over_budget(state) else target
+
+        return gate
+
     def _route_next_step(self, state: AgentGraphState) -> str:
         """
         Determine the next step based on router response.
         """
+        if self._over_budget(state):
+            return "final_report"
+
         review_list = state.get("router_response", [])
         if not review_list:
             return END
@@ -135,37 +278,44 @@ class AgentGraphBuilder:
             ("scraper", "reporter"),
             ("reporter", "reviewer"),
             ("reviewer", "router"),
-            ("router", "final_report"),
             ("final_report", END),
         ]
 
+        budgeted = (
+            self.config.token_budget is not None
+            or self.config.cost_budget is not None
+        )
         for source, target in edges:
-            self.graph.add_edge(source, target)
+            if budgeted and source in BUDGETED_NODES:
+                self.graph.add_conditional_edges(
+                    source, self._budget_gate(target), [target, "final_report"]
+                )
+            else:
+                self.graph.add_edge(source, target)
 
-        # Add conditional routing from router
+        # The router's only way out is the conditional edge; a static edge to
+        # final_report would run it in parallel with whatever was chosen.
         self.graph.add_conditional_edges("router", self._route_next_step)
 
+    @staticmethod
+    def _start(state: Dict[str, Any]) -> Dict[str, Any]:
+        research_question = state.get("research_question", "")
+        cassette = get_cassette()
+        if cassette is not None:
+            # Replays are driven by the questions of the recorded runs
+            cassette.note_question(research_question)
+        return {
+            "research_question": research_question,
+            "end_chain": [HumanMessage(content="false")],
+        }
+
     def build(self) -> StateGraph:
         """
         Build and return the configured graph.
         """
         try:
-            # Add start node with initial state
-            self.graph.add_node(
-                "start",
-                lambda state: {
-                    "research_question": state.get("research_question", ""),
-                    "planner_response": [],
-                    "selector_response": [],
-                    "reporter_response": [],
-                    "reviewer_response": [],
-                    "router_response": [],
-                    "serper_response": [],
-                    "scraper_response": [],
-                    "final_reports": [],
-                    "end_chain": [HumanMessage(content="false")],
-                },
-            )
+            # Add start node; the message channels start out empty already
+            self.graph.add_node("start", self._start)
 
             # Set entry point first
             self.graph.set_entry_point("start")
@@ -183,10 +333,33 @@ class AgentGraphBuilder:
             logger.error(f"Failed to build graph: {str(e)}")
             raise Exception(f"Graph building failed: {str(e)}")
 
+    def compile(self, checkpointer=None):
+        """
+        Build and compile the graph with a checkpointer.
+
+        Defaults to a ``SqliteCheckpointSaver`` at ``config.checkpoint_path``
+        when one is set; pass any LangGraph checkpointer to override it. Runs then need a
+        ``thread_id`` (see ``thread_config``) and can be continued with
+        ``resume_run``.
+        """
+        if checkpointer is None and self.config.checkpoint_path:
+            checkpointer = SqliteCheckpointSaver(
+                self.config.checkpoint_path, keep=self.config.checkpoint_keep
+            )
+        return self.build().compile(checkpointer=checkpointer)
+
     def visualize(self, graph) -> None:
         """
         Visualize the graph structure.
         """
+        # Notebook-only dependencies, kept out of the import path of workers.
+        from IPython.display import Image, display
+        from langchain_core.runnables.graph import (
+            CurveStyle,
+            MermaidDrawMethod,
+            NodeStyles,
+        )
+
         workflow = graph.compile()
         output_path = "research_agent_graph.png"
 
@@ -221,22 +394,52 @@ class AgentGraphBuilder:
             )
 
 
+def thread_config(thread_id: str, recursion_limit: int = 40) -> Dict[str, Any]:
+    """Run config that checkpoints under ``thread_id``."""
+    return {
+        "configurable": {"thread_id": thread_id},
+        "recursion_limit": recursion_limit,
+    }
+
+
+def resume_run(workflow, thread_id: str, recursion_limit: int = 40) -> Dict[str, Any]:
+    """
+    Continue an interrupted run from its last completed node.
+
+    Returns the final state; a finished run is returned as is.
+    """
+    config = thread_config(thread_id, recursion_limit)
+    snapshot = workflow.get_state(config)
+    if not snapshot.next:
+        logger.info(f"Run {thread_id} has nothing left to do")
+        return snapshot.values
+    logger.info(f"Resuming run {thread_id} at {', '.join(snapshot.next)}")
+    with trace_run(thread_id):
+        return workflow.invoke(None, config)
+
+
+async def aresume_run(
+    workflow, thread_id: str, recursion_limit: int = 40
+) -> Dict[str, Any]:
+    """Async variant of ``resume_run``."""
+    config = thread_config(thread_id, recursion_limit)
+    snapshot = await workflow.aget_state(config)
+    if not snapshot.next:
+        logger.info(f"Run {thread_id} has nothing left to do")
+        return snapshot.values
+    logger.info(f"Resuming run {thread_id} at {', '.join(snapshot.next)}")
+    with trace_run(thread_id):
+        return await workflow.ainvoke(None, config)
+
+
 if __name__ == "__main__":
     # Configure logging
     logging.basicConfig(level=logging.INFO)
 
     # Test graph building
-    from dataclasses import dataclass
-
-    @dataclass
-    class TestConfig:
-        server: str = "openai"
-        model: str = "gpt-4"
-        stop: list = None
-        model_endpoint: str = None
-        temperature: float = 0.7
+    from src.builder.config import GraphConfig
 
-    config = TestConfig()
+    config = GraphConfig(server="openai", model="gpt-4", temperature=0.7)
     builder = AgentGraphBuilder(config)
     graph = builder.build()
     builder.visualize(graph)
@@ -0,0 +1,337 @@
+import json
+import queue
+import select
+import socket
+import threading
+import time
+import uuid
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+from src.custom_logging import setup_logger
+from src.utils.convergence import convergence_stats
+from src.utils.prompt_budget import prompt_stats
+from src.utils.tracing import render_prometheus, trace_run
+
+logger = setup_logger(__name__)
+
+PREVIEW_CHARS = 200
+# How long a waiting client may stay silent before a keep-alive comment is sent
+HEARTBEAT_SECONDS = 15.0
+# How often a client waiting for a plain JSON answer is checked for a disconnect
+DISCONNECT_POLL_SECONDS = 1.0
+
+
+class ClientGone(Exception):
+    """Raised inside a worker when the client that asked for a run disconnected."""
+
+
+def _preview(update: Dict[str, Any]) -> Dict[str, str]:
+    previews = {}
+    for channel, value in (update or {}).items():
+        if isinstance(value, list):
+            value = value[-1] if value else ""
+        content = getattr(value, "content", value)
+        previews[channel] = str(content)[:PREVIEW_CHARS]
+    return previews
+
+
+def _final_report(state: Dict[str, Any]) -> Optional[str]:
+    reports = state.get("final_reports") or []
+    if not reports:
+        return None
+    return getattr(reports[-1], "content", reports[-1])
+
+
+class ResearchJob:
+    """One queued research question and the events its worker produces."""
+
+    def __init__(self, research_question: str, recursion_limit: int):
+        self.id = uuid.uuid4().hex
+        self.research_question = research_question
+        self.recursion_limit = recursion_limit
+        self.events: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+        self.cancelled = threading.Event()
+        self.enqueued_at = time.perf_counter()
+
+    def emit(self, event: str, **data) -> None:
+        self.events.put({"event": event, "job_id": self.id, **data})
+
+
+class ResearchService:
+    """
+    Runs research questions against a graph compiled once at startup.
+
+    Jobs wait in a bounded queue for one of ``workers`` threads; ``submit``
+    refuses new jobs once the queue is full so callers can shed load.
+    """
+
+    def __init__(self, workflow, workers: int = 4, queue_size: int = 16):
+        self.workflow = workflow
+        self.workers = max(1, workers)
+        self.jobs: "queue.Queue[ResearchJob]" = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._stats = {
+            "accepted": 0,
+            "rejected": 0,
+            "completed": 0,
+            "failed": 0,
+            "cancelled": 0,
+        }
+        self._in_flight = 0
+        self._threads = []
+
+    def start(self) -> None:
+        for index in range(self.workers):
+            thread = threading.Thread(
+                target=self._work, name=f"research-{index}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, job: ResearchJob) -> bool:
+        try:
+            self.jobs.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                self._stats["rejected"] += 1
+            return False
+        with self._lock:
+            self._stats["accepted"] += 1
+        job.emit("queued", position=self.jobs.qsize())
+        return True
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+    def _track(self, delta: int) -> None:
+        with self._lock:
+            self._in_flight += delta
+
+    def _run(self, job: ResearchJob) -> Dict[str, Any]:
+        job.emit(
+            "started", queued_seconds=round(time.perf_counter() - job.enqueued_at, 3)
+        )
+        config = {"recursion_limit": job.recursion_limit}
+        with trace_run(job.id):
+            return self._stream(job, config)
+
+    def _stream(self, job: ResearchJob, config: Dict[str, Any]) -> Dict[str, Any]:
+        state: Dict[str, Any] = {}
+        for chunk in self.workflow.stream(
+            {"research_question": job.research_question},
+            config,
+            stream_mode=["updates", "values", "custom"],
+        ):
+            if job.cancelled.is_set():
+                raise ClientGone()
+            mode, payload = chunk
+            if mode == "values":
+                state = payload
+                continue
+            if mode == "custom":
+                # Reporter tokens, sent when the graph streams its answer
+                if "token" in payload:
+                    job.emit("token", node=payload["node"], token=payload["token"])
+                elif "ttft" in payload:
+                    job.emit("ttft", node=payload["node"], seconds=payload["ttft"])
+                continue
+            for node, update in payload.items():
+                job.emit("node", node=node, preview=_preview(update))
+        return state
+
+    def _work(self) -> None:
+        while True:
+            job = self.jobs.get()
+            if job.cancelled.is_set():
+                continue
+            started = time.perf_counter()
+            self._track(1)
+            try:
+                state = self._run(job)
+                self._count("completed")
+                job.emit(
+                    "result",
+                    final_report=_final_report(state),
+                    usage=state.get("usage"),
+                    elapsed=round(time.perf_counter() - started, 3),
+                )
+            except ClientGone:
+                logger.info(f"Client for job {job.id} disconnected, run stopped")
+                self._count("cancelled")
+            except Exception as e:
+                logger.error(f"Job {job.id} failed: {e}")
+                self._count("failed")
+                job.emit("error", error=f"{type(e).__name__}: {e}")
+            finally:
+                self._track(-1)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._stats,
+                "in_flight": self._in_flight,
+                "queued": self.jobs.qsize(),
+                "queue_size": self.jobs.maxsize,
+                "workers": self.workers,
+            }
+
+
+def make_handler(service: ResearchService, recursion_limit: int = 40):
+    class ResearchHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send_json(self, status: int, body: Dict[str, Any], headers=None):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send_json(
+                    HTTPStatus.OK,
+                    {
+                        "status": "ok",
+                        **service.stats(),
+                        "prompts": prompt_stats.stats(),
+                        "convergence": convergence_stats.stats(),
+                    },
+                )
+            elif self.path == "/metrics":
+                data = render_prometheus().encode("utf-8")
+                self.send_response(HTTPStatus.OK)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+            else:
+                self._send_json(HTTPStatus.NOT_FOUND, {"error": "not found"})
+
+        def _read_question(self) -> Optional[str]:
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                body = json.loads(self.rfile.read(length) or b"{}")
+            except json.JSONDecodeError:
+                return None
+            question = body.get("research_question") if isinstance(body, dict) else None
+            return question if isinstance(question, str) and question.strip() else None
+
+        def do_POST(self):
+            if self.path.split("?")[0] != "/research":
+                self._send_json(HTTPStatus.NOT_FOUND, {"error": "not found"})
+                return
+
+            question = self._read_question()
+            if question is None:
+                self._send_json(
+                    HTTPStatus.BAD_REQUEST,
+                    {"error": "body must be JSON with a research_question"},
+                )
+                return
+
+            job = ResearchJob(question, recursion_limit)
+            if not service.submit(job):
+                self._send_json(
+                    HTTPStatus.TOO_MANY_REQUESTS,
+                    {"error": "server busy, retry later"},
+                    headers={"Retry-After": "5"},
+                )
+                return
+
+            streaming = "text/event-stream" in self.headers.get("Accept", "")
+            if streaming or "stream=1" in self.path:
+                self._stream(job)
+            else:
+                self._wait(job)
+
+        def _client_gone(self) -> bool:
+            """Whether the client closed its end while waiting for the answer."""
+            try:
+                readable, _, _ = select.select([self.connection], [], [], 0)
+                # A closed socket reads as ready with nothing left to read
+                return bool(readable) and not self.connection.recv(1, socket.MSG_PEEK)
+            except (OSError, ValueError):
+                return True
+
+        def _wait(self, job: ResearchJob) -> None:
+            checked = time.monotonic()
+            while True:
+                try:
+                    event = job.events.get(timeout=DISCONNECT_POLL_SECONDS)
+                except queue.Empty:
+                    event = None
+                # Progress events keep coming, so check on a clock, not on idle
+                if time.monotonic() - checked >= DISCONNECT_POLL_SECONDS:
+                    checked = time.monotonic()
+                    if self._client_gone():
+                        job.cancelled.set()
+                        self.close_connection = True
+                        return
+                if event is None:
+                    continue
+                if event["event"] == "result":
+                    self._send_json(HTTPStatus.OK, event)
+                    return
+                if event["event"] == "error":
+                    self._send_json(HTTPStatus.INTERNAL_SERVER_ERROR, event)
+                    return
+
+        def _stream(self, job: ResearchJob) -> None:
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+            try:
+                while True:
+                    try:
+                        event = job.events.get(timeout=HEARTBEAT_SECONDS)
+                    except queue.Empty:
+                        self.wfile.write(b": keep-alive\n\n")
+                        self.wfile.flush()
+                        continue
+                    message = f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+                    self.wfile.write(message.encode("utf-8"))
+                    self.wfile.flush()
+                    if event["event"] in ("result", "error"):
+                        return
+            except (BrokenPipeError, ConnectionResetError):
+                job.cancelled.set()
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+    return ResearchHandler
+
+
+def create_server(
+    workflow,
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    workers: int = 4,
+    queue_size: int = 16,
+    recursion_limit: int = 40,
+) -> ThreadingHTTPServer:
+    """
+    Start the research workers and return an HTTP server bound to ``host:port``.
+
+    Call ``serve_forever()`` on the result to accept requests.
+    """
+    service = ResearchService(workflow, workers=workers, queue_size=queue_size)
+    service.start()
+    server = ThreadingHTTPServer((host, port), make_handler(service, recursion_limit))
+    server.daemon_threads = True
+    server.service = service
+    logger.info(
+        f"Research service on http://{host}:{server.server_port} "
+        f"({workers} workers, queue of {queue_size})"
+    )
+    return server
@@ -0,0 +1,212 @@
+import hashlib
+import json
+import re
+import threading
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+from src.custom_logging import setup_logger
+from src.utils.cache import TieredCache
+
+logger = setup_logger(__name__)
+
+# Matches the value produced by get_current_utc_datetime(), which every prompt
+# embeds. Left untouched it would make every cache key unique.
+DATETIME_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2} UTC")
+# Message ids LangGraph assigns; they show up in prompts that embed state
+MESSAGE_ID_PATTERN = re.compile(
+    r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}", re.IGNORECASE
+)
+
+_cache: Optional[TieredCache] = None
+_cache_options: Optional[tuple] = None
+_datetime_bucket: Optional[int] = 3600
+_lock = threading.Lock()
+
+
+def configure_llm_cache(
+    enabled: bool = True,
+    max_entries: int = 1024,
+    ttl: Optional[float] = 86400,
+    path: Optional[str] = None,
+    max_disk_entries: int = 10000,
+    datetime_bucket: Optional[int] = 3600,
+) -> Optional[TieredCache]:
+    """
+    Enable, reconfigure or disable the process-wide LLM response cache.
+
+    The current cache, and its warm in-memory tier, is kept when the options
+    did not change, so building another graph does not reset it.
+
+    Args:
+        datetime_bucket: Prompt timestamps are floored to this many seconds
+            before hashing. None removes them from the key entirely.
+    """
+    global _cache, _cache_options, _datetime_bucket
+    options = (enabled, max_entries, ttl, path, max_disk_entries)
+    with _lock:
+        _datetime_bucket = datetime_bucket
+        if options == _cache_options:
+            return _cache
+        if _cache is not None:
+            _cache.close()
+        _cache_options = options
+        _cache = (
+            TieredCache(
+                max_entries=max_entries,
+                ttl=ttl,
+                path=path,
+                max_disk_entries=max_disk_entries,
+            )
+            if enabled
+            else None
+        )
+    return _cache
+
+
+def get_llm_cache() -> Optional[TieredCache]:
+    return _cache
+
+
+def normalize_datetime(text: str, bucket: Optional[int] = 3600) -> str:
+    """Replace prompt timestamps with a bucketed value so keys stay stable."""
+
+    def _bucket(match):
+        if bucket is None:
+            return "<datetime>"
+        moment = datetime.strptime(match.group(0), "%Y-%m-%d %H:%M:%S UTC")
+        seconds = int(moment.replace(tzinfo=timezone.utc).timestamp())
+        floored = datetime.fromtimestamp(seconds - seconds % bucket, timezone.utc)
+        return floored.strftime("%Y-%m-%d %H:%M:%S UTC")
+
+    return DATETIME_PATTERN.sub(_bucket, text)
+
+
+def _message_parts(message) -> tuple:
+    if isinstance(message, dict):
+        return message.get("role", ""), message.get("content", "")
+    return getattr(message, "type", ""), getattr(message, "content", str(message))
+
+
+def make_cache_key(llm, messages, bucket: Optional[int] = 3600) -> str:
+    response_format = (getattr(llm, "model_kwargs", None) or {}).get(
+        "response_format"
+    )
+    normalized = []
+    for message in messages:
+        role, content = _message_parts(message)
+        if isinstance(content, str):
+            content = normalize_datetime(content, bucket)
+            content = MESSAGE_ID_PATTERN.sub("<id>", content)
+        normalized.append([role, content])
+
+    payload = json.dumps(
+        [
+            getattr(llm, "model_name", None),
+            getattr(llm, "temperature", None),
+            response_format,
+            normalized,
+        ],
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CachedChatModel:
+    """
+    Wraps a chat model so identical requests are answered from the cache.
+
+    ``invoke``, ``ainvoke``, ``stream`` and ``astream`` are cached; a hit on a
+    stream is replayed as a single chunk. Every other attribute is delegated
+    to the wrapped model.
+    """
+
+    def __init__(self, llm, cache: TieredCache, datetime_bucket: Optional[int]):
+        self.llm = llm
+        self.cache = cache
+        self.datetime_bucket = datetime_bucket
+
+    def _lookup(self, messages):
+        key = make_cache_key(self.llm, messages, self.datetime_bucket)
+        cached = self.cache.get(key)
+        if cached is None:
+            return key, None
+
+        logger.debug(f"LLM cache hit {key[:12]}")
+        return key, AIMessage(
+            content=cached["content"],
+            response_metadata={**cached.get("response_metadata", {}), "cached": True},
+        )
+
+    def _store(self, key: str, ai_msg) -> None:
+        self.cache.set(
+            key,
+            {
+                "content": ai_msg.content,
+                "response_metadata": {
+                    "model_name": ai_msg.response_metadata.get("model_name")
+                },
+            },
+        )
+
+    def invoke(self, messages, *args, **kwargs) -> Any:
+        key, cached = self._lookup(messages)
+        if cached is not None:
+            return cached
+
+        ai_msg = self.llm.invoke(messages, *args, **kwargs)
+        self._store(key, ai_msg)
+        return ai_msg
+
+    async def ainvoke(self, messages, *args, **kwargs) -> Any:
+        key, cached = self._lookup(messages)
+        if cached is not None:
+            return cached
+
+        ai_msg = await self.llm.ainvoke(messages, *args, **kwargs)
+        self._store(key, ai_msg)
+        return ai_msg
+
+    def stream(self, messages, *args, **kwargs):
+        key, cached = self._lookup(messages)
+        if cached is not None:
+            yield AIMessageChunk(
+                content=cached.content, response_metadata=cached.response_metadata
+            )
+            return
+
+        ai_msg = None
+        for chunk in self.llm.stream(messages, *args, **kwargs):
+            ai_msg = chunk if ai_msg is None else ai_msg + chunk
+            yield chunk
+        if ai_msg is not None:
+            self._store(key, ai_msg)
+
+    async def astream(self, messages, *args, **kwargs):
+        key, cached = self._lookup(messages)
+        if cached is not None:
+            yield AIMessageChunk(
+                content=cached.content, response_metadata=cached.response_metadata
+            )
+            return
+
+        ai_msg = None
+        async for chunk in self.llm.astream(messages, *args, **kwargs):
+            ai_msg = chunk if ai_msg is None else ai_msg + chunk
+            yield chunk
+        if ai_msg is not None:
+            self._store(key, ai_msg)
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
+
+
+def with_cache(llm):
+    """Return the model wrapped with the response cache when it is deterministic."""
+    cache = _cache
+    if cache is None or getattr(llm, "temperature", None) not in (0, 0.0):
+        return llm
+    return CachedChatModel(llm, cache, _datetime_bucket)
@@ -1,18 +1,131 @@
-from langchain_openai import ChatOpenAI
+import threading
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
 
+import httpx
 
-def get_open_ai(temperature=0, model="gpt-4o-mini"):
-    llm = ChatOpenAI(
-        model=model,
-        temperature=temperature,
-    )
-    return llm
+if TYPE_CHECKING:
+    # langchain_openai pulls in the openai SDK (~1s); it is imported on the
+    # first get_chat_model call instead of at module import.
+    from langchain_openai import ChatOpenAI
+
+DEFAULT_MODEL = "gpt-4o-mini"
 
+# Process-wide registry of chat models keyed by
+# (server, model, temperature, json_mode, endpoint, max_retries). Every model for the same
+# endpoint shares one keep-alive connection pool, so agents stop paying a TLS
+# handshake per call.
+_registry: Dict[Tuple, "ChatOpenAI"] = {}
+_http_clients: Dict[Optional[str], httpx.Client] = {}
+_async_http_clients: Dict[Optional[str], httpx.AsyncClient] = {}
+_pool_limits = httpx.Limits(
+    max_connections=20, max_keepalive_connections=10, keepalive_expiry=30.0
+)
+_lock = threading.RLock()
 
-def get_open_ai_json(temperature=0, model="gpt-4o-mini"):
-    llm = ChatOpenAI(
-        model=model,
-        temperature=temperature,
-        model_kwargs={"response_format": {"type": "json_object"}},
+
+def configure_client_pool(
+    max_connections: int = 20,
+    max_keepalive_connections: int = 10,
+    keepalive_expiry: float = 30.0,
+) -> None:
+    """
+    Set the connection pool limits used by the shared HTTP clients.
+
+    Existing clients are closed and the model registry is cleared when the
+    limits change, so the new limits apply to every model created afterwards.
+    """
+    global _pool_limits
+    limits = httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive_connections,
+        keepalive_expiry=keepalive_expiry,
     )
+    with _lock:
+        if limits == _pool_limits:
+            return
+        _pool_limits = limits
+        _reset_locked()
+
+
+def close_clients() -> None:
+    """Close all pooled HTTP clients and drop the cached models."""
+    with _lock:
+        _reset_locked()
+
+
+def _reset_locked() -> None:
+    for client in _http_clients.values():
+        client.close()
+    # Async clients are bound to the loop that used them; let them be garbage
+    # collected instead of closing them from a foreign thread.
+    _http_clients.clear()
+    _async_http_clients.clear()
+    _registry.clear()
+
+
+def _get_http_clients(endpoint: Optional[str]):
+    client = _http_clients.get(endpoint)
+    if client is None:
+        client = httpx.Client(limits=_pool_limits)
+        _http_clients[endpoint] = client
+    async_client = _async_http_clients.get(endpoint)
+    if async_client is None:
+        async_client = httpx.AsyncClient(limits=_pool_limits)
+        _async_http_clients[endpoint] = async_client
+    return client, async_client
+
+
+def get_chat_model(
+    server="openai",
+    model=None,
+    temperature=0,
+    json_mode=True,
+    endpoint=None,
+    max_retries=None,
+) -> "ChatOpenAI":
+    """
+    Return the shared chat model for the given settings, creating it once.
+
+    Safe to call from multiple threads; the returned model is reused by every
+    agent with the same (server, model, temperature, json_mode, endpoint,
+    max_retries). ``max_retries=None`` keeps the SDK's own retry default.
+    """
+    model = model or DEFAULT_MODEL
+    key = (server, model, temperature, json_mode, endpoint, max_retries)
+
+    llm = _registry.get(key)
+    if llm is not None:
+        return llm
+
+    with _lock:
+        llm = _registry.get(key)
+        if llm is None:
+            from langchain_openai import ChatOpenAI
+
+            http_client, http_async_client = _get_http_clients(endpoint)
+            kwargs = {}
+            if endpoint:
+                kwargs["base_url"] = endpoint
+            if json_mode:
+                kwargs["model_kwargs"] = {"response_format": {"type": "json_object"}}
+            if max_retries is not None:
+                kwargs["max_retries"] = max_retries
+            llm = ChatOpenAI(
+                model=model,
+                temperature=temperature,
+                # Report token usage on streamed responses too
+                stream_usage=True,
+                http_client=http_client,
+                http_async_client=http_async_client,
+                **kwargs,
+            )
+            _registry[key] = llm
     return llm
+
+
+def get_open_ai(temperature=0, model=DEFAULT_MODEL):
+    return get_chat_model(model=model, temperature=temperature, json_mode=False)
+
+
+def get_open_ai_json(temperature=0, model=DEFAULT_MODEL):
+    return get_chat_model(model=model, temperature=temperature, json_mode=True)
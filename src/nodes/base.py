@@ -1,17 +1,91 @@
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Any, Dict
+from functools import wraps
+from typing import Any, Callable, Dict, Tuple
+
+
+class NodeContractError(RuntimeError):
+    """Raised when a node returns more than the delta it is responsible for."""
 
 
 class GraphNode(ABC):
     """Base abstract class for all graph nodes."""
 
+    # State channels the node writes. Nodes return only these keys so
+    # LangGraph merges the new messages instead of re-merging the whole state.
+    outputs: Tuple[str, ...] = ()
+
     @abstractmethod
     def process(self, state: Dict[str, Any]) -> Dict[str, Any]:
-        """Process the state and return updated state."""
+        """Process the state and return the channels it updated."""
         pass
 
+    async def aprocess(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Async variant of ``process``; runs it in a worker thread unless overridden."""
+        return await asyncio.to_thread(self.process, state)
+
     @property
     @abstractmethod
     def name(self) -> str:
         """Return the node name."""
         pass
+
+
+def _history_lengths(state: Dict[str, Any]) -> Dict[str, int]:
+    return {key: len(value) for key, value in state.items() if isinstance(value, list)}
+
+
+def check_delta(
+    node: GraphNode,
+    state: Dict[str, Any],
+    lengths_before: Dict[str, int],
+    update: Dict[str, Any],
+) -> None:
+    """
+    Verify a node update is a delta: only the node's own channels, no incoming
+    lists passed back, and no history mutated in place.
+    """
+    foreign = sorted(set(update) - set(node.outputs))
+    if foreign:
+        raise NodeContractError(
+            f"{node.name} returned channels it does not own: {foreign}"
+        )
+    for key, value in update.items():
+        if isinstance(value, list) and value is state.get(key):
+            raise NodeContractError(
+                f"{node.name} returned the incoming {key} list instead of new messages"
+            )
+    mutated = sorted(
+        key
+        for key, length in lengths_before.items()
+        if len(state[key]) != length
+    )
+    if mutated:
+        raise NodeContractError(f"{node.name} mutated state in place: {mutated}")
+
+
+def enforce_delta_contract(node: GraphNode, func: Callable) -> Callable:
+    """
+    Wrap ``node.process`` or ``node.aprocess`` with ``check_delta``.
+
+    Keyword arguments LangGraph injects (such as ``writer``) are passed through.
+    """
+    if asyncio.iscoroutinefunction(func):
+
+        @wraps(func)
+        async def checked_async(state, **kwargs):
+            lengths = _history_lengths(state)
+            update = await func(state, **kwargs)
+            check_delta(node, state, lengths, update)
+            return update
+
+        return checked_async
+
+    @wraps(func)
+    def checked(state, **kwargs):
+        lengths = _history_lengths(state)
+        update = func(state, **kwargs)
+        check_delta(node, state, lengths, update)
+        return update
+
+    return checked
@@ -1,15 +1,36 @@
+import json
+from typing import Any, Dict
+
 from termcolor import colored
 
-from src.nodes.base import Node
+from src.nodes.base import GraphNode
+from src.utils.usage import format_usage
+
+
+class FinalReportNode(GraphNode):
+    outputs = ("final_reports",)
 
+    @property
+    def name(self) -> str:
+        return "final_report"
 
-class FinalReportNode(Node):
-    def process(self, final_response=None):
-        final_response_value = (
-            final_response() if callable(final_response) else final_response
-        )
-        response = final_response_value.content
+    def process(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        reporter_messages = state.get("reporter_response", [])
+        if not reporter_messages:
+            response = "No report was generated"
+        else:
+            response = reporter_messages[-1].content
+            try:
+                response = json.loads(response)["content"]["reporter_response"]
+            except (json.JSONDecodeError, KeyError, TypeError):
+                pass
 
         print(colored(f"Final Report 📝: {response}", "blue"))
-        self.update_state("final_reports", response)
-        return self.state
+        print(colored(f"Usage 💰:\n{format_usage(state.get('usage'))}", "blue"))
+        return {"final_reports": [response]}
+
+    async def aprocess(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        return self.process(state)
+
+    def __call__(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        return self.process(state)
@@ -1,24 +1,28 @@
 from src.agents.planner import PlannerAgent
+from src.agents.reviewer import latest_review
 from src.nodes.base import GraphNode
+from src.prompts.planner import planner_fanout_prompt_template, planner_prompt_template
 
 
 class PlannerNode(GraphNode):
-    def __init__(self, model, server, stop, model_endpoint, temperature):
+    outputs = ("planner_response",)
+
+    def __init__(
+        self, model, server, stop, model_endpoint, temperature, search_fanout=1
+    ):
         self.model = model
         self.server = server
         self.stop = stop
         self.model_endpoint = model_endpoint
         self.temperature = temperature
+        self.search_fanout = search_fanout
 
     @property
     def name(self) -> str:
         return "planner"
 
-    def process(self, state):
-        """
-        Process the current state and generate a plan.
-        """
-        agent = PlannerAgent(
+    def _create_agent(self, state):
+        return PlannerAgent(
             model=self.model,
             server=self.server,
             stop=self.stop,
@@ -27,16 +31,38 @@ class PlannerNode(GraphNode):
             state=state,
         )
 
-        return agent.invoke(
-            {
-                "research_question": state["research_question"],
-                "planner_response": state.get("planner_response", []),
-                "selector_response": state.get("selector_response", []),
-                "reporter_response": state.get("reporter_response", []),
-                "reviewer_response": state.get("reviewer_response", []),
-                "router_response": state.get("router_response", []),
-                "serper_response": state.get("serper_response", []),
-                "scraper_response": state.get("scraper_response", []),
-                "final_reports": state.get("final_reports", []),
+    @staticmethod
+    def _agent_input(state):
+        """
+        The question and the latest review's feedback. Only text goes into the
+        prompt: message reprs carry random ids, which would make every prompt
+        unique to the LLM cache and to cassettes.
+        """
+        feedback = None
+        if state.get("reviewer_response"):
+            _, feedback = latest_review(state)
+        return {"research_question": state["research_question"], "feedback": feedback}
+
+    def _prompt_kwargs(self):
+        if self.search_fanout > 1:
+            return {
+                "prompt": planner_fanout_prompt_template,
+                "num_search_terms": self.search_fanout,
             }
+        return {"prompt": planner_prompt_template}
+
+    def process(self, state):
+        """
+        Process the current state and generate a plan.
+        """
+        agent = self._create_agent(state)
+        return agent.invoke(**self._agent_input(state), **self._prompt_kwargs())
+
+    async def aprocess(self, state):
+        """
+        Async variant of ``process``.
+        """
+        agent = self._create_agent(state)
+        return await agent.ainvoke(
+            **self._agent_input(state), **self._prompt_kwargs()
         )
@@ -3,10 +3,12 @@ import logging
 from typing import Any, Dict, Literal
 
 from langchain_core.messages import BaseMessage
+from langgraph.types import StreamWriter
 from termcolor import colored
 
 from src.agents.reporter import ReporterAgent
 from src.nodes.base import GraphNode
+from src.utils.convergence import selected_urls
 
 logger = logging.getLogger(__name__)
 
@@ -30,14 +32,33 @@ class ReporterMessage(BaseMessage):
 
 
 class ReporterNode(GraphNode):
-    __slots__ = ["model", "server", "stop", "model_endpoint", "temperature", "agent"]
-
-    def __init__(self, model, server, stop, model_endpoint, temperature):
+    __slots__ = [
+        "model",
+        "server",
+        "stop",
+        "model_endpoint",
+        "temperature",
+        "stream_tokens",
+        "agent",
+    ]
+    outputs = ("reporter_response",)
+
+    def __init__(
+        self, model, server, stop, model_endpoint, temperature, stream_tokens=False
+    ):
+        """
+        Args:
+            stream_tokens: Stream the report from the model and push each chunk
+                to ``stream_mode="custom"`` consumers as
+                ``{"node": "reporter", "token": ...}``, preceded by one
+                ``{"node": "reporter", "ttft": seconds}`` event.
+        """
         self.model = model
         self.server = server
         self.stop = stop
         self.model_endpoint = model_endpoint
         self.temperature = temperature
+        self.stream_tokens = stream_tokens
         self.agent = ReporterAgent(
             state={},
             model=self.model,
@@ -51,92 +72,147 @@ class ReporterNode(GraphNode):
     def name(self) -> str:
         return "reporter"
 
-    def process(self, state: Dict[str, Any]) -> Dict[str, Any]:
-        logger.info("Processing in ReporterNode 📝")
-        try:
-            print(colored("Processing in ReporterNode 📝", "yellow"))
-
-            research_question = state.get("research_question", "")
-            selector_messages = state.get("selector_response", [])
-            serper_messages = state.get("serper_response", [])
-            scraper_messages = state.get("scraper_response", [])
-
-            selector_msg = selector_messages[-1] if selector_messages else None
-            serper_msg = serper_messages[-1] if serper_messages else None
-            scraper_msg = scraper_messages[-1] if scraper_messages else None
-
-            if not selector_msg or not hasattr(selector_msg, "content"):
-                return {
-                    **state,
-                    "reporter_response": [
-                        ReporterMessage(
-                            content={
-                                "content": "No valid selector response to report on",
-                                "metadata": {
-                                    "error": "Missing selector response",
-                                    "research_question": research_question,
-                                },
-                            }
-                        )
-                    ],
-                }
-
-            try:
-                selector_data = json.loads(selector_msg.content)
-            except json.JSONDecodeError:
-                selector_data = selector_msg.content
-
-            agent_input = {
-                "input": {
-                    "research_question": research_question,
-                    "selector_response": selector_data,
-                    "search_results": serper_msg.content if serper_msg else "",
-                    "scraped_content": scraper_msg.content if scraper_msg else "",
-                }
-            }
-
-            response = self.agent.invoke(agent_input)
-            response_content = (
-                response.get("output", response)
-                if isinstance(response, dict)
-                else response
-            )
-
-            logger.info("Successfully generated report ✅")
-            return {
-                **state,
+    def _prepare(self, state: Dict[str, Any]):
+        """
+        Return ``(agent_input, metadata)``, or ``(None, update)`` with the
+        node's error update when there is nothing to report on.
+        """
+        research_question = state.get("research_question", "")
+        selector_messages = state.get("selector_response", [])
+        serper_messages = state.get("serper_response", [])
+        scraper_messages = state.get("scraper_response", [])
+
+        selector_msg = selector_messages[-1] if selector_messages else None
+        serper_msg = serper_messages[-1] if serper_messages else None
+        scraper_msg = scraper_messages[-1] if scraper_messages else None
+
+        if not selector_msg or not hasattr(selector_msg, "content"):
+            return None, {
                 "reporter_response": [
                     ReporterMessage(
                         content={
-                            "content": response_content,
+                            "content": "No valid selector response to report on",
                             "metadata": {
+                                "error": "Missing selector response",
                                 "research_question": research_question,
-                                "selected_url": selector_data.get("selected_page_url"),
-                                "has_serp": bool(serper_msg),
-                                "has_scraper": bool(scraper_msg),
                             },
                         }
                     )
                 ],
             }
 
-        except Exception as e:
-            error_msg = f"Error generating report: {str(e)}"
-            logger.error(error_msg)
-            return {
-                **state,
-                "reporter_response": [
-                    ReporterMessage(
-                        content={
-                            "content": error_msg,
-                            "metadata": {
-                                "error": str(e),
-                                "error_type": type(e).__name__,
-                            },
-                        }
-                    )
-                ],
+        try:
+            selector_data = json.loads(selector_msg.content)
+        except json.JSONDecodeError:
+            selector_data = selector_msg.content
+
+        agent_input = {
+            "input": {
+                "research_question": research_question,
+                "selector_response": selector_data,
+                "search_results": serper_msg.content if serper_msg else "",
+                "scraped_content": scraper_msg.content if scraper_msg else "",
             }
+        }
+        # The pages the scraper actually read, which may be several or a
+        # fallback the selector did not pick first
+        sources = (
+            list(getattr(scraper_msg, "sources", None) or [])
+            if scraper_msg
+            else selected_urls(selector_data)
+        )
+        metadata = {
+            "research_question": research_question,
+            "selected_url": sources[0] if sources else None,
+            "sources": sources,
+            "has_serp": bool(serper_msg),
+            "has_scraper": bool(scraper_msg),
+        }
+        return agent_input, metadata
+
+    def _stream_callbacks(self, writer, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        if not self.stream_tokens or writer is None:
+            return {}
+
+        def on_first_token(seconds: float) -> None:
+            metadata["ttft"] = round(seconds, 3)
+            writer({"node": self.name, "ttft": seconds})
+
+        return {
+            "on_token": lambda text: writer({"node": self.name, "token": text}),
+            "on_first_token": on_first_token,
+        }
+
+    def _response_to_state(
+        self, state: Dict[str, Any], response, metadata: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        response_content = (
+            response.get("output", response) if isinstance(response, dict) else response
+        )
+
+        logger.info("Successfully generated report ✅")
+        return {
+            "reporter_response": [
+                ReporterMessage(
+                    content={"content": response_content, "metadata": metadata}
+                )
+            ],
+        }
+
+    def _error_to_state(self, state: Dict[str, Any], e: Exception) -> Dict[str, Any]:
+        error_msg = f"Error generating report: {str(e)}"
+        logger.error(error_msg)
+        return {
+            "reporter_response": [
+                ReporterMessage(
+                    content={
+                        "content": error_msg,
+                        "metadata": {
+                            "error": str(e),
+                            "error_type": type(e).__name__,
+                        },
+                    }
+                )
+            ],
+        }
+
+    def process(
+        self, state: Dict[str, Any], writer: StreamWriter = None
+    ) -> Dict[str, Any]:
+        logger.info("Processing in ReporterNode 📝")
+        try:
+            print(colored("Processing in ReporterNode 📝", "yellow"))
+
+            agent_input, metadata = self._prepare(state)
+            if agent_input is None:
+                return metadata
+
+            response = self.agent.invoke(
+                agent_input, **self._stream_callbacks(writer, metadata)
+            )
+            return self._response_to_state(state, response, metadata)
+
+        except Exception as e:
+            return self._error_to_state(state, e)
+
+    async def aprocess(
+        self, state: Dict[str, Any], writer: StreamWriter = None
+    ) -> Dict[str, Any]:
+        logger.info("Processing in ReporterNode 📝")
+        try:
+            print(colored("Processing in ReporterNode 📝", "yellow"))
+
+            agent_input, metadata = self._prepare(state)
+            if agent_input is None:
+                return metadata
+
+            response = await self.agent.ainvoke(
+                agent_input, **self._stream_callbacks(writer, metadata)
+            )
+            return self._response_to_state(state, response, metadata)
+
+        except Exception as e:
+            return self._error_to_state(state, e)
 
     def __call__(self, state: Dict[str, Any]) -> Dict[str, Any]:
         return self.process(state)
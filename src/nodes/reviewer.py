@@ -31,6 +31,7 @@ class ReviewerMessage(BaseMessage):
 
 class ReviewerNode(GraphNode):
     __slots__ = ["model", "server", "stop", "model_endpoint", "temperature", "agent"]
+    outputs = ("reviewer_response",)
 
     def __init__(self, model, server, stop, model_endpoint, temperature):
         self.model = model
@@ -52,99 +53,118 @@ class ReviewerNode(GraphNode):
     def name(self) -> str:
         return "reviewer"
 
-    def process(self, state: Dict[str, Any]) -> Dict[str, Any]:
-        reporter_messages = state.get("reporter_response", [])
-        if not reporter_messages:
-            print(colored("No reporter response found in state ⚠️", "yellow"))
-            return {
-                **state,
-                "reviewer_response": [
-                    ReviewerMessage(
-                        content={
-                            "content": {"reviewer_response": "No content to review"},
-                            "metadata": {"error": "Missing reporter response"},
-                        }
-                    )
-                ],
-            }
+    def _no_report(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        print(colored("No reporter response found in state ⚠️", "yellow"))
+        return {
+            "reviewer_response": [
+                ReviewerMessage(
+                    content={
+                        "content": {"reviewer_response": "No content to review"},
+                        "metadata": {"error": "Missing reporter response"},
+                    }
+                )
+            ],
+        }
 
-        try:
-            print(colored("Processing reporter message", "cyan"))
-            reporter_msg = reporter_messages[-1]
+    def _prepare(self, reporter_messages):
+        print(colored("Processing reporter message", "cyan"))
+        reporter_msg = reporter_messages[-1]
 
-            data = json.loads(reporter_msg.content)
-            report_content = data["content"]["reporter_response"]
-            metadata = data["metadata"]
+        data = json.loads(reporter_msg.content)
+        report_content = data["content"]["reporter_response"]
+        metadata = data["metadata"]
 
-            print(colored(f"Processing report: {report_content[:200]}...", "cyan"))
+        print(colored(f"Processing report: {report_content[:200]}...", "cyan"))
 
-            agent_input = {
-                "input": {
-                    "research_question": metadata["research_question"],
-                    "report_content": report_content,
-                }
+        agent_input = {
+            "input": {
+                "research_question": metadata["research_question"],
+                "report_content": report_content,
             }
+        }
+        return agent_input, metadata
 
-            agent_state = self.agent.invoke(agent_input)
-            print(colored("Reviewer response: ", "cyan"))
-
-            if agent_state is None or "reviewer_response" not in agent_state:
-                print(
-                    colored("Reviewer 👩🏽‍⚖️: No valid response generated ⚠️", "yellow")
-                )
-                return {
-                    **state,
-                    "reviewer_response": [
-                        ReviewerMessage(
-                            content={
-                                "content": {
-                                    "reviewer_response": "Unable to generate review"
-                                },
-                                "metadata": {
-                                    "error": "Invalid agent response",
-                                    "research_question": metadata["research_question"],
-                                },
-                            }
-                        )
-                    ],
-                }
-
-            print(colored("Reviewer 👩🏽‍⚖️: Review completed ✅", "green"))
+    def _response_to_state(
+        self, state: Dict[str, Any], agent_state, metadata: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        print(colored("Reviewer response: ", "cyan"))
 
+        if agent_state is None or "reviewer_response" not in agent_state:
+            print(colored("Reviewer 👩🏽‍⚖️: No valid response generated ⚠️", "yellow"))
             return {
-                **state,
                 "reviewer_response": [
                     ReviewerMessage(
                         content={
                             "content": {
-                                "reviewer_response": str(
-                                    agent_state["reviewer_response"]
-                                )
-                            },
-                            "metadata": metadata,  # Pass through the original metadata
-                        }
-                    )
-                ],
-            }
-
-        except Exception as e:
-            print(colored(f"Reviewer 👩🏽‍⚖️ Error: {str(e)} ❌", "red"))
-            return {
-                **state,
-                "reviewer_response": [
-                    ReviewerMessage(
-                        content={
-                            "content": {
-                                "reviewer_response": f"Error reviewing content: {str(e)}"
+                                "reviewer_response": "Unable to generate review"
                             },
                             "metadata": {
-                                "error": str(e),
-                                "error_type": type(e).__name__,
+                                "error": "Invalid agent response",
+                                "research_question": metadata["research_question"],
                             },
                         }
                     )
                 ],
             }
 
+        print(colored("Reviewer 👩🏽‍⚖️: Review completed ✅", "green"))
+
+        return {
+            "reviewer_response": [
+                ReviewerMessage(
+                    content={
+                        "content": {
+                            "reviewer_response": str(agent_state["reviewer_response"])
+                        },
+                        "metadata": metadata,  # Pass through the original metadata
+                    }
+                )
+            ],
+        }
+
+    def _error_to_state(self, state: Dict[str, Any], e: Exception) -> Dict[str, Any]:
+        print(colored(f"Reviewer 👩🏽‍⚖️ Error: {str(e)} ❌", "red"))
+        return {
+            "reviewer_response": [
+                ReviewerMessage(
+                    content={
+                        "content": {
+                            "reviewer_response": f"Error reviewing content: {str(e)}"
+                        },
+                        "metadata": {
+                            "error": str(e),
+                            "error_type": type(e).__name__,
+                        },
+                    }
+                )
+            ],
+        }
+
+    def process(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        reporter_messages = state.get("reporter_response", [])
+        if not reporter_messages:
+            return self._no_report(state)
+
+        try:
+            agent_input, metadata = self._prepare(reporter_messages)
+            agent_state = self.agent.invoke(agent_input)
+            return self._response_to_state(state, agent_state, metadata)
+
+        except Exception as e:
+            return self._error_to_state(state, e)
+
+    async def aprocess(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        reporter_messages = state.get("reporter_response", [])
+        if not reporter_messages:
+            return self._no_report(state)
+
+        try:
+            agent_input, metadata = self._prepare(reporter_messages)
+            agent_state = await self.agent.ainvoke(agent_input)
+            return self._response_to_state(state, agent_state, metadata)
+
+        except Exception as e:
+            return self._error_to_state(state, e)
+
     def __call__(self, state: Dict[str, Any]) -> Dict[str, Any]:
         return self.process(state)
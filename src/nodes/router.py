@@ -1,17 +1,36 @@
 import json
 import logging
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
-from src.agents.router import RouterAgent
+from src.agents.router import RouterAgent, router_rules
 from src.nodes.base import GraphNode
+from src.utils.convergence import ConvergenceMonitor
 
 logger = logging.getLogger(__name__)
 
 
 class RouterNode(GraphNode):
-    __slots__ = ["model", "server", "stop", "model_endpoint", "temperature", "agent"]
+    __slots__ = [
+        "model",
+        "server",
+        "stop",
+        "model_endpoint",
+        "temperature",
+        "agent",
+        "convergence",
+    ]
+    outputs = ("router_response", "convergence")
 
-    def __init__(self, model, server, stop, model_endpoint, temperature):
+    def __init__(
+        self,
+        model,
+        server,
+        stop,
+        model_endpoint,
+        temperature,
+        fast_path=True,
+        convergence: Optional[ConvergenceMonitor] = None,
+    ):
         self.model = model
         self.server = server
         self.stop = stop
@@ -24,44 +43,71 @@ class RouterNode(GraphNode):
             stop=self.stop,
             model_endpoint=self.model_endpoint,
             temperature=self.temperature,
+            rules=router_rules if fast_path else None,
         )
+        self.convergence = convergence
 
     @property
     def name(self) -> str:
         return "router"
 
+    @staticmethod
+    def _agent_input(state: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "input": {
+                "research_question": state.get("research_question", ""),
+                "current_state": state,
+            }
+        }
+
+    def _response_to_state(self, state: Dict[str, Any], agent_state) -> Dict[str, Any]:
+        if agent_state is None or "router_response" not in agent_state:
+            return {
+                "router_response": json.dumps({"next_agent": "final_report"}),
+            }
+
+        # Get the response from agent state
+        response = agent_state["router_response"]
+        if self.convergence is None:
+            # Return the response directly as a string
+            return {"router_response": response}
+
+        try:
+            decision = json.loads(response)
+            proposed = decision["next_agent"]
+        except (json.JSONDecodeError, KeyError, TypeError):
+            return {"router_response": response}
+        route, progress = self.convergence.check(state, proposed)
+        if route != proposed:
+            response = json.dumps({**decision, "next_agent": route, "proposed": proposed})
+        return {"router_response": response, "convergence": progress}
+
+    @staticmethod
+    def _error_to_state(state: Dict[str, Any], e: Exception) -> Dict[str, Any]:
+        error_msg = f"Error in router processing: {str(e)}"
+        logger.error(error_msg)
+        return {
+            "router_response": json.dumps({"next_agent": "final_report"}),
+        }
+
     def process(self, state: Dict[str, Any]) -> Dict[str, Any]:
         logger.info("Processing in RouterNode")
         try:
             # Pass the state to the agent
-            agent_state = self.agent.invoke(
-                {
-                    "input": {
-                        "research_question": state.get("research_question", ""),
-                        "current_state": state,
-                    }
-                }
-            )
-
-            if agent_state is None or "router_response" not in agent_state:
-                return {
-                    **state,
-                    "router_response": json.dumps({"next_agent": "final_report"}),
-                }
-
-            # Get the response from agent state
-            response = agent_state["router_response"]
+            agent_state = self.agent.invoke(self._agent_input(state))
+            return self._response_to_state(state, agent_state)
 
-            # Return the response directly as a string
-            return {**state, "router_response": response}
+        except Exception as e:
+            return self._error_to_state(state, e)
+
+    async def aprocess(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        logger.info("Processing in RouterNode")
+        try:
+            agent_state = await self.agent.ainvoke(self._agent_input(state))
+            return self._response_to_state(state, agent_state)
 
         except Exception as e:
-            error_msg = f"Error in router processing: {str(e)}"
-            logger.error(error_msg)
-            return {
-                **state,
-                "router_response": json.dumps({"next_agent": "final_report"}),
-            }
+            return self._error_to_state(state, e)
 
     def __call__(self, state: Dict[str, Any]) -> Dict[str, Any]:
         return self.process(state)
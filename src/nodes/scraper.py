@@ -1,25 +1,53 @@
+import asyncio
+import contextvars
 import json
-from typing import Any, Dict, Literal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from typing import Any, Dict, List, Literal, Optional, Tuple
+from urllib.parse import urlsplit
 
+import httpx
 import requests
-from bs4 import BeautifulSoup
 from langchain_core.messages import BaseMessage
 
 from src.custom_logging import setup_logger
 from src.nodes.base import GraphNode
+from src.tools.extractors import get_extractor
+from src.tools.fetcher import (
+    DEFAULT_MAX_BYTES,
+    DEFAULT_TEXT_BUDGET,
+    DEFAULT_TIMEOUT,
+    FetchResult,
+    afetch_page,
+    fetch_page,
+)
+from src.tools.passages import select_passages
 
 logger = setup_logger(__name__)
 
 
+GARBLED_ERROR = "error in scraping website, garbled text returned"
+DEADLINE_ERROR = "error in scraping website, deadline of {}s reached"
+
+
 class ScraperMessage(BaseMessage):
     """Message class for web scraping results."""
 
     type: Literal["scraper"] = "scraper"
 
-    def __init__(self, content: str, source: str, role: str = "system"):
+    def __init__(
+        self,
+        content: str,
+        source: str,
+        role: str = "system",
+        sources: Optional[List[str]] = None,
+    ):
         super().__init__(content=content)
         self.source = source
         self.role = role
+        self.sources = sources if sources is not None else [source]
 
     @property
     def type(self) -> str:
@@ -33,15 +61,69 @@ class ScraperMessage(BaseMessage):
             "role": self.role,
             "content": self.content,
             "source": self.source,
+            "sources": self.sources,
         }
 
 
+def _host(url: str) -> str:
+    return urlsplit(url).netloc.lower()
+
+
 class ScraperNode(GraphNode):
-    __slots__ = ["_name"]
+    __slots__ = [
+        "_name",
+        "_async_client",
+        "max_pages",
+        "per_host_limit",
+        "deadline",
+        "timeout",
+        "max_bytes",
+        "text_budget",
+        "read_budget",
+        "extractor",
+        "passage_token_budget",
+        "executor",
+        "prefetcher",
+    ]
+    outputs = ("scraper_response",)
 
-    def __init__(self, model=None, **kwargs):
+    def __init__(
+        self,
+        model=None,
+        max_pages=1,
+        per_host_limit=2,
+        deadline=20.0,
+        concurrency=4,
+        timeout=DEFAULT_TIMEOUT,
+        max_bytes=DEFAULT_MAX_BYTES,
+        text_budget=DEFAULT_TEXT_BUDGET,
+        read_budget=None,
+        extractor="auto",
+        passage_token_budget=1000,
+        prefetcher=None,
+        **kwargs,
+    ):
         super().__init__()
         self._name = "web_scraper"
+        # Created on first async use; bound to the event loop that uses it.
+        self._async_client = None
+        self.max_pages = max(1, max_pages)
+        self.per_host_limit = max(1, per_host_limit)
+        self.deadline = deadline
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.text_budget = text_budget
+        # Boilerplate is stripped after the download, so read past the text
+        # budget to leave the extractor enough of the page to work with.
+        self.read_budget = read_budget or text_budget * 4
+        self.extractor = get_extractor(extractor) if extractor else None
+        # None keeps the first ``text_budget`` characters instead of ranking passages
+        self.passage_token_budget = passage_token_budget
+        self.executor = ThreadPoolExecutor(
+            max_workers=max(1, concurrency), thread_name_prefix="scraper"
+        )
+        # Pages SerperNode started fetching before the selector picked one
+        self.prefetcher = prefetcher
 
     @property
     def name(self) -> str:
@@ -51,46 +133,306 @@ class ScraperNode(GraphNode):
         non_ascii_count = sum(1 for char in text if ord(char) > 127)
         return non_ascii_count > len(text) * 0.3
 
-    def process(self, state: Dict[str, Any]) -> Dict[str, Any]:
-        research = state.get("selector_response", [])
-        if not research:
-            return {**state, "scraper_response": []}
+    @staticmethod
+    def _selected_urls(research) -> List[str]:
+        """
+        Return the selector's ranked URLs, falling back to its single pick.
 
-        try:
-            research_data = json.loads(research[-1].content)
-            url = research_data.get("selected_page_url", research_data.get("error"))
-            response = requests.get(url)
-            response.raise_for_status()
+        Raises ``KeyError`` when the response names no URL at all.
+        """
+        research_data = json.loads(research[-1].content)
+        urls = research_data.get("selected_page_urls") or []
+        if isinstance(urls, str):
+            urls = [urls]
+        if not urls:
+            urls = [research_data.get("selected_page_url", research_data.get("error"))]
+        urls = [url for url in dict.fromkeys(urls) if isinstance(url, str) and url]
+        if not urls:
+            raise KeyError("selector response has no page URL")
+        return urls
+
+    @staticmethod
+    def _queries(state: Dict[str, Any]) -> List[str]:
+        """Research question plus the planner's search terms, used to rank passages."""
+        queries = [state.get("research_question", "")]
+        plans = state.get("planner_response", [])
+        if plans:
+            try:
+                plan_data = json.loads(plans[-1].content)
+                queries.append(plan_data.get("search_term") or "")
+                queries.extend(plan_data.get("search_terms") or [])
+            except (json.JSONDecodeError, AttributeError, TypeError):
+                pass
+        return [q for q in queries if isinstance(q, str) and q]
+
+    def _extract(self, page: FetchResult, queries: List[str]) -> Optional[str]:
+        """Return the page text, or None when it looks garbled."""
+        content = page.text
+        if self.extractor is not None and page.content_type != "text/plain":
+            content = self.extractor.extract(page.html) or content
+        if self._is_garbled(content):
+            return None
+        if self.passage_token_budget:
+            return select_passages(content, queries, self.passage_token_budget)
+        return content[: self.text_budget]
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        if self._async_client is None:
+            connect, read = self.timeout
+            self._async_client = httpx.AsyncClient(
+                follow_redirects=True, timeout=httpx.Timeout(read, connect=connect)
+            )
+        return self._async_client
+
+    def _prefetched(self, url: str):
+        return self.prefetcher.take(url) if self.prefetcher is not None else None
+
+    def _release_prefetched(self, state: Dict[str, Any]) -> None:
+        if self.prefetcher is not None:
+            serper_messages = state.get("serper_response") or []
+            if serper_messages:
+                self.prefetcher.release(
+                    serper_messages[-1].additional_kwargs.get("prefetch_ticket")
+                )
 
-            soup = BeautifulSoup(response.content, "html.parser")
-            texts = soup.stripped_strings
-            content = " ".join(texts)
+    def _remaining_timeout(self, deadline_at: float) -> Optional[Tuple[float, float]]:
+        """``timeout`` capped to the time left before ``deadline_at``; None once past."""
+        remaining = deadline_at - time.monotonic()
+        if remaining <= 0:
+            return None
+        connect, read = self.timeout
+        return min(connect, remaining), min(read, remaining)
 
-            if self._is_garbled(content):
-                content = "error in scraping website, garbled text returned"
+    def _scrape(
+        self,
+        url: str,
+        queries: List[str],
+        deadline_at: float,
+        cancel: Optional[threading.Event] = None,
+    ) -> Tuple[bool, str]:
+        timeout = self._remaining_timeout(deadline_at)
+        if timeout is None:
+            return False, DEADLINE_ERROR.format(self.deadline)
+        try:
+            prefetched = self._prefetched(url)
+            if prefetched is not None:
+                page = prefetched.result(timeout=deadline_at - time.monotonic())
             else:
-                content = content[:4000]
+                page = fetch_page(
+                    url,
+                    timeout=timeout,
+                    max_bytes=self.max_bytes,
+                    text_budget=self.read_budget,
+                    cancel=cancel,
+                )
+            content = self._extract(page, queries)
+            if content is None:
+                return False, GARBLED_ERROR
+            return True, content
 
         except requests.HTTPError as e:
-            content = (
+            return False, (
                 f"error in scraping website, 403 Forbidden for url: {url}"
                 if e.response.status_code == 403
                 else f"error in scraping website, {str(e)}"
             )
 
         except requests.RequestException as e:
-            content = f"error in scraping website, {str(e)}"
+            return False, f"error in scraping website, {str(e)}"
+
+        except FuturesTimeoutError:
+            return False, DEADLINE_ERROR.format(self.deadline)
+
+    async def _ascrape(
+        self, url: str, queries: List[str], deadline_at: float
+    ) -> Tuple[bool, str]:
+        timeout = self._remaining_timeout(deadline_at)
+        if timeout is None:
+            return False, DEADLINE_ERROR.format(self.deadline)
+        try:
+            prefetched = self._prefetched(url)
+            if prefetched is not None:
+                # Shielded: other runs may be waiting on the same download.
+                page = await asyncio.shield(asyncio.wrap_future(prefetched))
+            else:
+                connect, read = timeout
+                page = await afetch_page(
+                    url,
+                    self._get_async_client(),
+                    max_bytes=self.max_bytes,
+                    text_budget=self.read_budget,
+                    timeout=httpx.Timeout(read, connect=connect),
+                )
+            # Extraction is CPU bound; keep it off the event loop.
+            content = await asyncio.to_thread(self._extract, page, queries)
+            if content is None:
+                return False, GARBLED_ERROR
+            return True, content
+
+        # Prefetched pages were fetched with requests
+        except (httpx.HTTPStatusError, requests.HTTPError) as e:
+            return False, (
+                f"error in scraping website, 403 Forbidden for url: {url}"
+                if e.response.status_code == 403
+                else f"error in scraping website, {str(e)}"
+            )
+
+        except (httpx.HTTPError, requests.RequestException) as e:
+            return False, f"error in scraping website, {str(e)}"
+
+    def _scrape_many(
+        self, urls: List[str], queries: List[str]
+    ) -> List[Tuple[int, str, bool, str]]:
+        """
+        Fetch the URLs concurrently and return ``(rank, url, ok, content)`` rows.
+
+        Stops once ``max_pages`` pages succeeded or the deadline passed. Each
+        fetch gets the time left before the deadline as its timeout, and
+        fetches still reading a body are cancelled when the node returns.
+        """
+        deadline_at = time.monotonic() + self.deadline
+        cancel = threading.Event()
+        host_limits = {
+            host: threading.Semaphore(self.per_host_limit)
+            for host in {_host(url) for url in urls}
+        }
+
+        def _limited(url):
+            with host_limits[_host(url)]:
+                return self._scrape(url, queries, deadline_at, cancel)
 
+        # Each fetch runs in the caller's context so its span joins the run trace
+        futures = {}
+        for rank, url in enumerate(urls):
+            context = contextvars.copy_context()
+            futures[self.executor.submit(context.run, _limited, url)] = (rank, url)
+        rows, successes = [], 0
+        try:
+            for future in as_completed(futures, timeout=self.deadline):
+                rank, url = futures[future]
+                ok, content = future.result()
+                rows.append((rank, url, ok, content))
+                successes += ok
+                if successes >= self.max_pages:
+                    break
+        except FuturesTimeoutError:
+            logger.warning(f"Scraping deadline of {self.deadline}s reached")
+        finally:
+            cancel.set()
+            for future in futures:
+                future.cancel()
+        return sorted(rows)
+
+    async def _ascrape_many(
+        self, urls: List[str], queries: List[str]
+    ) -> List[Tuple[int, str, bool, str]]:
+        """Async variant of ``_scrape_many``."""
+        deadline_at = time.monotonic() + self.deadline
+        host_limits = {
+            host: asyncio.Semaphore(self.per_host_limit)
+            for host in {_host(url) for url in urls}
+        }
+
+        async def _limited(rank, url):
+            async with host_limits[_host(url)]:
+                ok, content = await self._ascrape(url, queries, deadline_at)
+            return rank, url, ok, content
+
+        tasks = [
+            asyncio.create_task(_limited(rank, url)) for rank, url in enumerate(urls)
+        ]
+        rows, successes = [], 0
+        try:
+            async with asyncio.timeout(self.deadline):
+                for next_done in asyncio.as_completed(tasks):
+                    row = await next_done
+                    rows.append(row)
+                    successes += row[2]
+                    if successes >= self.max_pages:
+                        break
+        except TimeoutError:
+            logger.warning(f"Scraping deadline of {self.deadline}s reached")
+        finally:
+            for task in tasks:
+                task.cancel()
+        return sorted(rows)
+
+    def _combine(self, rows, urls: List[str]) -> Tuple[str, str, List[str]]:
+        """Join the successful pages in rank order into one message body."""
+        pages = [(url, content) for _, url, ok, content in rows if ok]
+        pages = pages[: self.max_pages]
+        if not pages:
+            if rows:
+                _, url, _, content = rows[0]
+                return content, url, [url]
+            return (
+                f"error in scraping website, no page finished within {self.deadline}s",
+                urls[0],
+                urls,
+            )
+
+        if len(pages) == 1:
+            url, content = pages[0]
+            return content, url, [url]
+
+        content = "\n\n---\n\n".join(
+            f"Source: {url}\n{content}" for url, content in pages
+        )
+        sources = [url for url, _ in pages]
+        return content, sources[0], sources
+
+    @staticmethod
+    def _to_state(
+        state: Dict[str, Any],
+        content: str,
+        url: str,
+        sources: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        return {
+            "scraper_response": [
+                ScraperMessage(
+                    role="system", content=content, source=url, sources=sources
+                )
+            ]
+        }
+
+    def process(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        research = state.get("selector_response", [])
+        if not research:
+            return {"scraper_response": []}
+
+        try:
+            urls = self._selected_urls(research)
         except (KeyError, json.JSONDecodeError) as e:
             content = f"error processing research data: {str(e)}"
-            url = "unknown"
+            return self._to_state(state, content, "unknown")
 
-        scraper_response = state.get("scraper_response", [])
-        scraper_response.append(
-            ScraperMessage(role="system", content=content, source=url)
-        )
+        queries = self._queries(state)
+        try:
+            rows = self._scrape_many(urls, queries)
+        finally:
+            self._release_prefetched(state)
+        content, url, sources = self._combine(rows, urls)
+        return self._to_state(state, content, url, sources)
 
-        return {**state, "scraper_response": scraper_response}
+    async def aprocess(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        research = state.get("selector_response", [])
+        if not research:
+            return {"scraper_response": []}
+
+        try:
+            urls = self._selected_urls(research)
+        except (KeyError, json.JSONDecodeError) as e:
+            content = f"error processing research data: {str(e)}"
+            return self._to_state(state, content, "unknown")
+
+        queries = self._queries(state)
+        try:
+            rows = await self._ascrape_many(urls, queries)
+        finally:
+            self._release_prefetched(state)
+        content, url, sources = self._combine(rows, urls)
+        return self._to_state(state, content, url, sources)
 
     def __call__(self, state: Dict[str, Any]) -> Dict[str, Any]:
         return self.process(state)
@@ -1,5 +1,5 @@
 import json
-from typing import Any, Dict, Literal
+from typing import Any, Dict, Literal, Optional
 
 from langchain_core.messages import BaseMessage
 from termcolor import colored
@@ -7,6 +7,8 @@ from termcolor import colored
 from src.agents.selector import SelectorAgent
 from src.custom_logging import setup_logger
 from src.nodes.base import GraphNode
+from src.prompts.selector import selector_prompt_template, selector_topk_prompt_template
+from src.utils.convergence import selected_urls
 
 logger = setup_logger(__name__)
 
@@ -25,14 +27,24 @@ class SelectorMessage(BaseMessage):
 
 
 class SelectorNode(GraphNode):
-    __slots__ = ["model", "server", "stop", "model_endpoint", "temperature", "agent"]
-
-    def __init__(self, model, server, stop, model_endpoint, temperature):
+    __slots__ = [
+        "model",
+        "server",
+        "stop",
+        "model_endpoint",
+        "temperature",
+        "top_k",
+        "agent",
+    ]
+    outputs = ("selector_response",)
+
+    def __init__(self, model, server, stop, model_endpoint, temperature, top_k=1):
         self.model = model
         self.server = server
         self.stop = stop
         self.model_endpoint = model_endpoint
         self.temperature = temperature
+        self.top_k = max(1, top_k)
         self.agent = SelectorAgent(
             state={},
             model=self.model,
@@ -46,69 +58,110 @@ class SelectorNode(GraphNode):
     def name(self) -> str:
         return "selector"
 
-    def process(self, state: Dict[str, Any]) -> Dict[str, Any]:
-        serp_messages = state.get("serper_response", [])
-        if not serp_messages:
-            print(colored("No serper response found in state ⚠️", "yellow"))
+    def _prompt_kwargs(self) -> Dict[str, Any]:
+        if self.top_k > 1:
+            return {"prompt": selector_topk_prompt_template, "num_pages": self.top_k}
+        return {"prompt": selector_prompt_template}
+
+    @staticmethod
+    def _previous_selections(state: Dict[str, Any]) -> Optional[str]:
+        """URLs picked in earlier iterations, so the selector can avoid them."""
+        urls = []
+        for message in state.get("selector_response", []):
+            try:
+                urls.extend(selected_urls(json.loads(message.content)))
+            except (json.JSONDecodeError, TypeError):
+                continue
+        if not urls:
+            return None
+        return "\n".join(f"- {url}" for url in dict.fromkeys(urls))
+
+    def _no_results(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        print(colored("No serper response found in state ⚠️", "yellow"))
+        return {
+            "selector_response": [
+                SelectorMessage(
+                    content=json.dumps(
+                        {"selector_response": "No search results to process"}
+                    )
+                )
+            ],
+        }
+
+    def _response_to_state(
+        self, state: Dict[str, Any], agent_response: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        # The agent's state will contain the selector_response
+        selector_response = agent_response.get("selector_response", "")
+
+        # Create a structured response
+        if selector_response:
+            return {
+                "selector_response": [SelectorMessage(content=str(selector_response))],
+            }
+        else:
+            print(colored("Selector 🧑🏼‍💻: No valid response generated ⚠️", "yellow"))
             return {
-                **state,
                 "selector_response": [
                     SelectorMessage(
                         content=json.dumps(
-                            {"selector_response": "No search results to process"}
+                            {"selector_response": "Unable to generate selection"}
                         )
                     )
                 ],
             }
 
+    def _error_to_state(self, state: Dict[str, Any], e: Exception) -> Dict[str, Any]:
+        error_msg = f"Error in selector processing: {str(e)}"
+        print(colored(error_msg, "red"))
+        return {
+            "selector_response": [
+                SelectorMessage(
+                    content=json.dumps(
+                        {"selector_response": f"Error processing results: {str(e)}"}
+                    )
+                )
+            ],
+        }
+
+    def process(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        serp_messages = state.get("serper_response", [])
+        if not serp_messages:
+            return self._no_results(state)
+
         try:
             # Get the last SERP message
-            serp = serp_messages[-1] if serp_messages else None
+            serp = serp_messages[-1]
 
             # Get agent response
             agent_response = self.agent.invoke(
-                research_question=state.get("research_question", ""), serp=serp
+                research_question=state.get("research_question", ""),
+                serp=serp,
+                previous_selections=self._previous_selections(state),
+                **self._prompt_kwargs(),
             )
+            return self._response_to_state(state, agent_response)
 
-            # The agent's state will contain the selector_response
-            selector_response = agent_response.get("selector_response", "")
-
-            # Create a structured response
-            if selector_response:
-                return {
-                    **state,
-                    "selector_response": [
-                        SelectorMessage(content=str(selector_response))
-                    ],
-                }
-            else:
-                print(
-                    colored("Selector 🧑🏼‍💻: No valid response generated ⚠️", "yellow")
-                )
-                return {
-                    **state,
-                    "selector_response": [
-                        SelectorMessage(
-                            content=json.dumps(
-                                {"selector_response": "Unable to generate selection"}
-                            )
-                        )
-                    ],
-                }
+        except Exception as e:
+            return self._error_to_state(state, e)
+
+    async def aprocess(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        serp_messages = state.get("serper_response", [])
+        if not serp_messages:
+            return self._no_results(state)
+
+        try:
+            serp = serp_messages[-1]
+            agent_response = await self.agent.ainvoke(
+                research_question=state.get("research_question", ""),
+                serp=serp,
+                previous_selections=self._previous_selections(state),
+                **self._prompt_kwargs(),
+            )
+            return self._response_to_state(state, agent_response)
 
         except Exception as e:
-            error_msg = f"Error in selector processing: {str(e)}"
-            print(colored(error_msg, "red"))
-            return {
-                **state,
-                "selector_response": [
-                    SelectorMessage(
-                        content=json.dumps(
-                            {"selector_response": f"Error processing results: {str(e)}"}
-                        )
-                    )
-                ],
-            }
+            return self._error_to_state(state, e)
 
     def __call__(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """Make the node callable to work with LangGraph."""
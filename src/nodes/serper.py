@@ -1,6 +1,10 @@
+import asyncio
+import contextvars
 import json
-from typing import Any, Dict, Literal
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Literal, Optional
 
+import httpx
 import requests
 from langchain_core.messages import BaseMessage
 from termcolor import colored
@@ -8,17 +12,34 @@ from termcolor import colored
 from settings import get_settings
 from src.custom_logging import setup_logger
 from src.nodes.base import GraphNode
+from src.tools.serper_client import get_serper_client, normalize_query
+from src.utils.cassette import CassetteMiss
 
 logger = setup_logger(__name__)
 
+# Failures turned into an error message for the selector instead of raised
+SEARCH_ERRORS = (
+    requests.exceptions.RequestException,
+    httpx.HTTPError,
+    KeyError,
+    json.JSONDecodeError,
+    CassetteMiss,
+)
+
 
 class SerperMessage(BaseMessage):
     """Message class for Serper search results."""
 
     type: Literal["serper"] = "serper"
 
-    def __init__(self, content: str):
-        super().__init__(content=content)
+    def __init__(self, content: str, prefetch_ticket: Optional[str] = None):
+        # Kept in additional_kwargs so it survives checkpoints and digests
+        super().__init__(
+            content=content,
+            additional_kwargs=(
+                {"prefetch_ticket": prefetch_ticket} if prefetch_ticket else {}
+            ),
+        )
 
     @property
     def type(self) -> str:
@@ -37,94 +58,205 @@ def format_results(organic_results):
     return "\n".join(result_strings)
 
 
+def merge_organic_results(results_list: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Merge several Serper responses into one, deduplicating organic results by URL.
+
+    Results are interleaved round-robin so the top hit of every query stays
+    near the top of the merged list.
+    """
+    organic_lists = [r["organic"] for r in results_list if "organic" in r]
+    if not organic_lists:
+        return {}
+
+    merged, seen = [], set()
+    for rank in range(max(len(organic) for organic in organic_lists)):
+        for organic in organic_lists:
+            if rank >= len(organic):
+                continue
+            result = organic[rank]
+            link = result.get("link")
+            if link in seen:
+                continue
+            seen.add(link)
+            merged.append(result)
+    return {"organic": merged}
+
+
 class SerperNode(GraphNode):
-    __slots__ = ["config"]
+    __slots__ = [
+        "config",
+        "search_fanout",
+        "search_concurrency",
+        "executor",
+        "prefetcher",
+    ]
+    outputs = ("serper_response",)
 
-    def __init__(self, model=None, **kwargs):
+    def __init__(
+        self,
+        model=None,
+        search_fanout=1,
+        search_concurrency=4,
+        prefetcher=None,
+        **kwargs,
+    ):
         self.config = get_settings()
+        # Shared with ScraperNode; starts fetching the top links right away
+        self.prefetcher = prefetcher
+        self.search_fanout = max(1, search_fanout)
+        self.search_concurrency = max(1, search_concurrency)
+        self.executor = (
+            ThreadPoolExecutor(
+                max_workers=self.search_concurrency, thread_name_prefix="serper"
+            )
+            if self.search_fanout > 1
+            else None
+        )
         print(colored("Initialized SerperNode 🔍", "green"))
 
+    @property
+    def client(self):
+        # Resolved per call so a reconfigured client is never held past close()
+        return get_serper_client(self.config.SERPER_API_KEY)
+
     @property
     def name(self) -> str:
         return "serper_search"
 
-    def process(self, state: Dict[str, Any]) -> Dict[str, Any]:
-        plan = state.get("planner_response", [])
-        if not plan:
-            print(colored("No plan provided in state ⚠️", "yellow"))
-            return {
-                **state,
-                "serper_response": [SerperMessage(content="No plan provided")],
-            }
+    def _search_terms(self, plan) -> List[str]:
+        plan_data = json.loads(plan[-1].content)
+        terms = plan_data.get("search_terms") or []
+        if isinstance(terms, str):
+            terms = [terms]
+        if not terms:
+            terms = [plan_data["search_term"]]
 
-        try:
-            plan_data = json.loads(plan[-1].content)
-            search = plan_data.get("search_term")
+        unique_terms, seen = [], set()
+        for term in terms:
+            key = normalize_query(term)
+            if key not in seen:
+                seen.add(key)
+                unique_terms.append(term)
+        unique_terms = unique_terms[: self.search_fanout]
+
+        for search in unique_terms:
             print(colored(f"Serper 🔍: Searching for '{search}'", "cyan"))
+        return unique_terms
 
-            search_url = "https://google.serper.dev/search"
-            headers = {
-                "Content-Type": "application/json",
-                "X-API-KEY": self.config.SERPER_API_KEY,
-            }
-            payload = json.dumps({"q": search})
-
-            logger.debug(f"Sending request to Serper API: {search_url}")
-            response = requests.post(search_url, headers=headers, data=payload)
-            response.raise_for_status()
-            results = response.json()
-
-            if "organic" in results:
-                print(
-                    colored(
-                        f"Serper 🔍: Found {len(results['organic'])} results", "green"
-                    )
-                )
-                formatted_results = format_results(results["organic"])
-                return {
-                    **state,
-                    "serper_response": [SerperMessage(content=formatted_results)],
-                }
-            else:
-                print(colored("Serper 🔍: No organic results found ⚠️", "yellow"))
-                return {
-                    **state,
-                    "serper_response": [
-                        SerperMessage(content="No organic results found.")
-                    ],
-                }
-
-        except requests.exceptions.HTTPError as http_err:
-            print(
-                colored(f"Serper 🔍 Error: HTTP error occurred - {http_err} ❌", "red")
+    def _collect(self, state, outcomes: List[Any]) -> Dict[str, Any]:
+        """
+        Merge the results of the queries that succeeded. When none did, the
+        first failure is reported as if it had been the only query.
+        """
+        successes = [o for o in outcomes if not isinstance(o, BaseException)]
+        if not successes:
+            logger.warning(f"All {len(outcomes)} search queries failed")
+            if isinstance(outcomes[0], SEARCH_ERRORS):
+                return self._error_to_state(state, outcomes[0])
+            raise outcomes[0]
+        if len(successes) == 1:
+            return self._results_to_state(state, successes[0])
+        return self._results_to_state(state, merge_organic_results(successes))
+
+    def _search(self, state, terms: List[str]) -> Dict[str, Any]:
+        if len(terms) == 1:
+            return self._results_to_state(state, self.client.search(terms[0]))
+
+        futures = [
+            self.executor.submit(
+                contextvars.copy_context().run, self.client.search, term
             )
-            return {
-                **state,
-                "serper_response": [
-                    SerperMessage(content=f"HTTP error occurred: {http_err}")
-                ],
-            }
-        except requests.exceptions.RequestException as req_err:
+            for term in terms
+        ]
+        outcomes = []
+        for future in futures:
+            try:
+                outcomes.append(future.result())
+            except Exception as e:
+                outcomes.append(e)
+        return self._collect(state, outcomes)
+
+    async def _asearch(self, state, terms: List[str]) -> Dict[str, Any]:
+        if len(terms) == 1:
+            return self._results_to_state(state, await self.client.asearch(terms[0]))
+
+        semaphore = asyncio.Semaphore(self.search_concurrency)
+
+        async def _bounded(term):
+            async with semaphore:
+                return await self.client.asearch(term)
+
+        outcomes = await asyncio.gather(
+            *(_bounded(term) for term in terms), return_exceptions=True
+        )
+        return self._collect(state, outcomes)
+
+    def _results_to_state(self, state, results) -> Dict[str, Any]:
+        if "organic" in results:
             print(
-                colored(
-                    f"Serper 🔍 Error: Request error occurred - {req_err} ❌", "red"
-                )
+                colored(f"Serper 🔍: Found {len(results['organic'])} results", "green")
             )
+            ticket = None
+            if self.prefetcher is not None:
+                ticket = self.prefetcher.prefetch(
+                    r.get("link") for r in results["organic"]
+                )
+            formatted_results = format_results(results["organic"])
             return {
-                **state,
                 "serper_response": [
-                    SerperMessage(content=f"Request error occurred: {req_err}")
+                    SerperMessage(content=formatted_results, prefetch_ticket=ticket)
                 ],
             }
-        except (KeyError, json.JSONDecodeError) as err:
-            print(colored(f"Serper 🔍 Error: Data processing error - {err} ❌", "red"))
+        else:
+            print(colored("Serper 🔍: No organic results found ⚠️", "yellow"))
             return {
-                **state,
-                "serper_response": [
-                    SerperMessage(content=f"Error processing data: {err}")
-                ],
+                "serper_response": [SerperMessage(content="No organic results found.")],
             }
 
+    def _error_to_state(self, state, err: Exception) -> Dict[str, Any]:
+        if isinstance(err, (requests.exceptions.HTTPError, httpx.HTTPStatusError)):
+            print(colored(f"Serper 🔍 Error: HTTP error occurred - {err} ❌", "red"))
+            content = f"HTTP error occurred: {err}"
+        elif isinstance(err, (requests.exceptions.RequestException, httpx.HTTPError)):
+            print(colored(f"Serper 🔍 Error: Request error occurred - {err} ❌", "red"))
+            content = f"Request error occurred: {err}"
+        elif isinstance(err, CassetteMiss):
+            print(colored(f"Serper 🔍 Error: {err} ❌", "red"))
+            content = f"No search results: {err}"
+        else:
+            print(colored(f"Serper 🔍 Error: Data processing error - {err} ❌", "red"))
+            content = f"Error processing data: {err}"
+        return {"serper_response": [SerperMessage(content=content)]}
+
+    def _no_plan(self, state) -> Dict[str, Any]:
+        print(colored("No plan provided in state ⚠️", "yellow"))
+        return {
+            "serper_response": [SerperMessage(content="No plan provided")],
+        }
+
+    def process(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        plan = state.get("planner_response", [])
+        if not plan:
+            return self._no_plan(state)
+
+        try:
+            terms = self._search_terms(plan)
+            return self._search(state, terms)
+        except SEARCH_ERRORS as err:
+            return self._error_to_state(state, err)
+
+    async def aprocess(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        plan = state.get("planner_response", [])
+        if not plan:
+            return self._no_plan(state)
+
+        try:
+            terms = self._search_terms(plan)
+            return await self._asearch(state, terms)
+        except SEARCH_ERRORS as err:
+            return self._error_to_state(state, err)
+
     def __call__(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """Make the node callable to work with LangGraph."""
         return self.process(state)
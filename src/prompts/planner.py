@@ -20,6 +20,29 @@ Your response must take the following json format:
 
 """
 
+planner_fanout_prompt_template = """
+You are a planner. Your responsibility is to create a comprehensive plan to help your team answer a research question. 
+Questions may vary from simple to complex, multi-step queries. Your plan should provide appropriate guidance for your 
+team to use an internet search engine effectively.
+
+Provide {num_search_terms} distinct search terms that together cover the different angles of the question. The terms 
+will be searched in parallel, so avoid near-duplicates and order them from most to least relevant.
+
+If you receive feedback, you must adjust your plan accordingly. Here is the feedback received:
+Feedback: {feedback}
+
+Current date and time:
+{datetime}
+
+Your response must take the following json format:
+
+    "search_term": "The most relevant search term to start with"
+    "search_terms": ["The {num_search_terms} search terms to run, most relevant first"]
+    "overall_strategy": "The overall strategy to guide the search process"
+    "additional_information": "Any additional information to guide the search including other search terms or filters"
+
+"""
+
 planner_guided_json = {
     "type": "object",
     "properties": {
@@ -27,6 +50,11 @@ planner_guided_json = {
             "type": "string",
             "description": "The most relevant search term to start with",
         },
+        "search_terms": {
+            "type": "array",
+            "items": {"type": "string"},
+            "description": "Distinct search terms to run in parallel, most relevant first",
+        },
         "overall_strategy": {
             "type": "string",
             "description": "The overall strategy to guide the search process",
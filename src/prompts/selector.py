@@ -13,6 +13,34 @@ Return your findings in the following json format:
     "reason_for_selection": "Why you selected this page"
 
 
+Adjust your selection based on any feedback received:
+Feedback: {feedback}
+
+Here are your previous selections:
+{previous_selections}
+Consider this information when making your new selection.
+
+Current date and time:
+{datetime}
+"""
+
+selector_topk_prompt_template = """
+You are a selector. You will be presented with a search engine results page containing a list of potentially relevant 
+search results. Your task is to read through these results, rank the {num_pages} most relevant ones, and provide a 
+comprehensive reason for your selection. The pages will be fetched in parallel and the best ones that load will be used, 
+so prefer distinct, authoritative sources.
+
+here is the search engine results page:
+{serp}
+
+Return your findings in the following json format:
+
+    "selected_page_url": "The exact URL of the most relevant page",
+    "selected_page_urls": ["The exact URLs of the {num_pages} most relevant pages, best first"],
+    "description": "A brief description of the selected pages",
+    "reason_for_selection": "Why you selected these pages"
+
+
 Adjust your selection based on any feedback received:
 Feedback: {feedback}
 
@@ -31,6 +59,11 @@ selector_guided_json = {
             "type": "string",
             "description": "The exact URL of the page you selected",
         },
+        "selected_page_urls": {
+            "type": "array",
+            "items": {"type": "string"},
+            "description": "The exact URLs of the most relevant pages, best first",
+        },
         "description": {
             "type": "string",
             "description": "A brief description of the page",
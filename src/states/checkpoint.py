@@ -0,0 +1,527 @@
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import threading
+import zlib
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Sequence, Tuple
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    SerializerProtocol,
+    get_checkpoint_id,
+)
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+# Payloads larger than this are zlib-compressed before they are stored.
+COMPRESS_MIN_BYTES = 1024
+
+# Attributes every message carries; anything else is a per-class extra.
+_MESSAGE_FIELDS = (
+    "content",
+    "additional_kwargs",
+    "response_metadata",
+    "type",
+    "name",
+    "id",
+)
+
+
+@lru_cache(maxsize=1)
+def _message_classes() -> Dict[str, type]:
+    # Imported lazily: the node modules import the agents, which import the state.
+    from src.nodes.reporter import ReporterMessage
+    from src.nodes.reviewer import ReviewerMessage
+    from src.nodes.scraper import ScraperMessage
+    from src.nodes.selector import SelectorMessage
+    from src.nodes.serper import SerperMessage
+
+    classes = [
+        AIMessage,
+        HumanMessage,
+        SystemMessage,
+        ReporterMessage,
+        ReviewerMessage,
+        ScraperMessage,
+        SelectorMessage,
+        SerperMessage,
+    ]
+    return {cls.__name__: cls for cls in classes}
+
+
+def _encode_message(message: BaseMessage) -> Dict[str, Any]:
+    encoded = {"t": type(message).__name__, "c": message.content, "id": message.id}
+    if message.additional_kwargs:
+        encoded["k"] = message.additional_kwargs
+    # Custom classes set attributes in __init__; pydantic keeps them as extras,
+    # or in __dict__ for underscored names.
+    attributes = {**vars(message), **(message.__pydantic_extra__ or {})}
+    extras = {
+        key: value
+        for key, value in attributes.items()
+        if key not in _MESSAGE_FIELDS and value is not None
+    }
+    if extras:
+        encoded["x"] = extras
+    return encoded
+
+
+def _decode_message(encoded: Dict[str, Any]) -> BaseMessage:
+    cls = _message_classes()[encoded["t"]]
+    # Skip the custom constructors: the stored content is already serialized.
+    message = cls.model_construct(
+        content=encoded["c"],
+        id=encoded.get("id"),
+        additional_kwargs=encoded.get("k", {}),
+        response_metadata={},
+    )
+    for key, value in encoded.get("x", {}).items():
+        setattr(message, key, value)
+    return message
+
+
+class _NotCompact(Exception):
+    """Raised while encoding a value the compact format cannot represent."""
+
+
+def _to_compact(obj: Any) -> Any:
+    if obj is None or isinstance(obj, (str, int, float, bool)):
+        return obj
+    if isinstance(obj, BaseMessage) and type(obj).__name__ in _message_classes():
+        return {"__msg__": _encode_message(obj)}
+    if isinstance(obj, list):
+        return [_to_compact(value) for value in obj]
+    if isinstance(obj, dict) and "__msg__" not in obj:
+        if not all(isinstance(key, str) for key in obj):
+            raise _NotCompact()
+        return {key: _to_compact(value) for key, value in obj.items()}
+    # Tuples, sets, Send objects ... keep their types through the fallback.
+    raise _NotCompact()
+
+
+def _from_compact(obj: Dict[str, Any]) -> Any:
+    if len(obj) == 1 and "__msg__" in obj:
+        return _decode_message(obj["__msg__"])
+    return obj
+
+
+class MessageSerializer(SerializerProtocol):
+    """
+    Checkpoint serializer with a compact encoding for the graph's messages.
+
+    Values made of plain JSON types and known message classes
+    (``SerperMessage``, ``ScraperMessage``, ``ReporterMessage`` ...) are
+    written as JSON, compressed when large; anything else goes through
+    LangGraph's ``JsonPlusSerializer``.
+    """
+
+    def __init__(self, fallback: Optional[SerializerProtocol] = None):
+        self.fallback = fallback or JsonPlusSerializer()
+
+    def dumps(self, obj: Any) -> bytes:
+        return self.fallback.dumps(obj)
+
+    def loads(self, data: bytes) -> Any:
+        return self.fallback.loads(data)
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        try:
+            data = json.dumps(_to_compact(obj), separators=(",", ":")).encode("utf-8")
+        except (_NotCompact, TypeError, ValueError):
+            return self.fallback.dumps_typed(obj)
+
+        if len(data) >= COMPRESS_MIN_BYTES:
+            return "compact+zlib", zlib.compress(data)
+        return "compact", data
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        type_, payload = data
+        if type_ == "compact+zlib":
+            payload = zlib.decompress(payload)
+        elif type_ != "compact":
+            return self.fallback.loads_typed(data)
+        return json.loads(payload, object_hook=_from_compact)
+
+
+class SqliteCheckpointSaver(BaseCheckpointSaver[str]):
+    """
+    Durable LangGraph checkpointer backed by a SQLite file in WAL mode.
+
+    Channel values are stored per channel version, so a checkpoint only writes
+    the channels that changed in its step. With ``keep`` only the latest
+    ``keep`` checkpoints of a thread are kept, along with their pending writes
+    and the channel values they still use. The async methods run the sync
+    ones in a worker thread so the event loop never waits on the disk.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        serde: Optional[SerializerProtocol] = None,
+        keep: Optional[int] = None,
+    ):
+        super().__init__(serde=serde or MessageSerializer())
+        self.path = path
+        self.keep = keep
+        self._lock = threading.Lock()
+        self._conn = self._open(path)
+
+    @staticmethod
+    def _open(path: str) -> sqlite3.Connection:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL DEFAULT '',
+                checkpoint_id TEXT NOT NULL,
+                parent_checkpoint_id TEXT,
+                type TEXT NOT NULL,
+                checkpoint BLOB NOT NULL,
+                metadata_type TEXT NOT NULL,
+                metadata BLOB NOT NULL,
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+            );
+            CREATE TABLE IF NOT EXISTS blobs (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL DEFAULT '',
+                channel TEXT NOT NULL,
+                version TEXT NOT NULL,
+                type TEXT NOT NULL,
+                value BLOB,
+                PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+            );
+            CREATE TABLE IF NOT EXISTS writes (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL DEFAULT '',
+                checkpoint_id TEXT NOT NULL,
+                task_id TEXT NOT NULL,
+                idx INTEGER NOT NULL,
+                channel TEXT NOT NULL,
+                type TEXT NOT NULL,
+                value BLOB,
+                task_path TEXT NOT NULL DEFAULT '',
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+            );
+            """
+        )
+        return conn
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _config(
+        thread_id: str, checkpoint_ns: str, checkpoint_id: str
+    ) -> RunnableConfig:
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint_id,
+            }
+        }
+
+    def _load_blobs(
+        self, thread_id: str, checkpoint_ns: str, versions: ChannelVersions
+    ) -> Dict[str, Any]:
+        channel_values = {}
+        for channel, version in versions.items():
+            row = self._conn.execute(
+                "SELECT type, value FROM blobs WHERE thread_id = ? "
+                "AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                (thread_id, checkpoint_ns, channel, str(version)),
+            ).fetchone()
+            if row is not None and row[0] != "empty":
+                channel_values[channel] = self.serde.loads_typed((row[0], row[1]))
+        return channel_values
+
+    def _to_tuple(self, row) -> CheckpointTuple:
+        thread_id, checkpoint_ns, checkpoint_id, parent_id = row[:4]
+        checkpoint = self.serde.loads_typed((row[4], row[5]))
+        metadata = self.serde.loads_typed((row[6], row[7]))
+        writes = self._conn.execute(
+            "SELECT task_id, channel, type, value FROM writes WHERE thread_id = ? "
+            "AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+        return CheckpointTuple(
+            config=self._config(thread_id, checkpoint_ns, checkpoint_id),
+            checkpoint={
+                **checkpoint,
+                "channel_values": self._load_blobs(
+                    thread_id, checkpoint_ns, checkpoint["channel_versions"]
+                ),
+            },
+            metadata=metadata,
+            parent_config=(
+                self._config(thread_id, checkpoint_ns, parent_id) if parent_id else None
+            ),
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed((type_, value)))
+                for task_id, channel, type_, value in writes
+            ],
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, "
+            "type, checkpoint, metadata_type, metadata FROM checkpoints "
+            "WHERE thread_id = ? AND checkpoint_ns = ?"
+        )
+        params = [thread_id, checkpoint_ns]
+        checkpoint_id = get_checkpoint_id(config)
+        if checkpoint_id:
+            query += " AND checkpoint_id = ?"
+            params.append(checkpoint_id)
+        else:
+            # Checkpoint ids are time-ordered, so the largest one is the latest.
+            query += " ORDER BY checkpoint_id DESC LIMIT 1"
+
+        with self._lock:
+            row = self._conn.execute(query, params).fetchone()
+            return self._to_tuple(row) if row else None
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, "
+            "type, checkpoint, metadata_type, metadata FROM checkpoints WHERE 1 = 1"
+        )
+        params = []
+        if config:
+            query += " AND thread_id = ?"
+            params.append(config["configurable"]["thread_id"])
+            checkpoint_ns = config["configurable"].get("checkpoint_ns")
+            if checkpoint_ns is not None:
+                query += " AND checkpoint_ns = ?"
+                params.append(checkpoint_ns)
+            if get_checkpoint_id(config):
+                query += " AND checkpoint_id = ?"
+                params.append(get_checkpoint_id(config))
+        if before and get_checkpoint_id(before):
+            query += " AND checkpoint_id < ?"
+            params.append(get_checkpoint_id(before))
+        query += " ORDER BY checkpoint_id DESC"
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+
+        for row in rows:
+            if limit is not None and limit <= 0:
+                break
+            if filter:
+                metadata = self.serde.loads_typed((row[6], row[7]))
+                if not all(metadata.get(k) == v for k, v in filter.items()):
+                    continue
+            with self._lock:
+                checkpoint_tuple = self._to_tuple(row)
+            if limit is not None:
+                limit -= 1
+            yield checkpoint_tuple
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint = checkpoint.copy()
+        values = checkpoint.pop("channel_values")
+
+        blobs = []
+        for channel, version in new_versions.items():
+            type_, value = (
+                self.serde.dumps_typed(values[channel])
+                if channel in values
+                else ("empty", None)
+            )
+            blobs.append((thread_id, checkpoint_ns, channel, str(version), type_, value))
+        checkpoint_type, checkpoint_data = self.serde.dumps_typed(checkpoint)
+        metadata_type, metadata_data = self.serde.dumps_typed(
+            {**config.get("metadata", {}), **metadata}
+        )
+
+        with self._lock:
+            with self._conn:
+                self._conn.execute("BEGIN")
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?, ?)", blobs
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        thread_id,
+                        checkpoint_ns,
+                        checkpoint["id"],
+                        config["configurable"].get("checkpoint_id"),
+                        checkpoint_type,
+                        checkpoint_data,
+                        metadata_type,
+                        metadata_data,
+                    ),
+                )
+                if self.keep:
+                    self._prune(thread_id, checkpoint_ns)
+        return self._config(thread_id, checkpoint_ns, checkpoint["id"])
+
+    def _prune(self, thread_id: str, checkpoint_ns: str) -> None:
+        """Delete all but the latest ``keep`` checkpoints of a thread."""
+        ids = [
+            row[0]
+            for row in self._conn.execute(
+                "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? "
+                "AND checkpoint_ns = ? ORDER BY checkpoint_id DESC",
+                (thread_id, checkpoint_ns),
+            )
+        ]
+        if len(ids) <= self.keep:
+            return
+        oldest_kept, dropped = ids[self.keep - 1], ids[self.keep :]
+        for table in ("checkpoints", "writes"):
+            self._conn.executemany(
+                f"DELETE FROM {table} WHERE thread_id = ? AND checkpoint_ns = ? "
+                "AND checkpoint_id = ?",
+                [(thread_id, checkpoint_ns, checkpoint_id) for checkpoint_id in dropped],
+            )
+        # Versions only grow, so values older than the ones the oldest kept
+        # checkpoint points at are not used by any kept checkpoint.
+        row = self._conn.execute(
+            "SELECT type, checkpoint FROM checkpoints WHERE thread_id = ? "
+            "AND checkpoint_ns = ? AND checkpoint_id = ?",
+            (thread_id, checkpoint_ns, oldest_kept),
+        ).fetchone()
+        versions = self.serde.loads_typed(row)["channel_versions"]
+        self._conn.executemany(
+            "DELETE FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? "
+            "AND channel = ? AND version < ?",
+            [
+                (thread_id, checkpoint_ns, channel, str(version))
+                for channel, version in versions.items()
+            ],
+        )
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            type_, data = self.serde.dumps_typed(value)
+            rows.append(
+                (
+                    thread_id,
+                    checkpoint_ns,
+                    checkpoint_id,
+                    task_id,
+                    WRITES_IDX_MAP.get(channel, idx),
+                    channel,
+                    type_,
+                    data,
+                    task_path,
+                )
+            )
+        # Special writes (errors, interrupts) replace; regular ones are written once.
+        verb = (
+            "INSERT OR REPLACE"
+            if all(channel in WRITES_IDX_MAP for channel, _ in writes)
+            else "INSERT OR IGNORE"
+        )
+        with self._lock:
+            with self._conn:
+                self._conn.execute("BEGIN")
+                self._conn.executemany(
+                    f"{verb} INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+                )
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            with self._conn:
+                self._conn.execute("BEGIN")
+                for table in ("checkpoints", "blobs", "writes"):
+                    self._conn.execute(
+                        f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,)
+                    )
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        if current is None:
+            current_version = 0
+        elif isinstance(current, int):
+            current_version = current
+        else:
+            current_version = int(current.split(".")[0])
+        # The random suffix keeps versions unique across concurrent branches.
+        return f"{current_version + 1:032}.{random.random():016}"
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(
+            self.put, config, checkpoint, metadata, new_versions
+        )
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
@@ -0,0 +1,107 @@
+from typing import Any, Callable, Dict, Optional
+
+from langchain_core.messages import BaseMessage
+from langgraph.graph.message import Messages, add_messages
+
+from src.utils.usage import empty_usage
+
+# Extra attributes some message classes use to hold the full payload again.
+PAYLOAD_ATTRIBUTES = ("_raw_content",)
+# Iteration fingerprints kept in the ``convergence`` channel; older ones are
+# dropped so long runs do not grow every checkpoint.
+MAX_CONVERGENCE_ITERATIONS = 32
+
+
+def digest_message(message: BaseMessage, digest_chars: int) -> BaseMessage:
+    """
+    Return a copy of ``message`` whose content is cut to ``digest_chars``.
+
+    The copy keeps the message class and id, so ``add_messages`` still matches
+    it, and is flagged with ``additional_kwargs["digest"]`` so it is not
+    digested twice.
+    """
+    if message.additional_kwargs.get("digest"):
+        return message
+
+    content = message.content
+    if not isinstance(content, str):
+        content = str(content)
+    if len(content) > digest_chars:
+        content = f"{content[:digest_chars]}... [{len(content)} chars]"
+
+    digest = message.model_copy(
+        update={
+            "content": content,
+            "additional_kwargs": {**message.additional_kwargs, "digest": True},
+        }
+    )
+    for attribute in PAYLOAD_ATTRIBUTES:
+        if attribute in digest.__dict__:
+            setattr(digest, attribute, None)
+    return digest
+
+
+def bounded_messages(
+    keep: Optional[int] = None, digest_chars: int = 0
+) -> Callable[[Messages, Messages], Messages]:
+    """
+    Build an ``add_messages`` reducer that retains the last ``keep`` messages.
+
+    Older messages are dropped, or reduced to a ``digest_chars`` digest when
+    that is set. ``keep=None`` returns plain ``add_messages``.
+    """
+    if keep is None:
+        return add_messages
+    if keep < 1:
+        raise ValueError("keep must be at least 1")
+
+    def reducer(left: Messages, right: Messages) -> Messages:
+        merged = add_messages(left, right)
+        if len(merged) <= keep:
+            return merged
+        recent = merged[-keep:]
+        if not digest_chars:
+            return recent
+        return [digest_message(m, digest_chars) for m in merged[:-keep]] + recent
+
+    reducer.__name__ = f"keep_last_{keep}"
+    return reducer
+
+
+def merge_usage(
+    left: Optional[Dict[str, Any]], right: Optional[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """
+    Reducer for the ``usage`` channel: sums per-node token counts and cost
+    from ``{"nodes": {node: counts}}`` updates and keeps a run ``total``.
+    """
+    nodes = {
+        name: dict(counts) for name, counts in (left or {}).get("nodes", {}).items()
+    }
+    for name, counts in (right or {}).get("nodes", {}).items():
+        merged = nodes.setdefault(name, empty_usage())
+        for key, value in counts.items():
+            merged[key] = merged.get(key, 0) + value
+
+    total = empty_usage()
+    for counts in nodes.values():
+        for key, value in counts.items():
+            total[key] = total.get(key, 0) + value
+    return {"nodes": nodes, "total": total}
+
+
+def merge_convergence(
+    left: Optional[Dict[str, Any]], right: Optional[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """
+    Reducer for the ``convergence`` channel: appends iteration fingerprints,
+    keeping the last ``MAX_CONVERGENCE_ITERATIONS``, and sums the stall and
+    saved-iteration counters.
+    """
+    left, right = left or {}, right or {}
+    iterations = list(left.get("iterations", []))
+    iterations.extend(right.get("iterations", []))
+    merged = {"iterations": iterations[-MAX_CONVERGENCE_ITERATIONS:]}
+    for key in ("stalls", "saved_iterations", "saved_steps"):
+        merged[key] = left.get(key, 0) + right.get(key, 0)
+    return merged
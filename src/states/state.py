@@ -1,7 +1,9 @@
-from typing import Annotated, TypedDict
+from typing import Annotated, Dict, Optional, TypedDict
 
 from langgraph.graph.message import add_messages
 
+from src.states.reducers import bounded_messages, merge_convergence, merge_usage
+
 
 # Define the state object for the agent graph
 class AgentGraphState(TypedDict):
@@ -15,6 +17,37 @@ class AgentGraphState(TypedDict):
     scraper_response: Annotated[list, add_messages]
     final_reports: Annotated[list, add_messages]
     end_chain: Annotated[list, add_messages]
+    # Per-node and total LLM tokens and cost of the run
+    usage: Annotated[dict, merge_usage]
+    # Fingerprints of the review-loop iterations and the loops cut short
+    convergence: Annotated[dict, merge_convergence]
+
+
+def make_agent_graph_state(
+    history_limit: Optional[int] = None,
+    history_limits: Optional[Dict[str, Optional[int]]] = None,
+    digest_chars: int = 0,
+) -> type:
+    """
+    Build an ``AgentGraphState`` whose message channels keep bounded history.
+
+    ``history_limit`` applies to every message channel and ``history_limits``
+    overrides it per channel; None keeps the full history. Older messages are
+    dropped, or digested to ``digest_chars`` characters when that is set.
+    """
+    history_limits = history_limits or {}
+    unknown = set(history_limits) - set(AgentGraphState.__annotations__)
+    if unknown:
+        raise ValueError(f"Unknown state channels: {sorted(unknown)}")
+
+    fields = {}
+    for key, annotation in AgentGraphState.__annotations__.items():
+        if add_messages not in getattr(annotation, "__metadata__", ()):
+            fields[key] = annotation
+            continue
+        keep = history_limits.get(key, history_limit)
+        fields[key] = Annotated[list, bounded_messages(keep, digest_chars)]
+    return TypedDict("AgentGraphState", fields)
 
 
 # Define the nodes in the agent graph
@@ -82,4 +115,6 @@ state = {
     "scraper_response": [],
     "final_reports": [],
     "end_chain": [],
+    "usage": {},
+    "convergence": {},
 }
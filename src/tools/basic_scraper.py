@@ -1,9 +1,9 @@
 import json
 
 import requests
-from bs4 import BeautifulSoup
 from langchain_core.messages import HumanMessage
 
+from src.tools.extractors import get_extractor, visible_text
 from states.state import AgentGraphState
 
 
@@ -26,11 +26,11 @@ def scrape_website(state: AgentGraphState, research=None):
     try:
         response = requests.get(url)
         response.raise_for_status()
-        soup = BeautifulSoup(response.content, "html.parser")
 
-        # Extract text content
-        texts = soup.stripped_strings
-        content = " ".join(texts)
+        # Extract the main text content, without navigation and scripts
+        content = get_extractor().extract(response.text) or visible_text(
+            response.text
+        )
 
         # Check for garbled text
         if is_garbled(content):
@@ -0,0 +1,313 @@
+import math
+import re
+from abc import ABC, abstractmethod
+from html.parser import HTMLParser
+from typing import Dict, List, Type
+
+from src.custom_logging import setup_logger
+
+logger = setup_logger(__name__)
+
+# Elements that never carry article text.
+BOILERPLATE_TAGS = [
+    "script",
+    "style",
+    "noscript",
+    "template",
+    "svg",
+    "iframe",
+    "nav",
+    "header",
+    "footer",
+    "aside",
+    "form",
+    "button",
+    "select",
+    "title",
+]
+
+NEGATIVE_HINTS = re.compile(
+    r"cookie|consent|banner|nav|menu|footer|sidebar|advert|promo|share|social|"
+    r"comment|popup|modal|subscribe|newsletter|related|breadcrumb",
+    re.IGNORECASE,
+)
+# Whole words only, so a "related-articles" block stays negative
+POSITIVE_HINTS = re.compile(
+    r"(?<![a-z0-9])(article|content|main|post|entry|story|text|body|blog)(?![a-z0-9])",
+    re.IGNORECASE,
+)
+
+# A main-content candidate shorter than this falls back to the whole body.
+MIN_CONTENT_CHARS = 250
+
+# Elements without an end tag; a class/id hint on them has nothing to drop.
+VOID_TAGS = frozenset(
+    "area base br col embed hr img input link meta param source track wbr".split()
+)
+# Kept whatever their class/id says; the hints are about their content.
+KEPT_TAGS = frozenset(("html", "body", "article", "main"))
+# Open elements a start tag closes when their end tag was left out
+IMPLIED_END_TAGS = {
+    "li": {"li"},
+    "option": {"option"},
+    "dt": {"dt", "dd"},
+    "dd": {"dt", "dd"},
+    "tr": {"tr", "td", "th"},
+    "td": {"td", "th"},
+    "th": {"td", "th"},
+    "p": {"p"},
+}
+# Block elements that close an open paragraph
+P_CLOSING_TAGS = frozenset(
+    "address article aside blockquote details div dl fieldset figure footer form "
+    "h1 h2 h3 h4 h5 h6 header hr main nav ol pre section table ul".split()
+)
+# An implied end tag is never looked for beyond these
+SCOPE_TAGS = frozenset(("ul", "ol", "dl", "table", "select"))
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split())
+
+
+class TextExtractor(ABC):
+    """Turns an HTML document into the text handed to the reporter."""
+
+    name: str = ""
+
+    @abstractmethod
+    def extract(self, html: str) -> str:
+        """Return the readable text of the document."""
+        pass
+
+
+def class_weight(attrs) -> int:
+    """
+    Score of an element's class/id: -25 for boilerplate hints, +25 for content
+    hints. Every backend drops elements scoring below zero.
+    """
+    hints = f"{attrs.get('class') or ''} {attrs.get('id') or ''}"
+    weight = 0
+    if NEGATIVE_HINTS.search(hints):
+        weight -= 25
+    if POSITIVE_HINTS.search(hints):
+        weight += 25
+    return weight
+
+
+def _is_hinted_boilerplate(tag: str, attrs) -> bool:
+    if tag in KEPT_TAGS or tag in VOID_TAGS:
+        return False
+    return class_weight(attrs) < 0
+
+
+class _BoilerplateStrippingParser(HTMLParser):
+    """
+    Collects visible text. Open elements are tracked on a stack so that end
+    tags HTML lets pages leave out (``<li>``, ``<p>``, ``<option>`` ...) still
+    close a skipped element.
+    """
+
+    def __init__(self, use_hints: bool = True):
+        super().__init__(convert_charrefs=True)
+        self.use_hints = use_hints
+        self.chunks: List[str] = []
+        self._skip_depth = 0
+        self._open: List[str] = []
+        # Stack index of the element skipped because of its class/id
+        self._hinted_at = None
+
+    def _pop_to(self, index: int) -> None:
+        del self._open[index:]
+        if self._hinted_at is not None and self._hinted_at >= len(self._open):
+            self._hinted_at = None
+
+    def _close_implied(self, tag: str) -> None:
+        closes = IMPLIED_END_TAGS.get(tag, set())
+        if tag in P_CLOSING_TAGS:
+            closes = closes | {"p"}
+        if not closes:
+            return
+        for index in range(len(self._open) - 1, -1, -1):
+            if self._open[index] in closes:
+                self._pop_to(index)
+                return
+            if self._open[index] in SCOPE_TAGS:
+                return
+
+    def handle_starttag(self, tag, attrs):
+        if tag in VOID_TAGS:
+            return
+        self._close_implied(tag)
+        if tag in BOILERPLATE_TAGS:
+            self._skip_depth += 1
+        self._open.append(tag)
+        if self._hinted_at is None and self.use_hints:
+            if _is_hinted_boilerplate(tag, dict(attrs)):
+                self._hinted_at = len(self._open) - 1
+
+    def handle_endtag(self, tag):
+        if tag in BOILERPLATE_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        # Stray end tags are ignored; others close everything opened inside
+        for index in range(len(self._open) - 1, -1, -1):
+            if self._open[index] == tag:
+                self._pop_to(index)
+                return
+
+    def handle_data(self, data):
+        if not self._skip_depth and self._hinted_at is None:
+            text = _normalize(data)
+            if text:
+                self.chunks.append(text)
+
+
+def visible_text(html: str) -> str:
+    """All text outside script, style and other non-content elements."""
+    parser = _BoilerplateStrippingParser(use_hints=False)
+    parser.feed(html)
+    parser.close()
+    return " ".join(parser.chunks)
+
+
+class StdlibExtractor(TextExtractor):
+    """Dependency-free fallback: visible text minus boilerplate elements and
+    anything whose class/id looks like navigation, banners or ads."""
+
+    name = "stdlib"
+
+    def extract(self, html: str) -> str:
+        parser = _BoilerplateStrippingParser()
+        parser.feed(html)
+        parser.close()
+        return " ".join(parser.chunks)
+
+
+class LxmlExtractor(TextExtractor):
+    """
+    Readability-style extractor built on lxml.
+
+    Paragraph-like elements score their parent and grandparent by text length
+    and comma count; class/id hints and link density adjust the score, and the
+    best-scoring container is returned.
+    """
+
+    name = "lxml"
+
+    SCORED_TAGS = ("p", "pre", "td", "blockquote", "li")
+
+    def __init__(self):
+        import lxml.html
+
+        self._lxml_html = lxml.html
+
+    def _strip_boilerplate(self, root) -> None:
+        for element in list(root.iter(*BOILERPLATE_TAGS)):
+            element.drop_tree()
+        for element in list(root.iter()):
+            if not isinstance(element.tag, str) or element.getparent() is None:
+                continue
+            if _is_hinted_boilerplate(element.tag, element.attrib):
+                element.drop_tree()
+
+    def _best_candidate(self, root):
+        scores: Dict = {}
+        for element in root.iter(*self.SCORED_TAGS):
+            text = _normalize(element.text_content())
+            if len(text) < 25:
+                continue
+            score = 1 + text.count(",") + min(len(text) / 100, 3)
+            parent = element.getparent()
+            if parent is None:
+                continue
+            for ancestor, share in ((parent, 1.0), (parent.getparent(), 0.5)):
+                if ancestor is None:
+                    continue
+                if ancestor not in scores:
+                    scores[ancestor] = class_weight(ancestor.attrib)
+                scores[ancestor] += score * share
+
+        best, best_score = None, -math.inf
+        for element, score in scores.items():
+            text_length = len(_normalize(element.text_content())) or 1
+            link_length = sum(
+                len(_normalize(link.text_content())) for link in element.iter("a")
+            )
+            score *= 1 - min(link_length / text_length, 1)
+            if score > best_score:
+                best, best_score = element, score
+        return best
+
+    def extract(self, html: str) -> str:
+        if not html.strip():
+            return ""
+        root = self._lxml_html.document_fromstring(html)
+        self._strip_boilerplate(root)
+
+        candidate = self._best_candidate(root)
+        if candidate is not None:
+            text = _normalize(candidate.text_content())
+            if len(text) >= MIN_CONTENT_CHARS:
+                return text
+
+        body = root.find("body")
+        return _normalize((body if body is not None else root).text_content())
+
+
+class SelectolaxExtractor(TextExtractor):
+    """
+    Fastest option: selectolax with the same boilerplate stripping, preferring
+    ``<article>``/``<main>`` content when present.
+    """
+
+    name = "selectolax"
+
+    def __init__(self):
+        try:
+            from selectolax.lexbor import LexborHTMLParser as SelectolaxParser
+        except ImportError:
+            from selectolax.parser import HTMLParser as SelectolaxParser
+
+        self._parser = SelectolaxParser
+
+    def extract(self, html: str) -> str:
+        tree = self._parser(html)
+        tree.strip_tags(BOILERPLATE_TAGS)
+        for node in tree.css("[class], [id]"):
+            if _is_hinted_boilerplate(node.tag, node.attributes):
+                node.decompose()
+
+        for selector in ("article", "main", "[role=main]"):
+            nodes = tree.css(selector)
+            if nodes:
+                text = _normalize(" ".join(n.text(separator=" ") for n in nodes))
+                if len(text) >= MIN_CONTENT_CHARS:
+                    return text
+
+        root = tree.body or tree.root
+        return _normalize(root.text(separator=" ")) if root is not None else ""
+
+
+EXTRACTORS: Dict[str, Type[TextExtractor]] = {
+    "selectolax": SelectolaxExtractor,
+    "lxml": LxmlExtractor,
+    "stdlib": StdlibExtractor,
+}
+
+
+def get_extractor(name: str = "auto") -> TextExtractor:
+    """
+    Return an extractor by name.
+
+    ``auto`` picks the fastest installed backend: selectolax, then lxml, then
+    the stdlib parser.
+    """
+    if name != "auto":
+        return EXTRACTORS[name]()
+
+    for candidate in ("selectolax", "lxml", "stdlib"):
+        try:
+            return EXTRACTORS[candidate]()
+        except ImportError:
+            logger.debug(f"{candidate} extractor unavailable, trying the next one")
+    return StdlibExtractor()
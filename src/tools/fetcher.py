@@ -0,0 +1,336 @@
+import codecs
+import threading
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.custom_logging import setup_logger
+from src.utils.cassette import Cassette, CassetteMiss, get_cassette
+from src.utils.tracing import span
+
+logger = setup_logger(__name__)
+
+DEFAULT_TIMEOUT = (3.05, 10)
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024
+DEFAULT_TEXT_BUDGET = 4000
+CHUNK_SIZE = 16 * 1024
+TEXT_CONTENT_TYPES = ("text/html", "application/xhtml+xml", "text/plain")
+
+
+class UnsupportedContentError(requests.RequestException):
+    """Raised when a response is not a text document worth reading."""
+
+
+class FetchCancelled(requests.RequestException):
+    """Raised when a fetch is cancelled while the body is being read."""
+
+    def __init__(self, url: str, bytes_read: int):
+        super().__init__(f"fetch of {url} cancelled after {bytes_read} bytes")
+        self.bytes_read = bytes_read
+
+
+class VisibleTextParser(HTMLParser):
+    """
+    Incremental HTML parser that collects visible text up to a character budget.
+
+    Feed it decoded chunks as they arrive; ``done`` turns true once enough text
+    has been collected, so callers can stop reading the response.
+    """
+
+    SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "iframe"}
+
+    def __init__(self, budget: int = DEFAULT_TEXT_BUDGET):
+        super().__init__(convert_charrefs=True)
+        self.budget = budget
+        self.length = 0
+        self._chunks: List[str] = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        text = " ".join(data.split())
+        if text:
+            self._chunks.append(text)
+            self.length += len(text) + 1
+
+    @property
+    def done(self) -> bool:
+        return self.length >= self.budget
+
+    @property
+    def text(self) -> str:
+        return " ".join(self._chunks)[: self.budget]
+
+
+@dataclass
+class FetchResult:
+    url: str
+    status_code: int
+    content_type: str
+    text: str
+    body: bytes = field(repr=False, default=b"")
+    bytes_read: int = 0
+    truncated: bool = False
+    encoding: str = "utf-8"
+
+    @property
+    def html(self) -> str:
+        """The body read so far, decoded with the response charset."""
+        return self.body.decode(self.encoding, errors="replace")
+
+
+def _content_type(headers) -> str:
+    return headers.get("Content-Type", "").split(";")[0].strip().lower()
+
+
+def _check_content_type(url: str, content_type: str) -> None:
+    if content_type and content_type not in TEXT_CONTENT_TYPES:
+        raise UnsupportedContentError(
+            f"unsupported content type {content_type} for url: {url}"
+        )
+
+
+def _charset(headers) -> str:
+    for part in headers.get("Content-Type", "").split(";")[1:]:
+        key, _, value = part.partition("=")
+        if key.strip().lower() == "charset" and value.strip():
+            charset = value.strip().strip('"')
+            try:
+                codecs.lookup(charset)
+                return charset
+            except LookupError:
+                break
+    return "utf-8"
+
+
+class _StreamReader:
+    """Accumulates response chunks until the byte cap or text budget is reached."""
+
+    def __init__(self, headers, max_bytes: int, text_budget: int):
+        self.max_bytes = max_bytes
+        self.parser = VisibleTextParser(text_budget)
+        self.encoding = _charset(headers)
+        self.decoder = codecs.getincrementaldecoder(self.encoding)(errors="replace")
+        self.body = bytearray()
+        self.truncated = False
+
+    def feed(self, chunk: bytes) -> bool:
+        """Consume a chunk; return True when reading should stop."""
+        remaining = self.max_bytes - len(self.body)
+        chunk = chunk[:remaining]
+        self.body.extend(chunk)
+        self.parser.feed(self.decoder.decode(chunk))
+        if self.parser.done or len(self.body) >= self.max_bytes:
+            self.truncated = True
+            return True
+        return False
+
+    def result(self, url: str, status_code: int, content_type: str) -> FetchResult:
+        if not self.truncated:
+            self.parser.feed(self.decoder.decode(b"", final=True))
+            self.parser.close()
+        return FetchResult(
+            url=url,
+            status_code=status_code,
+            content_type=content_type,
+            text=self.parser.text,
+            body=bytes(self.body),
+            bytes_read=len(self.body),
+            truncated=self.truncated,
+            encoding=self.encoding,
+        )
+
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_session(pool_size: int = 20) -> requests.Session:
+    """Return the shared session used for page fetches."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def _page_entry(page: FetchResult) -> Dict[str, Any]:
+    return {
+        "status": page.status_code,
+        "content_type": page.content_type,
+        "encoding": page.encoding,
+        # latin-1 maps every byte to one character, so any body round-trips
+        "body": page.body.decode("latin-1"),
+    }
+
+
+def _error_entry(e: Exception) -> Dict[str, Any]:
+    response = getattr(e, "response", None)
+    return {
+        "error": type(e).__name__,
+        "message": str(e),
+        "status": getattr(response, "status_code", None),
+    }
+
+
+def _raise_recorded(url: str, entry: Dict[str, Any]) -> None:
+    if entry["error"] == UnsupportedContentError.__name__:
+        raise UnsupportedContentError(entry["message"])
+    if entry["status"] is not None:
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response.url = url
+        raise requests.HTTPError(entry["message"], response=response)
+    raise requests.ConnectionError(entry["message"])
+
+
+def _replay_page(
+    cassette: Cassette, url: str, max_bytes: int, text_budget: int
+) -> FetchResult:
+    """Rebuild a recorded page by reading its body exactly as a download would."""
+    with span("fetch", "http", url=url, replayed=True) as current:
+        try:
+            entry = cassette.replay("fetch", url)
+        except CassetteMiss as e:
+            raise requests.ConnectionError(str(e))
+        if "error" in entry:
+            _raise_recorded(url, entry)
+
+        headers = {
+            "Content-Type": f"{entry['content_type']}; charset={entry['encoding']}"
+        }
+        reader = _StreamReader(headers, max_bytes, text_budget)
+        body = entry["body"].encode("latin-1")
+        for start in range(0, len(body), CHUNK_SIZE):
+            if reader.feed(body[start : start + CHUNK_SIZE]):
+                break
+        current.set(status=entry["status"], bytes=len(reader.body))
+        return reader.result(url, entry["status"], entry["content_type"])
+
+
+def fetch_page(
+    url: str,
+    session: Optional[requests.Session] = None,
+    timeout: Tuple[float, float] = DEFAULT_TIMEOUT,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    text_budget: int = DEFAULT_TEXT_BUDGET,
+    cancel: Optional[threading.Event] = None,
+) -> FetchResult:
+    """
+    Stream a page and stop as soon as ``text_budget`` characters of visible text
+    or ``max_bytes`` of body have been read.
+
+    Raises requests exceptions for HTTP errors and non-text content types, and
+    ``FetchCancelled`` once ``cancel`` is set. With a cassette configured the
+    page and any error are recorded, or replayed without network access.
+    """
+    cassette = get_cassette()
+    if cassette is not None and cassette.replaying:
+        return _replay_page(cassette, url, max_bytes, text_budget)
+    try:
+        page = _download_page(url, session, timeout, max_bytes, text_budget, cancel)
+    except FetchCancelled:
+        raise
+    except requests.RequestException as e:
+        if cassette is not None:
+            cassette.record("fetch", url, _error_entry(e))
+        raise
+    if cassette is not None:
+        cassette.record("fetch", url, _page_entry(page))
+    return page
+
+
+def _download_page(
+    url: str,
+    session: Optional[requests.Session],
+    timeout: Tuple[float, float],
+    max_bytes: int,
+    text_budget: int,
+    cancel: Optional[threading.Event],
+) -> FetchResult:
+    session = session or get_session()
+    with span("fetch", "http", url=url) as current:
+        with session.get(url, stream=True, timeout=timeout) as response:
+            current.set(status=response.status_code)
+            response.raise_for_status()
+            content_type = _content_type(response.headers)
+            _check_content_type(url, content_type)
+
+            reader = _StreamReader(response.headers, max_bytes, text_budget)
+            for chunk in response.iter_content(CHUNK_SIZE):
+                if cancel is not None and cancel.is_set():
+                    raise FetchCancelled(url, len(reader.body))
+                if reader.feed(chunk):
+                    break
+
+            current.set(bytes=len(reader.body))
+            logger.debug(f"Read {len(reader.body)} bytes from {url}")
+            return reader.result(url, response.status_code, content_type)
+
+
+async def afetch_page(
+    url: str,
+    client: httpx.AsyncClient,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    text_budget: int = DEFAULT_TEXT_BUDGET,
+    timeout: Optional[httpx.Timeout] = None,
+) -> FetchResult:
+    """
+    Async variant of ``fetch_page``; ``timeout`` overrides the client's for
+    this request.
+    """
+    cassette = get_cassette()
+    if cassette is not None and cassette.replaying:
+        return _replay_page(cassette, url, max_bytes, text_budget)
+    try:
+        page = await _adownload_page(url, client, max_bytes, text_budget, timeout)
+    except (httpx.HTTPError, requests.RequestException) as e:
+        if cassette is not None:
+            cassette.record("fetch", url, _error_entry(e))
+        raise
+    if cassette is not None:
+        cassette.record("fetch", url, _page_entry(page))
+    return page
+
+
+async def _adownload_page(
+    url: str,
+    client: httpx.AsyncClient,
+    max_bytes: int,
+    text_budget: int,
+    timeout: Optional[httpx.Timeout] = None,
+) -> FetchResult:
+    options = {"timeout": timeout} if timeout is not None else {}
+    with span("fetch", "http", url=url) as current:
+        async with client.stream("GET", url, **options) as response:
+            current.set(status=response.status_code)
+            response.raise_for_status()
+            content_type = _content_type(response.headers)
+            _check_content_type(url, content_type)
+
+            reader = _StreamReader(response.headers, max_bytes, text_budget)
+            async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                if reader.feed(chunk):
+                    break
+
+            current.set(bytes=len(reader.body))
+            logger.debug(f"Read {len(reader.body)} bytes from {url}")
+            return reader.result(url, response.status_code, content_type)
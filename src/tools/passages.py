@@ -0,0 +1,151 @@
+import math
+import re
+from typing import TYPE_CHECKING, Iterable, List
+
+if TYPE_CHECKING:
+    import numpy as np
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the "
+    "this to was were what when where which who why will with how does do".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [
+        token
+        for token in TOKEN_PATTERN.findall(text.lower())
+        if token not in STOPWORDS
+    ]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough LLM token count: about four characters per token."""
+    return math.ceil(len(text) / 4)
+
+
+def split_passages(text: str, passage_chars: int = 600) -> List[str]:
+    """Split text into passages of roughly ``passage_chars``, on sentence boundaries."""
+    passages, current, length = [], [], 0
+    for sentence in SENTENCE_BOUNDARY.split(text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        # Very long "sentences" (tables, lists without punctuation) are cut hard.
+        while len(sentence) > passage_chars:
+            if current:
+                passages.append(" ".join(current))
+                current, length = [], 0
+            passages.append(sentence[:passage_chars])
+            sentence = sentence[passage_chars:]
+        if length + len(sentence) > passage_chars and current:
+            passages.append(" ".join(current))
+            current, length = [], 0
+        current.append(sentence)
+        length += len(sentence) + 1
+    if current:
+        passages.append(" ".join(current))
+    return passages
+
+
+class BM25:
+    """
+    Okapi BM25 over a small set of passages, vectorized with NumPy.
+
+    The term-frequency matrix is dense (passages x vocabulary), which is cheap
+    at the size of a single scraped page. NumPy is imported on first use, since
+    most pages fit the token budget and never need ranking.
+    """
+
+    def __init__(self, passages: Iterable[List[str]], k1: float = 1.5, b: float = 0.75):
+        import numpy as np
+
+        passages = list(passages)
+        self.k1 = k1
+        self.b = b
+        self.vocabulary = {}
+        for tokens in passages:
+            for token in tokens:
+                self.vocabulary.setdefault(token, len(self.vocabulary))
+
+        self.term_frequencies = np.zeros(
+            (len(passages), len(self.vocabulary)), dtype=np.float32
+        )
+        for row, tokens in enumerate(passages):
+            if tokens:
+                columns = np.fromiter(
+                    (self.vocabulary[t] for t in tokens), dtype=np.int64
+                )
+                np.add.at(self.term_frequencies[row], columns, 1)
+
+        lengths = self.term_frequencies.sum(axis=1)
+        average_length = lengths.mean() if len(passages) else 0.0
+        self.length_norm = k1 * (
+            1 - b + b * lengths / (average_length if average_length else 1.0)
+        )
+        document_frequency = (self.term_frequencies > 0).sum(axis=0)
+        self.idf = np.log(
+            1 + (len(passages) - document_frequency + 0.5) / (document_frequency + 0.5)
+        )
+
+    def scores(self, query_tokens: List[str]) -> "np.ndarray":
+        import numpy as np
+
+        columns = sorted(
+            {self.vocabulary[t] for t in query_tokens if t in self.vocabulary}
+        )
+        if not columns:
+            return np.zeros(self.term_frequencies.shape[0], dtype=np.float32)
+
+        tf = self.term_frequencies[:, columns]
+        saturated = tf * (self.k1 + 1) / (tf + self.length_norm[:, None])
+        return saturated @ self.idf[columns]
+
+
+def select_passages(
+    text: str,
+    queries: List[str],
+    token_budget: int = 1000,
+    passage_chars: int = 600,
+) -> str:
+    """
+    Keep the passages most relevant to the queries, up to ``token_budget`` tokens.
+
+    Selected passages are returned in their original order so the text still
+    reads naturally; gaps are marked with an ellipsis. Text that already fits
+    the budget is returned unchanged.
+    """
+    if estimate_tokens(text) <= token_budget:
+        return text
+
+    passages = split_passages(text, passage_chars)
+    query_tokens = tokenize(" ".join(q for q in queries if q))
+    if not passages or not query_tokens:
+        return text[: token_budget * 4]
+
+    scores = BM25(tokenize(p) for p in passages).scores(query_tokens)
+    # Stable sort keeps earlier passages first among equal scores.
+    ranked = (-scores).argsort(kind="stable")
+
+    selected, used = [], 0
+    for index in ranked:
+        # Passages sharing no terms with the queries are not worth the tokens.
+        if scores[index] <= 0 and selected:
+            break
+        cost = estimate_tokens(passages[index])
+        if used + cost > token_budget:
+            continue
+        selected.append(int(index))
+        used += cost
+
+    selected.sort()
+    pieces, previous = [], -1
+    for index in selected:
+        if previous >= 0 and index != previous + 1:
+            pieces.append("...")
+        pieces.append(passages[index])
+        previous = index
+    return " ".join(pieces)
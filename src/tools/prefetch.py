@@ -0,0 +1,202 @@
+import contextvars
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.custom_logging import setup_logger
+from src.tools.fetcher import (
+    DEFAULT_MAX_BYTES,
+    DEFAULT_TEXT_BUDGET,
+    DEFAULT_TIMEOUT,
+    fetch_page,
+)
+
+logger = setup_logger(__name__)
+
+
+class _Entry:
+    __slots__ = ["future", "cancel", "refs", "created", "used", "released"]
+
+    def __init__(self, future: Future, cancel: threading.Event):
+        self.future = future
+        self.cancel = cancel
+        self.refs = 0
+        self.created = time.monotonic()
+        self.used = False
+        self.released = False
+
+
+class PagePrefetcher:
+    """
+    Fetches the top search results speculatively while the selector decides.
+
+    ``SerperNode`` calls ``prefetch`` with the organic links as soon as results
+    arrive and keeps the returned ticket with the search results;
+    ``ScraperNode`` calls ``take`` for each URL it was asked to scrape and then
+    ``release`` with that ticket. Released pages nobody took are cancelled (a
+    download in progress stops at its next chunk) and their bytes counted as
+    wasted.
+
+    Entries are reference counted per URL so concurrent runs that found the
+    same link share one download. A ticket holds one reference on exactly the
+    pages its ``prefetch`` call took and releases them only once. Entries and
+    tickets never released, e.g. because the run failed before scraping,
+    expire after ``ttl`` seconds.
+    """
+
+    def __init__(
+        self,
+        top_n: int = 3,
+        workers: int = 4,
+        max_pending: int = 32,
+        ttl: float = 120.0,
+        timeout: Tuple[float, float] = DEFAULT_TIMEOUT,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        text_budget: int = DEFAULT_TEXT_BUDGET,
+    ):
+        self.top_n = top_n
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.text_budget = text_budget
+        self.executor = ThreadPoolExecutor(
+            max_workers=max(1, workers), thread_name_prefix="prefetch"
+        )
+        self._entries: Dict[str, _Entry] = {}
+        # ticket -> (created, the entries it holds a reference on)
+        self._tickets: Dict[str, Tuple[float, List[Tuple[str, _Entry]]]] = {}
+        # Reentrant: cancelling a queued future runs its done callback inline.
+        self._lock = threading.RLock()
+        self._stats = {
+            "prefetched": 0,
+            "skipped": 0,
+            "hits": 0,
+            "misses": 0,
+            "cancelled": 0,
+            "wasted_bytes": 0,
+        }
+
+    def _fetch(self, url: str, cancel: threading.Event):
+        return fetch_page(
+            url,
+            timeout=self.timeout,
+            max_bytes=self.max_bytes,
+            text_budget=self.text_budget,
+            cancel=cancel,
+        )
+
+    def prefetch(self, urls: Iterable[str]) -> Optional[str]:
+        """
+        Start fetching the first ``top_n`` URLs that are not already pending.
+
+        Returns the ticket to ``release`` them with, or None when no page was
+        taken on.
+        """
+        urls = list(dict.fromkeys(url for url in urls if url))[: self.top_n]
+        held: List[Tuple[str, _Entry]] = []
+        with self._lock:
+            self._expire_locked()
+            for url in urls:
+                entry = self._entries.get(url)
+                if entry is None:
+                    if len(self._entries) >= self.max_pending:
+                        self._stats["skipped"] += 1
+                        continue
+                    cancel = threading.Event()
+                    future = self.executor.submit(
+                        contextvars.copy_context().run, self._fetch, url, cancel
+                    )
+                    entry = _Entry(future, cancel)
+                    entry.future.add_done_callback(
+                        lambda _, entry=entry: self._settle(entry)
+                    )
+                    self._entries[url] = entry
+                    self._stats["prefetched"] += 1
+                entry.refs += 1
+                held.append((url, entry))
+            if not held:
+                return None
+            ticket = uuid.uuid4().hex
+            self._tickets[ticket] = (time.monotonic(), held)
+            return ticket
+
+    def take(self, url: str) -> Optional[Future]:
+        """
+        Return the future of a prefetched page, or None when ``url`` was not
+        prefetched. The future raises whatever the fetch raised.
+        """
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None or entry.cancel.is_set():
+                self._stats["misses"] += 1
+                return None
+            entry.used = True
+            self._stats["hits"] += 1
+            return entry.future
+
+    def release(self, ticket: Optional[str]) -> None:
+        """
+        Drop the references ``ticket`` holds; unused pages are cancelled.
+        Releasing a ticket again, or an unknown one, does nothing.
+        """
+        with self._lock:
+            _, held = self._tickets.pop(ticket, (None, []))
+            for url, entry in held:
+                self._unref_locked(url, entry)
+
+    def _unref_locked(self, url: str, entry: _Entry) -> None:
+        # The entry may have expired and the URL been prefetched again since
+        if self._entries.get(url) is not entry:
+            return
+        entry.refs -= 1
+        if entry.refs <= 0:
+            self._drop_locked(url, entry)
+
+    def _drop_locked(self, url: str, entry: _Entry) -> None:
+        del self._entries[url]
+        entry.released = True
+        if entry.used:
+            return
+        if not entry.future.done():
+            entry.cancel.set()
+            entry.future.cancel()
+            self._stats["cancelled"] += 1
+        else:
+            self._stats["wasted_bytes"] += self._bytes_read(entry.future)
+
+    def _settle(self, entry: _Entry) -> None:
+        """Count bytes of a download that finished after nobody wanted it."""
+        with self._lock:
+            if entry.released and not entry.used and entry.cancel.is_set():
+                self._stats["wasted_bytes"] += self._bytes_read(entry.future)
+
+    @staticmethod
+    def _bytes_read(future: Future) -> int:
+        if future.cancelled():
+            return 0
+        error = future.exception()
+        if error is not None:
+            return getattr(error, "bytes_read", 0)
+        return future.result().bytes_read
+
+    def _expire_locked(self) -> None:
+        deadline = time.monotonic() - self.ttl
+        for ticket, (created, _) in list(self._tickets.items()):
+            if created < deadline:
+                del self._tickets[ticket]
+        for url, entry in list(self._entries.items()):
+            if entry.created < deadline:
+                self._drop_locked(url, entry)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "pending": len(self._entries),
+                "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+            }
+
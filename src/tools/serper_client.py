@@ -0,0 +1,298 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.custom_logging import setup_logger
+from src.utils.cache import TieredCache
+from src.utils.cassette import get_cassette
+from src.utils.limits import acall_with_retry, call_with_retry
+from src.utils.tracing import span
+
+logger = setup_logger(__name__)
+
+SERPER_BASE_URL = "https://google.serper.dev"
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase and collapse whitespace so trivially different queries share a key."""
+    return " ".join(str(query).lower().split())
+
+
+class SerperClient:
+    """
+    Pooled, caching client for the Serper search API.
+
+    Results are cached per normalized query. Entries younger than
+    ``cache_ttl`` are served as-is; entries up to ``stale_ttl`` seconds older
+    are served immediately while a background refresh updates the cache.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = SERPER_BASE_URL,
+        timeout: tuple = (3.05, 10),
+        pool_size: int = 10,
+        cache_ttl: float = 3600,
+        stale_ttl: float = 86400,
+        cache_max_entries: int = 1024,
+        cache_path: Optional[str] = None,
+        cache_max_disk_entries: int = 10000,
+    ):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl
+        self.cache = TieredCache(
+            max_entries=cache_max_entries,
+            ttl=cache_ttl + stale_ttl,
+            path=cache_path,
+            max_disk_entries=cache_max_disk_entries,
+        )
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(
+            {"Content-Type": "application/json", "X-API-KEY": api_key}
+        )
+
+        # Created on first async use; bound to the event loop that uses it.
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._pool_size = pool_size
+
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._latencies = deque(maxlen=1000)
+        self._metrics = {
+            "requests": 0,
+            "network_calls": 0,
+            "cache_hits": 0,
+            "stale_hits": 0,
+            "errors": 0,
+        }
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._metrics[name] += 1
+
+    def _record_call(self, query: str, started: float) -> None:
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._metrics["network_calls"] += 1
+            self._latencies.append(elapsed)
+        logger.debug(f"Serper request for '{query}' took {elapsed * 1000:.0f}ms")
+
+    def _store(self, query: str, results: Dict[str, Any]) -> None:
+        self.cache.set(
+            normalize_query(query), {"results": results, "fetched_at": time.time()}
+        )
+
+    def _post(self, query: str) -> Dict[str, Any]:
+        cassette = get_cassette()
+        if cassette is not None and cassette.replaying:
+            return cassette.replay("serper", normalize_query(query))
+        with span("serper.search", "http", query=query) as current:
+            response = self.session.post(
+                f"{self.base_url}/search", json={"q": query}, timeout=self.timeout
+            )
+            current.set(status=response.status_code, bytes=len(response.content))
+            response.raise_for_status()
+            results = response.json()
+        if cassette is not None:
+            cassette.record("serper", normalize_query(query), results)
+        return results
+
+    async def _apost(self, query: str) -> Dict[str, Any]:
+        cassette = get_cassette()
+        if cassette is not None and cassette.replaying:
+            return cassette.replay("serper", normalize_query(query))
+        with span("serper.search", "http", query=query) as current:
+            response = await self._get_async_client().post(
+                f"{self.base_url}/search", json={"q": query}
+            )
+            current.set(status=response.status_code, bytes=len(response.content))
+            response.raise_for_status()
+            results = response.json()
+        if cassette is not None:
+            cassette.record("serper", normalize_query(query), results)
+        return results
+
+    def _fetch(self, query: str) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            # Rate limited, capped and retried on 429/5xx/connection errors
+            results = call_with_retry("serper", lambda: self._post(query))
+        except Exception:
+            self._count("errors")
+            raise
+        finally:
+            self._record_call(query, started)
+
+        self._store(query, results)
+        return results
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        client = self._async_client
+        if client is None:
+            with self._lock:
+                if self._async_client is None:
+                    connect, read = self.timeout
+                    self._async_client = httpx.AsyncClient(
+                        headers=dict(self.session.headers),
+                        timeout=httpx.Timeout(read, connect=connect),
+                        limits=httpx.Limits(max_connections=self._pool_size),
+                    )
+                client = self._async_client
+        return client
+
+    async def _afetch(self, query: str) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            results = await acall_with_retry("serper", lambda: self._apost(query))
+        except Exception:
+            self._count("errors")
+            raise
+        finally:
+            self._record_call(query, started)
+
+        self._store(query, results)
+        return results
+
+    def _refresh_in_background(self, query: str) -> None:
+        key = normalize_query(query)
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def _run():
+            try:
+                self._fetch(query)
+            except Exception as e:
+                logger.warning(f"Background Serper refresh failed for '{query}': {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=_run, daemon=True).start()
+
+    def _cached(self, query: str) -> Optional[Dict[str, Any]]:
+        self._count("requests")
+        entry = self.cache.get(normalize_query(query))
+        if entry is None:
+            return None
+
+        if time.time() - entry["fetched_at"] <= self.cache_ttl:
+            self._count("cache_hits")
+        else:
+            self._count("stale_hits")
+            self._refresh_in_background(query)
+        return entry["results"]
+
+    def search(self, query: str) -> Dict[str, Any]:
+        """Return the raw Serper response for a query, using the cache when possible."""
+        results = self._cached(query)
+        if results is not None:
+            return results
+        return self._fetch(query)
+
+    async def asearch(self, query: str) -> Dict[str, Any]:
+        """Async variant of ``search``."""
+        results = self._cached(query)
+        if results is not None:
+            return results
+        return await self._afetch(query)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            metrics = dict(self._metrics)
+
+        def _percentile(p):
+            if not latencies:
+                return None
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+
+        return {
+            **metrics,
+            "latency_p50": _percentile(0.5),
+            "latency_p95": _percentile(0.95),
+            "latency_max": latencies[-1] if latencies else None,
+            "cache": self.cache.stats(),
+        }
+
+    def _take_async_client(self) -> Optional[httpx.AsyncClient]:
+        with self._lock:
+            client, self._async_client = self._async_client, None
+        return client
+
+    def close(self) -> None:
+        """
+        Close the session, the cache and the async client. From inside an
+        event loop the async client is closed in a task on that loop; prefer
+        ``aclose`` there.
+        """
+        self.session.close()
+        self.cache.close()
+        client = self._take_async_client()
+        if client is None:
+            return
+        try:
+            asyncio.get_running_loop().create_task(client.aclose())
+        except RuntimeError:
+            # No loop in this thread; close on a fresh one. Connections opened
+            # on a loop that has since closed can only be dropped.
+            try:
+                asyncio.run(client.aclose())
+            except Exception as e:
+                logger.debug(f"Closing the async Serper client failed: {e}")
+
+    async def aclose(self) -> None:
+        """Async variant of ``close``, awaiting the async client's shutdown."""
+        self.session.close()
+        self.cache.close()
+        client = self._take_async_client()
+        if client is not None:
+            await client.aclose()
+
+
+_clients: Dict[str, SerperClient] = {}
+_client_options: Dict[str, Any] = {}
+_clients_lock = threading.Lock()
+
+
+def configure_serper_client(**options) -> None:
+    """
+    Set the options used for shared Serper clients.
+
+    Existing clients, with their caches and connections, are kept when the
+    options did not change; otherwise they are closed and replaced lazily.
+    """
+    global _client_options
+    with _clients_lock:
+        if options == _client_options:
+            return
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+        _client_options = options
+
+
+def get_serper_client(api_key: str) -> SerperClient:
+    """Return the process-wide Serper client for an API key."""
+    client = _clients.get(api_key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(api_key)
+            if client is None:
+                client = SerperClient(api_key, **_client_options)
+                _clients[api_key] = client
+    return client
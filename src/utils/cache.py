@@ -0,0 +1,195 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+# Writes between recounts of the disk rows, which other processes may change
+RECOUNT_EVERY = 512
+
+
+class TieredCache:
+    """
+    Two-tier key/value cache: an in-memory LRU in front of an optional SQLite file.
+
+    Values must be JSON serializable. Entries older than ``ttl`` seconds are
+    treated as missing, and each tier evicts its least recently used entries
+    once it grows past its size limit.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: Optional[float] = 3600,
+        path: Optional[str] = None,
+        max_disk_entries: int = 10000,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self.max_disk_entries = max_disk_entries
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "expired": 0,
+            "evictions": 0,
+        }
+        self._conn = self._open_disk(path) if path else None
+        # Disk rows, tracked so writes need not count the table each time
+        self._disk_rows = self._count_rows()
+        self._writes = 0
+
+    @staticmethod
+    def _open_disk(path: str) -> sqlite3.Connection:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "stored_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS cache_accessed_at ON cache (accessed_at)"
+        )
+        return conn
+
+    def _count_rows(self) -> int:
+        if self._conn is None:
+            return 0
+        return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def _is_fresh(self, stored_at: float, now: float) -> bool:
+        return self.ttl is None or now - stored_at <= self.ttl
+
+    def _remember(self, key: str, value: Any, stored_at: float) -> None:
+        self._memory[key] = (value, stored_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def _lookup(self, key: str, now: float):
+        """Return ``(value, stored_at, tier)`` for a key regardless of age."""
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+            return entry[0], entry[1], "memory"
+
+        if self._conn is None:
+            return None
+
+        row = self._conn.execute(
+            "SELECT value, stored_at FROM cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        self._conn.execute(
+            "UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key)
+        )
+        value = json.loads(row[0])
+        self._remember(key, value, row[1])
+        return value, row[1], "disk"
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None when missing or expired."""
+        now = time.time()
+        with self._lock:
+            found = self._lookup(key, now)
+            if found is None:
+                self._stats["misses"] += 1
+                return None
+
+            value, stored_at, tier = found
+            if not self._is_fresh(stored_at, now):
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                return None
+
+            self._stats["hits"] += 1
+            self._stats[f"{tier}_hits"] += 1
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, now)
+            if self._conn is None:
+                return
+
+            data = json.dumps(value)
+            updated = self._conn.execute(
+                "UPDATE cache SET value = ?, stored_at = ?, accessed_at = ? "
+                "WHERE key = ?",
+                (data, now, now, key),
+            ).rowcount
+            if not updated:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, stored_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, data, now, now),
+                )
+                self._disk_rows += 1
+            self._writes += 1
+            if self._writes % RECOUNT_EVERY == 0:
+                self._disk_rows = self._count_rows()
+            overflow = self._disk_rows - self.max_disk_entries
+            if overflow > 0:
+                evicted = self._conn.execute(
+                    "DELETE FROM cache WHERE key IN ("
+                    "SELECT key FROM cache ORDER BY accessed_at LIMIT ?)",
+                    (overflow,),
+                ).rowcount
+                self._disk_rows -= evicted
+                self._stats["evictions"] += evicted
+
+    def purge_expired(self) -> int:
+        """Drop expired entries from both tiers and return how many were removed."""
+        if self.ttl is None:
+            return 0
+
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            stale = [k for k, (_, at) in self._memory.items() if at < cutoff]
+            for key in stale:
+                del self._memory[key]
+            removed = len(stale)
+            if self._conn is not None:
+                cursor = self._conn.execute(
+                    "DELETE FROM cache WHERE stored_at < ?", (cutoff,)
+                )
+                self._disk_rows -= cursor.rowcount
+                removed = max(removed, cursor.rowcount)
+            return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM cache")
+                self._disk_rows = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "memory_entries": len(self._memory),
+                "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,278 @@
+import atexit
+import gzip
+import json
+import math
+import os
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+from src.custom_logging import setup_logger
+from src.models.llm_cache import make_cache_key
+
+logger = setup_logger(__name__)
+
+CASSETTE_VERSION = 1
+MODES = ("record", "replay")
+
+_cassette: Optional["Cassette"] = None
+_lock = threading.Lock()
+
+
+class CassetteMiss(LookupError):
+    """A replayed run made a request the cassette has no response for."""
+
+
+class Cassette:
+    """
+    Every LLM response, Serper result and fetched page of the recorded runs,
+    stored gzip-compressed JSON and keyed by request.
+
+    LLM requests are keyed like the response cache, with prompt timestamps
+    removed; searches by normalized query; pages by URL. A key requested
+    more often than it was recorded cycles through its responses, so a
+    cassette of one run can be replayed any number of times.
+    """
+
+    def __init__(self, path: str, mode: str = "replay"):
+        if mode not in MODES:
+            raise ValueError(f"cassette mode must be one of {MODES}, not {mode!r}")
+        self.path = path
+        self.mode = mode
+        self.questions: List[str] = []
+        # kind -> key -> responses in recording order
+        self.interactions: Dict[str, Dict[str, List[Any]]] = {}
+        self._cursors: Counter = Counter()
+        self._counts: Counter = Counter()
+        self._lock = threading.Lock()
+        if mode == "replay":
+            self._load()
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def _load(self) -> None:
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != CASSETTE_VERSION:
+            raise ValueError(
+                f"{self.path} is a version {data.get('version')} cassette, "
+                f"expected {CASSETTE_VERSION}"
+            )
+        self.questions = data.get("questions", [])
+        self.interactions = data.get("interactions", {})
+
+    def note_question(self, question: str) -> None:
+        if self.recording and question:
+            with self._lock:
+                self.questions.append(question)
+
+    def record(self, kind: str, key: str, response: Any) -> None:
+        if not self.recording:
+            return
+        with self._lock:
+            self.interactions.setdefault(kind, {}).setdefault(key, []).append(response)
+            self._counts[f"{kind}:recorded"] += 1
+
+    def replay(self, kind: str, key: str) -> Any:
+        """Return the next recorded response, or raise ``CassetteMiss``."""
+        with self._lock:
+            responses = self.interactions.get(kind, {}).get(key)
+            if not responses:
+                self._counts[f"{kind}:misses"] += 1
+                raise CassetteMiss(f"no recorded {kind} response for {key[:80]}")
+            cursor = self._cursors[(kind, key)]
+            self._cursors[(kind, key)] += 1
+            self._counts[f"{kind}:replayed"] += 1
+            return responses[cursor % len(responses)]
+
+    def save(self) -> None:
+        """Write the recording; replaces the file in one step."""
+        if not self.recording:
+            return
+        with self._lock:
+            data = {
+                "version": CASSETTE_VERSION,
+                "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "questions": list(self.questions),
+                "interactions": self.interactions,
+            }
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            partial = f"{self.path}.partial"
+            with gzip.open(partial, "wt", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(partial, self.path)
+        logger.info(f"Cassette with {self.size()} responses written to {self.path}")
+
+    def size(self, kind: Optional[str] = None) -> int:
+        kinds = [kind] if kind else list(self.interactions)
+        return sum(
+            len(responses)
+            for name in kinds
+            for responses in self.interactions.get(name, {}).values()
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self._counts)
+            unused = {
+                kind: sum(
+                    1
+                    for key in keys
+                    if self.replaying and not self._cursors[(kind, key)]
+                )
+                for kind, keys in self.interactions.items()
+            }
+        return {
+            "mode": self.mode,
+            "recorded": {kind: self.size(kind) for kind in self.interactions},
+            **counts,
+            "unused_keys": unused,
+        }
+
+
+def configure_cassette(path: Optional[str] = None, mode: Optional[str] = None):
+    """
+    Record to or replay from the cassette at ``path``; no path turns it off.
+
+    A recording is written when ``save_cassette`` is called or the process
+    exits. Keep the LLM and Serper caches off while recording, since answers
+    served from them never reach the cassette.
+    """
+    global _cassette
+    with _lock:
+        if _cassette is not None and _cassette.recording:
+            _cassette.save()
+        _cassette = Cassette(path, mode or "replay") if path else None
+        if _cassette is not None:
+            logger.info(f"Cassette {path} in {_cassette.mode} mode")
+    return _cassette
+
+
+def get_cassette() -> Optional[Cassette]:
+    return _cassette
+
+
+def save_cassette() -> None:
+    if _cassette is not None:
+        _cassette.save()
+
+
+atexit.register(save_cassette)
+
+
+def _llm_entry(ai_msg, chunks: int = 0) -> Dict[str, Any]:
+    return {
+        "content": ai_msg.content,
+        "model_name": (ai_msg.response_metadata or {}).get("model_name"),
+        "usage_metadata": getattr(ai_msg, "usage_metadata", None),
+        "chunks": chunks,
+    }
+
+
+def _replayed_message(entry: Dict[str, Any]) -> AIMessage:
+    return AIMessage(
+        content=entry["content"],
+        response_metadata={"model_name": entry.get("model_name"), "replayed": True},
+        usage_metadata=entry.get("usage_metadata"),
+    )
+
+
+def _replayed_chunks(entry: Dict[str, Any]):
+    """The recorded answer in as many chunks as were streamed, usage on the last."""
+    content = entry["content"]
+    size = max(1, math.ceil(len(content) / max(1, entry.get("chunks") or 1)))
+    pieces = [content[i : i + size] for i in range(0, len(content), size)] or [""]
+    for index, piece in enumerate(pieces):
+        if index < len(pieces) - 1:
+            yield AIMessageChunk(content=piece)
+        else:
+            yield AIMessageChunk(
+                content=piece,
+                response_metadata={
+                    "model_name": entry.get("model_name"),
+                    "replayed": True,
+                },
+                usage_metadata=entry.get("usage_metadata"),
+            )
+
+
+class CassetteChatModel:
+    """
+    Wraps a chat model so its answers are recorded to, or replayed from, the
+    cassette. Replayed answers carry the recorded token usage, so metering,
+    budgets and tracing behave as in the recorded run.
+    """
+
+    def __init__(self, llm, cassette: Cassette):
+        self.llm = llm
+        self.cassette = cassette
+
+    def _key(self, messages) -> str:
+        return make_cache_key(self.llm, messages, bucket=None)
+
+    def invoke(self, messages, *args, **kwargs) -> Any:
+        key = self._key(messages)
+        if self.cassette.replaying:
+            return _replayed_message(self.cassette.replay("llm", key))
+        ai_msg = self.llm.invoke(messages, *args, **kwargs)
+        self.cassette.record("llm", key, _llm_entry(ai_msg))
+        return ai_msg
+
+    async def ainvoke(self, messages, *args, **kwargs) -> Any:
+        key = self._key(messages)
+        if self.cassette.replaying:
+            return _replayed_message(self.cassette.replay("llm", key))
+        ai_msg = await self.llm.ainvoke(messages, *args, **kwargs)
+        self.cassette.record("llm", key, _llm_entry(ai_msg))
+        return ai_msg
+
+    def stream(self, messages, *args, **kwargs):
+        key = self._key(messages)
+        if self.cassette.replaying:
+            yield from _replayed_chunks(self.cassette.replay("llm", key))
+            return
+
+        ai_msg, chunks = None, 0
+        for chunk in self.llm.stream(messages, *args, **kwargs):
+            ai_msg = chunk if ai_msg is None else ai_msg + chunk
+            chunks += 1
+            yield chunk
+        if ai_msg is not None:
+            self.cassette.record("llm", key, _llm_entry(ai_msg, chunks))
+
+    async def astream(self, messages, *args, **kwargs):
+        key = self._key(messages)
+        if self.cassette.replaying:
+            for chunk in _replayed_chunks(self.cassette.replay("llm", key)):
+                yield chunk
+            return
+
+        ai_msg, chunks = None, 0
+        async for chunk in self.llm.astream(messages, *args, **kwargs):
+            ai_msg = chunk if ai_msg is None else ai_msg + chunk
+            chunks += 1
+            yield chunk
+        if ai_msg is not None:
+            self.cassette.record("llm", key, _llm_entry(ai_msg, chunks))
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
+
+
+def with_cassette(llm):
+    """Return the model wrapped for recording or replay when a cassette is set."""
+    cassette = _cassette
+    if cassette is None:
+        return llm
+    return CassetteChatModel(llm, cassette)
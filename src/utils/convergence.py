@@ -0,0 +1,191 @@
+import hashlib
+import json
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.custom_logging import setup_logger
+
+logger = setup_logger(__name__)
+
+# The loop tried next when one made no progress
+ESCALATION = {
+    "reporter": "selector",
+    "selector": "planner",
+    "planner": "final_report",
+}
+# Node runs one more loop through each branch costs, router included
+LOOP_STEPS = {"reporter": 3, "selector": 5, "planner": 7}
+# What re-running a branch is expected to change
+BRANCH_OUTPUT = {"reporter": "report", "selector": "urls", "planner": "search_term"}
+
+
+def _json_content(message) -> Any:
+    content = getattr(message, "content", message)
+    if not isinstance(content, str):
+        return content
+    try:
+        return json.loads(content)
+    except json.JSONDecodeError:
+        return content
+
+
+def _latest(state: Dict[str, Any], key: str):
+    messages = state.get(key) or []
+    return _json_content(messages[-1]) if messages else None
+
+
+def selected_urls(selection: Any) -> List[str]:
+    """URLs picked in one selector response, best first."""
+    if not isinstance(selection, dict):
+        return []
+    urls = selection.get("selected_page_urls") or []
+    if isinstance(urls, str):
+        urls = [urls]
+    if not urls and selection.get("selected_page_url"):
+        urls = [selection["selected_page_url"]]
+    return [url for url in dict.fromkeys(urls) if isinstance(url, str)]
+
+
+def _report_hash(report: Any) -> str:
+    if isinstance(report, dict):
+        report = report.get("content", report)
+    if not isinstance(report, str):
+        report = json.dumps(report, sort_keys=True, default=str)
+    # Whitespace and case changes do not count as a new report
+    normalized = re.sub(r"\s+", " ", report).strip().lower()
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+def fingerprint(state: Dict[str, Any]) -> Dict[str, Any]:
+    """The search term, selected URLs and report hash of the latest iteration."""
+    plan = _latest(state, "planner_response")
+    search_term = plan.get("search_term") if isinstance(plan, dict) else None
+    return {
+        "search_term": (search_term or "").strip().lower(),
+        "urls": selected_urls(_latest(state, "selector_response")),
+        "report": _report_hash(_latest(state, "reporter_response")),
+    }
+
+
+def _same(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+    return all(a.get(key) == b.get(key) for key in ("search_term", "urls", "report"))
+
+
+class ConvergenceStats:
+    """Loops cut short and rerouted across all runs of the process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = Counter()
+
+    def record(self, decision: Dict[str, Any]) -> None:
+        with self._lock:
+            self._counts["checks"] += 1
+            if decision.get("forced"):
+                self._counts[f"forced:{decision['forced']}"] += 1
+                self._counts[f"reason:{decision['reason']}"] += 1
+            self._counts["saved_iterations"] += decision.get("saved_iterations", 0)
+            self._counts["saved_steps"] += decision.get("saved_steps", 0)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._counts)
+
+
+# Shared by every router in the process.
+convergence_stats = ConvergenceStats()
+
+
+class ConvergenceMonitor:
+    """
+    Stops the review loops from repeating work that made no progress.
+
+    Each iteration is fingerprinted when it reaches the router, together with
+    the loop it came through: the review loop (back to the reporter), the
+    selection loop (back to the selector) or the planning loop (back to the
+    planner); the first iteration counts as a planning loop. A loop stalled
+    when the iteration equals an earlier one from the same loop or the one
+    that entered it, or when the branch it re-ran produced the same output
+    (the reporter the same report, the selector the same pages, the planner
+    the same search term). The stalled loop, not the router's proposal,
+    decides the escalation: the run goes exactly one loop up (reporter,
+    selector, planner), whether the router wanted to re-run the same loop or
+    to skip ahead to a bigger one. After
+    ``max_stalls`` stalls in a run, or with no loop left, it goes to
+    ``final_report``. Only the loop the router asked for is counted as saved
+    then, so ``saved_iterations`` is a lower bound.
+    """
+
+    def __init__(self, max_stalls: int = 2):
+        self.max_stalls = max(1, max_stalls)
+
+    @staticmethod
+    def _stall_reason(
+        current: Dict[str, Any], loop: str, history: List[Dict[str, Any]]
+    ) -> Optional[str]:
+        if not history:
+            return None
+        entered = history[-1]
+        same_loop = [previous for previous in history if previous.get("loop") == loop]
+        if any(_same(current, previous) for previous in same_loop + [entered]):
+            return "repeat"
+        output = BRANCH_OUTPUT[loop]
+        if current[output] and current[output] == entered.get(output):
+            return f"same_{output}"
+        return None
+
+    def check(
+        self, state: Dict[str, Any], proposed: str
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Return the branch to take instead of ``proposed`` and the update for
+        the ``convergence`` channel.
+        """
+        progress = state.get("convergence") or {}
+        history = progress.get("iterations", [])
+        current = fingerprint(state)
+        # The loop this iteration came through is where the last one was sent
+        loop = history[-1]["route"] if history else "planner"
+        decision: Dict[str, Any] = {}
+
+        reason = (
+            self._stall_reason(current, loop, history)
+            if proposed in ESCALATION and loop in ESCALATION
+            else None
+        )
+        stalls = progress.get("stalls", 0) + bool(reason)
+        route = proposed
+        if reason:
+            route = ESCALATION[loop]
+        if reason and stalls >= self.max_stalls:
+            route = "final_report"
+        if route != proposed:
+            decision = {
+                "forced": route,
+                "reason": f"{loop}:{reason}",
+                "saved_iterations": int(route == "final_report"),
+                "saved_steps": LOOP_STEPS[proposed] if route == "final_report" else 0,
+            }
+            logger.warning(
+                f"No progress in the {loop} loop ({reason}); "
+                f"routing to {route} instead of {proposed}"
+            )
+        convergence_stats.record(decision)
+
+        update = {
+            "iterations": [
+                {
+                    **current,
+                    "loop": loop,
+                    "stalled": reason,
+                    "route": route,
+                    "proposed": proposed,
+                }
+            ],
+            "stalls": int(bool(reason)),
+            "saved_iterations": decision.get("saved_iterations", 0),
+            "saved_steps": decision.get("saved_steps", 0),
+        }
+        return route, update
@@ -0,0 +1,606 @@
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from src.custom_logging import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class ConcurrencyLimit:
+    """
+    Process-wide cap on in-flight calls to one provider.
+
+    Works from threads (``with limit:``) and coroutines (``async with
+    limit:``) at the same time, so the sync and async graph share one budget.
+    Threads wait on a condition; coroutines wait on a future of their own
+    loop, which ``release`` resolves thread-safely. ``max_concurrency=None``
+    never blocks.
+    """
+
+    def __init__(self, name: str, max_concurrency: Optional[int] = None):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self._condition = threading.Condition()
+        # (loop, future) of coroutines waiting for a slot, oldest first
+        self._async_waiters: deque = deque()
+        self._in_flight = 0
+        self._stats = {"acquired": 0, "waited": 0, "peak": 0}
+
+    def _saturated(self) -> bool:
+        return (
+            self.max_concurrency is not None
+            and self._in_flight >= self.max_concurrency
+        )
+
+    def _try_acquire_locked(self) -> bool:
+        if self._saturated():
+            return False
+        self._in_flight += 1
+        self._stats["acquired"] += 1
+        self._stats["peak"] = max(self._stats["peak"], self._in_flight)
+        return True
+
+    def acquire(self) -> None:
+        with self._condition:
+            if self._try_acquire_locked():
+                return
+            self._stats["waited"] += 1
+            while not self._try_acquire_locked():
+                self._condition.wait()
+
+    async def aacquire(self) -> None:
+        loop = asyncio.get_running_loop()
+        with self._condition:
+            if self._try_acquire_locked():
+                return
+            self._stats["waited"] += 1
+        while True:
+            with self._condition:
+                if self._try_acquire_locked():
+                    return
+                waiter = (loop, loop.create_future())
+                self._async_waiters.append(waiter)
+            try:
+                await waiter[1]
+            except asyncio.CancelledError:
+                with self._condition:
+                    if waiter in self._async_waiters:
+                        self._async_waiters.remove(waiter)
+                    else:
+                        # Woken for a slot it will not take; pass it on.
+                        self._wake_async_locked()
+                raise
+
+    def _wake_async_locked(self) -> None:
+        """Wake the oldest waiting coroutine whose loop is still running."""
+        while self._async_waiters:
+            loop, future = self._async_waiters.popleft()
+            try:
+                loop.call_soon_threadsafe(_resolve, future)
+                return
+            except RuntimeError:
+                # Its loop was closed; the coroutine is gone.
+                continue
+
+    def release(self) -> None:
+        with self._condition:
+            self._in_flight -= 1
+            # Wake one waiter of each kind; whoever loses the race waits again.
+            self._condition.notify()
+            self._wake_async_locked()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+    async def __aenter__(self):
+        await self.aacquire()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.release()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            return {
+                **self._stats,
+                "in_flight": self._in_flight,
+                "max_concurrency": self.max_concurrency,
+            }
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+_limits: Dict[str, ConcurrencyLimit] = {}
+_lock = threading.Lock()
+
+
+def configure_concurrency_limits(**limits: Optional[int]) -> None:
+    """
+    Set the global in-flight cap per provider, e.g. ``openai=8, serper=4``.
+
+    None removes the cap. Calls already holding a slot finish normally.
+    """
+    with _lock:
+        for name, max_concurrency in limits.items():
+            _limits[name] = ConcurrencyLimit(name, max_concurrency)
+            if max_concurrency is not None:
+                logger.info(f"Limiting {name} to {max_concurrency} concurrent calls")
+
+
+def get_limit(name: str) -> ConcurrencyLimit:
+    """Return the provider's limit, creating an unbounded one on first use."""
+    limit = _limits.get(name)
+    if limit is None:
+        with _lock:
+            limit = _limits.setdefault(name, ConcurrencyLimit(name))
+    return limit
+
+
+def limit_stats() -> Dict[str, Dict[str, Any]]:
+    """Concurrency, rate limit and retry state per provider."""
+    stats = {name: limit.stats() for name, limit in list(_limits.items())}
+    for name, rate in list(_rate_limits.items()):
+        stats.setdefault(name, {})["rate"] = rate.stats()
+    return stats
+
+
+class TokenBucket:
+    """Refills ``per_minute`` units a minute, holding at most a minute's worth."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        self._refill(now)
+        # A request larger than the bucket only waits for a full bucket.
+        needed = min(amount, self.capacity)
+        return 0.0 if self.level >= needed else (needed - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        # May go negative when a call used more than was reserved.
+        self.level = min(self.capacity, self.level - amount)
+
+
+class RateLimit:
+    """
+    Requests-per-minute and tokens-per-minute budget for one provider.
+
+    Shared by every thread and coroutine calling the provider. Callers reserve
+    an estimated token count up front and ``settle`` it once the real usage
+    is known. A 429 pauses the whole provider through ``throttle`` so the
+    other callers back off too instead of piling onto the error.
+    """
+
+    def __init__(
+        self, name: str, rpm: Optional[float] = None, tpm: Optional[float] = None
+    ):
+        self.name = name
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests = TokenBucket(rpm) if rpm else None
+        self._tokens = TokenBucket(tpm) if tpm else None
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+        self._stats = {
+            "calls": 0,
+            "waited": 0,
+            "wait_seconds": 0.0,
+            "throttled": 0,
+            "retries": 0,
+            "gave_up": 0,
+        }
+
+    def _reserve(self, tokens: float) -> float:
+        """Reserve a call and return 0, or return how long to wait first."""
+        with self._lock:
+            now = time.monotonic()
+            wait = self._blocked_until - now
+            if self._requests is not None:
+                wait = max(wait, self._requests.wait_time(1, now))
+            if self._tokens is not None and tokens:
+                wait = max(wait, self._tokens.wait_time(tokens, now))
+            if wait > 0:
+                return wait
+            if self._requests is not None:
+                self._requests.take(1)
+            if self._tokens is not None:
+                self._tokens.take(tokens)
+            self._stats["calls"] += 1
+            return 0.0
+
+    def _record_wait(self, waited: float) -> None:
+        if waited:
+            with self._lock:
+                self._stats["waited"] += 1
+                self._stats["wait_seconds"] += waited
+
+    def acquire(self, tokens: float = 0) -> None:
+        waited = 0.0
+        while True:
+            wait = self._reserve(tokens)
+            if wait <= 0:
+                break
+            time.sleep(wait)
+            waited += wait
+        self._record_wait(waited)
+
+    async def aacquire(self, tokens: float = 0) -> None:
+        waited = 0.0
+        while True:
+            wait = self._reserve(tokens)
+            if wait <= 0:
+                break
+            await asyncio.sleep(wait)
+            waited += wait
+        self._record_wait(waited)
+
+    def settle(self, reserved: float, used: Optional[float]) -> None:
+        """Charge the difference between the reserved and the real token count."""
+        if self._tokens is None or used is None:
+            return
+        with self._lock:
+            self._tokens.take(used - reserved)
+
+    def throttle(self, seconds: float) -> None:
+        """Hold every caller of this provider for ``seconds``."""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+            self._stats["throttled"] += 1
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            stats = {
+                **self._stats,
+                "rpm": self.rpm,
+                "tpm": self.tpm,
+                "blocked_for": max(0.0, self._blocked_until - now),
+            }
+            if self._requests is not None:
+                self._requests._refill(now)
+                stats["requests_available"] = round(self._requests.level, 1)
+            if self._tokens is not None:
+                self._tokens._refill(now)
+                stats["tokens_available"] = round(self._tokens.level, 1)
+        stats["wait_seconds"] = round(stats["wait_seconds"], 3)
+        return stats
+
+
+RETRY_STATUS_CODES = frozenset({408, 409, 429, 500, 502, 503, 504})
+# Connection-level failures of requests, httpx and the openai SDK (which does
+# not subclass either), matched by class name anywhere in the exception's MRO
+# so no client library is imported here.
+RETRY_ERROR_NAMES = frozenset(
+    {
+        "ConnectionError",
+        "Timeout",
+        "TransportError",
+        "APIConnectionError",
+    }
+)
+
+
+def _status_and_headers(error: BaseException) -> Tuple[Optional[int], Any]:
+    response = getattr(error, "response", None)
+    status = getattr(error, "status_code", None) or getattr(
+        response, "status_code", None
+    )
+    return status, getattr(response, "headers", None) or {}
+
+
+def parse_retry_after(headers) -> Optional[float]:
+    """Seconds to wait from ``retry-after-ms`` or ``Retry-After`` (seconds or a date)."""
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return max(0.0, float(value) / 1000)
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter for throttling, server errors and
+    dropped connections. A ``Retry-After`` from the provider wins over the
+    computed delay, up to ``max_delay``.
+    """
+
+    def __init__(
+        self, max_retries: int = 4, base_delay: float = 0.5, max_delay: float = 30.0
+    ):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def classify(self, error: BaseException) -> Tuple[bool, Optional[int], Any]:
+        """Return ``(retryable, status, retry_after)`` for an exception."""
+        status, headers = _status_and_headers(error)
+        if status is not None:
+            retryable = status in RETRY_STATUS_CODES
+            return retryable, status, parse_retry_after(headers) if retryable else None
+        retryable = any(
+            cls.__name__ in RETRY_ERROR_NAMES for cls in type(error).__mro__
+        )
+        return retryable, None, None
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        if retry_after is not None:
+            # A little jitter keeps callers told the same deadline apart.
+            return min(retry_after, self.max_delay) + random.uniform(
+                0, self.base_delay
+            )
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+
+_rate_limits: Dict[str, RateLimit] = {}
+_retry_policies: Dict[str, Optional[RetryPolicy]] = {}
+
+
+def configure_rate_limits(**limits: Dict[str, Optional[float]]) -> None:
+    """
+    Set requests and tokens per minute per provider, e.g.
+    ``openai={"rpm": 500, "tpm": 200000}, serper={"rpm": 300}``.
+    """
+    with _lock:
+        for name, options in limits.items():
+            _rate_limits[name] = RateLimit(name, **(options or {}))
+            if any((options or {}).values()):
+                logger.info(f"Rate limiting {name} to {options}")
+
+
+def configure_retries(**policies: Optional[RetryPolicy]) -> None:
+    """Set the retry policy per provider; None disables retries."""
+    with _lock:
+        _retry_policies.update(policies)
+
+
+def get_rate_limit(name: str) -> RateLimit:
+    """Return the provider's rate limit, creating an unlimited one on first use."""
+    rate = _rate_limits.get(name)
+    if rate is None:
+        with _lock:
+            rate = _rate_limits.setdefault(name, RateLimit(name))
+    return rate
+
+
+def get_retry_policy(name: str) -> Optional[RetryPolicy]:
+    return _retry_policies.get(name)
+
+
+class _Attempts:
+    """Rate limiting and backoff bookkeeping for one logical provider call."""
+
+    def __init__(self, name: str, tokens: float = 0):
+        self.rate = get_rate_limit(name)
+        self.policy = get_retry_policy(name)
+        self.tokens = tokens
+        self.attempt = 0
+
+    def _next_delay(self, error: BaseException) -> Optional[float]:
+        """Seconds to wait before retrying ``error``, or None to give up."""
+        # The failed attempt used none of its tokens; the retry reserves anew.
+        self.rate.settle(self.tokens, 0)
+        if self.policy is None:
+            return None
+        retryable, status, retry_after = self.policy.classify(error)
+        if not retryable:
+            return None
+        if self.attempt >= self.policy.max_retries:
+            self.rate.count("gave_up")
+            return None
+        delay = self.policy.delay(self.attempt, retry_after)
+        self.attempt += 1
+        self.rate.count("retries")
+        logger.warning(
+            f"{self.rate.name} call failed ({status or type(error).__name__}), "
+            f"retry {self.attempt}/{self.policy.max_retries} in {delay:.2f}s"
+        )
+        if status == 429:
+            # The bucket holds everyone, so this caller need not sleep itself.
+            self.rate.throttle(delay)
+            return 0.0
+        return delay
+
+    def backoff(self, error: BaseException) -> bool:
+        delay = self._next_delay(error)
+        if delay is None:
+            return False
+        time.sleep(delay)
+        return True
+
+    async def abackoff(self, error: BaseException) -> bool:
+        delay = self._next_delay(error)
+        if delay is None:
+            return False
+        await asyncio.sleep(delay)
+        return True
+
+
+def call_with_retry(
+    name: str,
+    func: Callable[[], Any],
+    tokens: float = 0,
+    usage: Optional[Callable[[Any], Optional[float]]] = None,
+) -> Any:
+    """
+    Call ``func`` under the provider's rate limit, concurrency cap and retry
+    policy. ``tokens`` is reserved against the tokens-per-minute budget and
+    corrected with ``usage(result)`` afterwards.
+    """
+    attempts = _Attempts(name, tokens)
+    while True:
+        attempts.rate.acquire(tokens)
+        try:
+            with get_limit(name):
+                result = func()
+        except Exception as e:
+            if not attempts.backoff(e):
+                raise
+            continue
+        attempts.rate.settle(tokens, usage(result) if usage else None)
+        return result
+
+
+async def acall_with_retry(
+    name: str,
+    func: Callable[[], Any],
+    tokens: float = 0,
+    usage: Optional[Callable[[Any], Optional[float]]] = None,
+) -> Any:
+    """Async variant of ``call_with_retry``; ``func`` returns a coroutine."""
+    attempts = _Attempts(name, tokens)
+    while True:
+        await attempts.rate.aacquire(tokens)
+        try:
+            async with get_limit(name):
+                result = await func()
+        except Exception as e:
+            if not await attempts.abackoff(e):
+                raise
+            continue
+        attempts.rate.settle(tokens, usage(result) if usage else None)
+        return result
+
+
+# Allowance for the completion when reserving tokens before a call
+COMPLETION_TOKEN_ESTIMATE = 256
+
+
+def estimate_message_tokens(messages) -> int:
+    """Rough prompt size: about four characters per token, plus the completion."""
+    chars = 0
+    for message in messages:
+        content = (
+            message.get("content", "")
+            if isinstance(message, dict)
+            else getattr(message, "content", message)
+        )
+        chars += len(str(content))
+    return chars // 4 + COMPLETION_TOKEN_ESTIMATE
+
+
+def _usage_tokens(message) -> Optional[float]:
+    usage = getattr(message, "usage_metadata", None)
+    return usage.get("total_tokens") if usage else None
+
+
+class LimitedChatModel:
+    """
+    Wraps a chat model so every call goes through the provider's rate limit,
+    concurrency cap and retry policy. Streams hold their concurrency slot until
+    the last chunk and are only retried before the first one arrives;
+    everything else is delegated.
+    """
+
+    def __init__(self, llm, name: str):
+        self.llm = llm
+        self.name = name
+
+    def invoke(self, messages, *args, **kwargs) -> Any:
+        return call_with_retry(
+            self.name,
+            lambda: self.llm.invoke(messages, *args, **kwargs),
+            tokens=estimate_message_tokens(messages),
+            usage=_usage_tokens,
+        )
+
+    async def ainvoke(self, messages, *args, **kwargs) -> Any:
+        return await acall_with_retry(
+            self.name,
+            lambda: self.llm.ainvoke(messages, *args, **kwargs),
+            tokens=estimate_message_tokens(messages),
+            usage=_usage_tokens,
+        )
+
+    def stream(self, messages, *args, **kwargs):
+        tokens = estimate_message_tokens(messages)
+        attempts = _Attempts(self.name, tokens)
+        while True:
+            attempts.rate.acquire(tokens)
+            used, started = None, False
+            try:
+                with get_limit(self.name):
+                    for chunk in self.llm.stream(messages, *args, **kwargs):
+                        started = True
+                        used = _usage_tokens(chunk) or used
+                        yield chunk
+            except Exception as e:
+                if started or not attempts.backoff(e):
+                    raise
+                continue
+            attempts.rate.settle(tokens, used)
+            return
+
+    async def astream(self, messages, *args, **kwargs):
+        tokens = estimate_message_tokens(messages)
+        attempts = _Attempts(self.name, tokens)
+        while True:
+            await attempts.rate.aacquire(tokens)
+            used, started = None, False
+            try:
+                async with get_limit(self.name):
+                    async for chunk in self.llm.astream(messages, *args, **kwargs):
+                        started = True
+                        used = _usage_tokens(chunk) or used
+                        yield chunk
+            except Exception as e:
+                if started or not await attempts.abackoff(e):
+                    raise
+                continue
+            attempts.rate.settle(tokens, used)
+            return
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
+
+
+def is_governed(name: str) -> bool:
+    """Whether calls to the provider are capped, rate limited or retried."""
+    limit, rate = get_limit(name), get_rate_limit(name)
+    return bool(
+        limit.max_concurrency is not None
+        or rate.rpm
+        or rate.tpm
+        or get_retry_policy(name) is not None
+    )
+
+
+def with_limit(llm, name: str):
+    """Return the model wrapped with the provider's limits when any are set."""
+    if not is_governed(name):
+        return llm
+    return LimitedChatModel(llm, name)
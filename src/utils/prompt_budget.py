@@ -0,0 +1,257 @@
+import math
+import statistics
+import threading
+from collections import Counter, deque
+from typing import Any, Dict, Iterable, List, Optional
+
+from src.custom_logging import setup_logger
+from src.utils.tracing import span
+
+logger = setup_logger(__name__)
+
+# Tokens per section before the total budget is even considered
+DEFAULT_SECTION_LIMITS: Dict[str, int] = {
+    "serp": 3000,
+    "scraped_content": 12000,
+    "search_results": 2000,
+    "feedback": 1000,
+    "previous_selections": 500,
+    "previous_reports": 3000,
+    "report_content": 4000,
+    "state": 2000,
+}
+# Higher survives longer when the whole prompt is over budget
+DEFAULT_PRIORITIES: Dict[str, int] = {
+    "serp": 3,
+    "scraped_content": 3,
+    "report_content": 3,
+    "feedback": 2,
+    "search_results": 1,
+    "previous_selections": 0,
+    "previous_reports": 0,
+    "state": 0,
+}
+TRUNCATION_MARKER = "\n[... truncated]"
+# Prompt sizes are kept for the last this many prompts per agent
+WINDOW = 512
+
+
+class HeuristicTokenizer:
+    """Offline estimate of about four characters per token."""
+
+    name = "heuristic"
+
+    def count(self, text: str) -> int:
+        return math.ceil(len(text) / 4)
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        limit = max_tokens * 4
+        if len(text) <= limit:
+            return text
+        cut = text[:limit]
+        # Prefer ending on a line (one search result, one paragraph), then a word
+        boundary = cut.rfind("\n")
+        if boundary < limit // 2:
+            boundary = cut.rfind(" ")
+        return cut[:boundary] if boundary > limit // 2 else cut
+
+
+class TiktokenTokenizer:
+    """
+    Exact counts for OpenAI models. The encoding file must already be in
+    tiktoken's cache (``TIKTOKEN_CACHE_DIR``) on machines without network.
+    """
+
+    def __init__(self, encoding: str):
+        import tiktoken
+
+        self.name = encoding
+        self.encoding = tiktoken.get_encoding(encoding)
+
+    def count(self, text: str) -> int:
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        tokens = self.encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+        return self.encoding.decode(tokens[:max_tokens])
+
+
+def make_tokenizer(encoding: Optional[str] = None):
+    """tiktoken ``encoding`` when it loads, else the heuristic tokenizer."""
+    if not encoding:
+        return HeuristicTokenizer()
+    try:
+        return TiktokenTokenizer(encoding)
+    except Exception as e:
+        logger.warning(
+            f"tiktoken encoding {encoding} unavailable ({type(e).__name__}); "
+            "counting prompt tokens with the heuristic instead"
+        )
+        return HeuristicTokenizer()
+
+
+class PromptStats:
+    """Prompt sizes per agent and how often and how much they were trimmed."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tokens: Dict[str, deque] = {}
+        self._counts = Counter()
+
+    def record(self, agent: str, report: Dict[str, Any]) -> None:
+        with self._lock:
+            window = self._tokens.get(agent)
+            if window is None:
+                window = self._tokens[agent] = deque(maxlen=WINDOW)
+            window.append(report["tokens"])
+            self._counts[f"{agent}:prompts"] += 1
+            if report["dropped"]:
+                self._counts[f"{agent}:truncated"] += 1
+                self._counts[f"{agent}:dropped_tokens"] += report["dropped"]
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            snapshot = {agent: list(window) for agent, window in self._tokens.items()}
+            counts = dict(self._counts)
+        return {
+            agent: {
+                "prompts": counts.get(f"{agent}:prompts", 0),
+                "truncated": counts.get(f"{agent}:truncated", 0),
+                "dropped_tokens": counts.get(f"{agent}:dropped_tokens", 0),
+                "tokens_p50": statistics.median(tokens),
+                "tokens_max": max(tokens),
+            }
+            for agent, tokens in snapshot.items()
+        }
+
+
+# Shared by every agent in the process.
+prompt_stats = PromptStats()
+
+
+class PromptBudget:
+    """
+    Fits the variable sections of a prompt into token limits.
+
+    Each section is first cut to its own limit. If the prompt, including its
+    fixed parts (template, question, instructions), is still over
+    ``max_prompt_tokens``, sections are trimmed further from the lowest
+    priority up, never below ``min_section_tokens`` unless that alone is over.
+    """
+
+    def __init__(
+        self,
+        max_prompt_tokens: Optional[int] = None,
+        section_limits: Optional[Dict[str, Optional[int]]] = None,
+        priorities: Optional[Dict[str, int]] = None,
+        tokenizer=None,
+        min_section_tokens: int = 64,
+    ):
+        self.max_prompt_tokens = max_prompt_tokens
+        self.section_limits = {**DEFAULT_SECTION_LIMITS, **(section_limits or {})}
+        self.priorities = {**DEFAULT_PRIORITIES, **(priorities or {})}
+        self.tokenizer = tokenizer or HeuristicTokenizer()
+        self.min_section_tokens = min_section_tokens
+
+    def count(self, text: str) -> int:
+        return self.tokenizer.count(text)
+
+    def _cut(self, text: str, max_tokens: int) -> str:
+        if max_tokens <= 0:
+            return ""
+        marker_tokens = self.count(TRUNCATION_MARKER)
+        return (
+            self.tokenizer.truncate(text, max(0, max_tokens - marker_tokens))
+            + TRUNCATION_MARKER
+        )
+
+    def fit(
+        self, agent: str, fixed: Iterable[str], sections: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Return ``sections`` with every string value trimmed to the budget;
+        other values (None, lists) are passed through untouched.
+        """
+        with span("prompt.fit", "prompt", agent=agent) as current:
+            fitted = dict(sections)
+            sizes = {
+                name: self.count(text)
+                for name, text in sections.items()
+                if isinstance(text, str) and text
+            }
+            original = dict(sizes)
+
+            for name, tokens in sizes.items():
+                limit = self.section_limits.get(name)
+                if limit is not None and tokens > limit:
+                    fitted[name] = self._cut(fitted[name], limit)
+                    sizes[name] = self.count(fitted[name])
+
+            fixed_tokens = sum(self.count(text) for text in fixed if text)
+            total = fixed_tokens + sum(sizes.values())
+            if self.max_prompt_tokens is not None and total > self.max_prompt_tokens:
+                overflow = total - self.max_prompt_tokens
+                for name in sorted(sizes, key=lambda n: self.priorities.get(n, 1)):
+                    if overflow <= 0:
+                        break
+                    keep = max(self.min_section_tokens, sizes[name] - overflow)
+                    if keep >= sizes[name]:
+                        continue
+                    fitted[name] = self._cut(fitted[name], keep)
+                    kept = self.count(fitted[name])
+                    overflow -= sizes[name] - kept
+                    sizes[name] = kept
+                total = fixed_tokens + sum(sizes.values())
+                if overflow > 0:
+                    logger.warning(
+                        f"{agent} prompt is {total} tokens, over the budget of "
+                        f"{self.max_prompt_tokens} even with every section trimmed"
+                    )
+
+            report = {
+                "tokens": total,
+                "fixed": fixed_tokens,
+                "sections": sizes,
+                "dropped": sum(original.values()) - sum(sizes.values()),
+            }
+            current.set(tokens=total, dropped=report["dropped"])
+        prompt_stats.record(agent, report)
+        logger.debug(f"{agent} prompt: {report}")
+        return fitted
+
+
+_budget = PromptBudget()
+
+
+def configure_prompt_budget(
+    max_prompt_tokens: Optional[int] = None,
+    section_limits: Optional[Dict[str, Optional[int]]] = None,
+    priorities: Optional[Dict[str, int]] = None,
+    tokenizer: Optional[str] = None,
+) -> None:
+    """
+    Set the process-wide prompt budget.
+
+    Args:
+        max_prompt_tokens: Limit for a whole prompt; None only applies the
+            per-section limits.
+        section_limits: Per-section token limits added to the defaults; a
+            None value lifts the limit of that section.
+        priorities: Section priorities added to the defaults.
+        tokenizer: tiktoken encoding name, e.g. ``"o200k_base"``; None counts
+            with the offline heuristic.
+    """
+    global _budget
+    _budget = PromptBudget(
+        max_prompt_tokens=max_prompt_tokens,
+        section_limits=section_limits,
+        priorities=priorities,
+        tokenizer=make_tokenizer(tokenizer),
+    )
+
+
+def fit_prompt(agent: str, fixed: List[str], sections: Dict[str, Any]) -> Dict[str, Any]:
+    """Trim ``sections`` of ``agent``'s prompt with the configured budget."""
+    return _budget.fit(agent, fixed, sections)
@@ -0,0 +1,321 @@
+import asyncio
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from collections import Counter
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.custom_logging import setup_logger
+
+logger = setup_logger(__name__)
+
+# Upper bounds in seconds; spans from a few ms (cache, routing) to minutes
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_enabled = False
+_trace_dir: Optional[str] = None
+_current_run: contextvars.ContextVar[Optional["RunTrace"]] = contextvars.ContextVar(
+    "current_run", default=None
+)
+_PID = os.getpid()
+
+
+class _NoopSpan:
+    """Returned by ``span`` while tracing is off; every method does nothing."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def set(self, **args) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    __slots__ = ["name", "category", "args", "started", "run"]
+
+    def __init__(self, name: str, category: str, args: Dict[str, Any]):
+        self.name = name
+        self.category = category
+        self.args = args
+        self.run = _current_run.get()
+
+    def set(self, **args) -> None:
+        """Attach details known only after the work, e.g. bytes or tokens."""
+        self.args.update(args)
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.started
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        histograms.observe(self.category, self.name, elapsed)
+        if self.run is not None:
+            self.run.add(self, elapsed)
+        return False
+
+
+def span(name: str, category: str = "app", **args):
+    """
+    Time a block as a span of the current run and in the latency histograms.
+
+    Nearly free while tracing is disabled: a shared no-op object is returned.
+    """
+    if not _enabled:
+        return _NOOP_SPAN
+    return Span(name, category, args)
+
+
+def _lane() -> int:
+    """Chrome trace row: the asyncio task when in one, else the thread."""
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    return id(task) if task is not None else threading.get_ident()
+
+
+class RunTrace:
+    """Spans of one graph run, exported as Chrome trace-event JSON."""
+
+    def __init__(self, run_id: str):
+        self.run_id = run_id
+        self.origin = time.perf_counter()
+        self.events: List[Dict[str, Any]] = []
+        self.iterations: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def next_iteration(self, node: str) -> int:
+        with self._lock:
+            self.iterations[node] += 1
+            return self.iterations[node]
+
+    def add(self, span: Span, elapsed: float) -> None:
+        event = {
+            "name": span.name,
+            "cat": span.category,
+            "ph": "X",
+            "ts": round((span.started - self.origin) * 1e6, 1),
+            "dur": round(elapsed * 1e6, 1),
+            "pid": _PID,
+            "tid": _lane(),
+            "args": span.args,
+        }
+        with self._lock:
+            self.events.append(event)
+
+    def to_chrome(self) -> Dict[str, Any]:
+        with self._lock:
+            events = list(self.events)
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {"run_id": self.run_id},
+        }
+
+    def save(self, directory: str) -> str:
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{self.run_id}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome(), f, default=str)
+        return path
+
+
+class trace_run:
+    """
+    Collect the spans of everything run inside the block into one trace,
+    written to ``<trace_dir>/<run_id>.json`` on exit (open it in
+    chrome://tracing or Perfetto). Does nothing while tracing is disabled.
+    """
+
+    def __init__(self, run_id: Optional[str] = None):
+        self.run_id = run_id or uuid.uuid4().hex
+        self.trace: Optional[RunTrace] = None
+        self._token = None
+
+    def __enter__(self) -> Optional[RunTrace]:
+        if _enabled:
+            self.trace = RunTrace(self.run_id)
+            self._token = _current_run.set(self.trace)
+        return self.trace
+
+    def __exit__(self, *exc_info):
+        if self.trace is None:
+            return False
+        _current_run.reset(self._token)
+        if _trace_dir:
+            try:
+                path = self.trace.save(_trace_dir)
+                logger.debug(f"Wrote trace of run {self.run_id} to {path}")
+            except OSError as e:
+                logger.warning(f"Could not write trace of run {self.run_id}: {e}")
+        return False
+
+
+def trace_node(name: str, func: Callable) -> Callable:
+    """Wrap a node's ``process`` / ``aprocess`` in a span per invocation."""
+
+    def _open(state) -> Span:
+        run = _current_run.get()
+        iteration = run.next_iteration(name) if run is not None else None
+        return span(name, "node", iteration=iteration)
+
+    if asyncio.iscoroutinefunction(func):
+
+        @wraps(func)
+        async def traced_async(state, **kwargs):
+            with _open(state):
+                return await func(state, **kwargs)
+
+        return traced_async
+
+    @wraps(func)
+    def traced(state, **kwargs):
+        with _open(state):
+            return func(state, **kwargs)
+
+    return traced
+
+
+def _usage(message) -> Dict[str, Any]:
+    usage = getattr(message, "usage_metadata", None) or {}
+    return {
+        "input_tokens": usage.get("input_tokens"),
+        "output_tokens": usage.get("output_tokens"),
+    }
+
+
+class TracedChatModel:
+    """Wraps a chat model so each call is a span with its model and tokens."""
+
+    def __init__(self, llm, model: Optional[str]):
+        self.llm = llm
+        self.model = model
+
+    def invoke(self, *args, **kwargs) -> Any:
+        with span("llm", "llm", model=self.model) as current:
+            ai_msg = self.llm.invoke(*args, **kwargs)
+            current.set(**_usage(ai_msg))
+            return ai_msg
+
+    async def ainvoke(self, *args, **kwargs) -> Any:
+        with span("llm", "llm", model=self.model) as current:
+            ai_msg = await self.llm.ainvoke(*args, **kwargs)
+            current.set(**_usage(ai_msg))
+            return ai_msg
+
+    def stream(self, *args, **kwargs):
+        with span("llm.stream", "llm", model=self.model) as current:
+            chunks = 0
+            for chunk in self.llm.stream(*args, **kwargs):
+                chunks += 1
+                if getattr(chunk, "usage_metadata", None):
+                    current.set(**_usage(chunk))
+                yield chunk
+            current.set(chunks=chunks)
+
+    async def astream(self, *args, **kwargs):
+        with span("llm.stream", "llm", model=self.model) as current:
+            chunks = 0
+            async for chunk in self.llm.astream(*args, **kwargs):
+                chunks += 1
+                if getattr(chunk, "usage_metadata", None):
+                    current.set(**_usage(chunk))
+                yield chunk
+            current.set(chunks=chunks)
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
+
+
+def with_tracing(llm, model: Optional[str] = None):
+    """Return the model wrapped in LLM spans when tracing is enabled."""
+    if not _enabled:
+        return llm
+    return TracedChatModel(llm, model)
+
+
+class Histograms:
+    """Cumulative latency histograms per (category, name) in Prometheus format."""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        # (category, name) -> [bucket counts..., +Inf count, sum]
+        self._series: Dict[Tuple[str, str], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, category: str, name: str, seconds: float) -> None:
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get((category, name))
+            if series is None:
+                series = self._series[(category, name)] = [0] * (
+                    len(self.buckets) + 2
+                )
+            series[index] += 1
+            series[-1] += seconds
+
+    def render(self, metric: str = "research_span_seconds") -> str:
+        with self._lock:
+            snapshot = {key: list(series) for key, series in self._series.items()}
+        lines = [
+            f"# HELP {metric} Latency of graph nodes, LLM calls and HTTP requests.",
+            f"# TYPE {metric} histogram",
+        ]
+        for (category, name), series in sorted(snapshot.items()):
+            labels = f'category="{category}",name="{name}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            cumulative += series[len(self.buckets)]
+            lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {cumulative}')
+            lines.append(f"{metric}_sum{{{labels}}} {series[-1]:.6f}")
+            lines.append(f"{metric}_count{{{labels}}} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+histograms = Histograms()
+
+
+def configure_tracing(enabled: bool = False, trace_dir: Optional[str] = None) -> None:
+    """
+    Turn span recording on or off for the process.
+
+    With ``trace_dir`` set, every ``trace_run`` block writes its Chrome trace
+    there. Spans outside such a block only feed the histograms, so callers
+    invoking a graph directly open one per run. Nodes are only wrapped by
+    graphs built while tracing is enabled.
+    """
+    global _enabled, _trace_dir
+    _enabled = enabled
+    _trace_dir = trace_dir
+    if enabled:
+        logger.info(f"Tracing enabled, traces in {trace_dir or '(not saved)'}")
+
+
+def tracing_enabled() -> bool:
+    return _enabled
+
+
+def render_prometheus() -> str:
+    return histograms.render()
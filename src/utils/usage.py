@@ -0,0 +1,185 @@
+import asyncio
+import contextvars
+import threading
+from functools import wraps
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from src.custom_logging import setup_logger
+
+logger = setup_logger(__name__)
+
+# USD per million (input, output) tokens, matched by longest model-name prefix
+DEFAULT_PRICES: Dict[str, Tuple[float, float]] = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-nano": (0.10, 0.40),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-3.5-turbo": (0.50, 1.50),
+}
+USAGE_FIELDS = ("calls", "input_tokens", "output_tokens", "total_tokens", "cost")
+
+_prices: Dict[str, Tuple[float, float]] = dict(DEFAULT_PRICES)
+_unpriced: set = set()
+_lock = threading.Lock()
+_current: contextvars.ContextVar[Optional["UsageRecorder"]] = contextvars.ContextVar(
+    "current_usage", default=None
+)
+
+
+def configure_prices(prices: Optional[Dict[str, Tuple[float, float]]] = None) -> None:
+    """Add or override per-model prices (USD per million input/output tokens)."""
+    with _lock:
+        _prices.clear()
+        _prices.update(DEFAULT_PRICES)
+        _prices.update(prices or {})
+
+
+def price_of(model: Optional[str], input_tokens: int, output_tokens: int) -> float:
+    if not model:
+        return 0.0
+    matches = [name for name in _prices if model.startswith(name)]
+    if not matches:
+        if model not in _unpriced:
+            _unpriced.add(model)
+            logger.warning(f"No price for model {model}; its calls count as free")
+        return 0.0
+    input_price, output_price = _prices[max(matches, key=len)]
+    return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+
+def empty_usage() -> Dict[str, float]:
+    return {name: 0 for name in USAGE_FIELDS}
+
+
+class UsageRecorder:
+    """Token counts and cost of the LLM calls made during one node invocation."""
+
+    def __init__(self):
+        self.usage = empty_usage()
+        self._lock = threading.Lock()
+
+    def record(self, model: Optional[str], usage_metadata: Dict[str, Any]) -> None:
+        input_tokens = usage_metadata.get("input_tokens") or 0
+        output_tokens = usage_metadata.get("output_tokens") or 0
+        with self._lock:
+            self.usage["calls"] += 1
+            self.usage["input_tokens"] += input_tokens
+            self.usage["output_tokens"] += output_tokens
+            self.usage["total_tokens"] += usage_metadata.get("total_tokens") or (
+                input_tokens + output_tokens
+            )
+            self.usage["cost"] += price_of(model, input_tokens, output_tokens)
+
+
+def _record(message, fallback_model: Optional[str]) -> None:
+    recorder = _current.get()
+    usage_metadata = getattr(message, "usage_metadata", None)
+    if recorder is None or not usage_metadata:
+        return
+    model = (getattr(message, "response_metadata", None) or {}).get("model_name")
+    recorder.record(model or fallback_model, usage_metadata)
+
+
+class MeteredChatModel:
+    """
+    Wraps a chat model so the usage of every call is added to the recorder of
+    the node making it. Calls made outside a metered node are not counted.
+    """
+
+    def __init__(self, llm, model: Optional[str]):
+        self.llm = llm
+        self.model = model
+
+    def invoke(self, *args, **kwargs) -> Any:
+        ai_msg = self.llm.invoke(*args, **kwargs)
+        _record(ai_msg, self.model)
+        return ai_msg
+
+    async def ainvoke(self, *args, **kwargs) -> Any:
+        ai_msg = await self.llm.ainvoke(*args, **kwargs)
+        _record(ai_msg, self.model)
+        return ai_msg
+
+    def stream(self, *args, **kwargs):
+        for chunk in self.llm.stream(*args, **kwargs):
+            # Only the last chunk carries usage when streamed with stream_usage.
+            _record(chunk, self.model)
+            yield chunk
+
+    async def astream(self, *args, **kwargs):
+        async for chunk in self.llm.astream(*args, **kwargs):
+            _record(chunk, self.model)
+            yield chunk
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
+
+
+def with_usage(llm, model: Optional[str] = None) -> MeteredChatModel:
+    return MeteredChatModel(llm, model)
+
+
+def meter_node(name: str, func: Callable) -> Callable:
+    """
+    Wrap a node's ``process`` / ``aprocess`` so the usage of its LLM calls is
+    returned in the ``usage`` channel next to its own update.
+    """
+
+    def _attach(update, recorder: UsageRecorder):
+        if not recorder.usage["calls"] or not isinstance(update, dict):
+            return update
+        return {**update, "usage": {"nodes": {name: recorder.usage}}}
+
+    if asyncio.iscoroutinefunction(func):
+
+        @wraps(func)
+        async def metered_async(state, **kwargs):
+            recorder = UsageRecorder()
+            token = _current.set(recorder)
+            try:
+                update = await func(state, **kwargs)
+            finally:
+                _current.reset(token)
+            return _attach(update, recorder)
+
+        return metered_async
+
+    @wraps(func)
+    def metered(state, **kwargs):
+        recorder = UsageRecorder()
+        token = _current.set(recorder)
+        try:
+            update = func(state, **kwargs)
+        finally:
+            _current.reset(token)
+        return _attach(update, recorder)
+
+    return metered
+
+
+def budget_exceeded(
+    usage: Optional[Dict[str, Any]],
+    token_budget: Optional[int] = None,
+    cost_budget: Optional[float] = None,
+) -> Optional[str]:
+    """Return why the run's budget is spent, or None while it is not."""
+    total = (usage or {}).get("total") or {}
+    if token_budget is not None and total.get("total_tokens", 0) >= token_budget:
+        return f"{total['total_tokens']} tokens used of {token_budget}"
+    if cost_budget is not None and total.get("cost", 0) >= cost_budget:
+        return f"${total['cost']:.4f} spent of ${cost_budget:.4f}"
+    return None
+
+
+def format_usage(usage: Optional[Dict[str, Any]]) -> str:
+    """One line per node plus the total, for logs and CLIs."""
+    if not usage or not usage.get("nodes"):
+        return "no LLM usage recorded"
+    lines = []
+    for name, counts in list(usage["nodes"].items()) + [("total", usage["total"])]:
+        lines.append(
+            f"{name:<14} calls={counts['calls']:<3} in={counts['input_tokens']:<7} "
+            f"out={counts['output_tokens']:<6} cost=${counts['cost']:.5f}"
+        )
+    return "\n".join(lines)
@@ -1,7 +1,11 @@
+import sys
+import uuid
+
 from langchain.schema import HumanMessage
 
 from src.builder.config import GraphConfig
-from src.builder.graph import AgentGraphBuilder
+from src.builder.graph import AgentGraphBuilder, resume_run, thread_config
+from src.utils.tracing import trace_run
 
 
 def main():
@@ -16,16 +20,22 @@ def main():
         server=server,
         model=model,
         model_endpoint=model_endpoint,
+        reporter_streaming=True,
+        checkpoint_path=".cache/checkpoints.sqlite",
     )
 
     # Create graph using the builder
     builder = AgentGraphBuilder(config)
-    graph = builder.build()
 
-    # Compile the workflow
-    workflow = graph.compile()
+    # Compile the workflow; runs are checkpointed so they can be resumed
+    workflow = builder.compile()
     print("Graph and workflow created.")
 
+    # python test_chat.py --resume <thread_id> continues an interrupted run
+    if len(sys.argv) == 3 and sys.argv[1] == "--resume":
+        resume_run(workflow, sys.argv[2], recursion_limit=iterations)
+        return
+
     # Main interaction loop
     verbose = False
     # query = input("\nPlease enter your research question (or 'quit' to exit): ")
@@ -44,14 +54,25 @@ def main():
         "final_reports": [],
         "end_chain": [HumanMessage(content="false")],
     }
-    limit = {"recursion_limit": iterations}
-
-    # Stream results
-    for event in workflow.stream(dict_inputs, limit):
-        if verbose:
-            print("\nState Dictionary:", event)
-        else:
-            print("\n")
+    thread_id = str(uuid.uuid4())
+    print(f"Thread id: {thread_id}")
+    limit = thread_config(thread_id, recursion_limit=iterations)
+
+    # Stream results; "custom" carries the reporter's answer token by token.
+    # trace_run collects the run's spans into one trace when tracing is on.
+    with trace_run(thread_id):
+        for mode, event in workflow.stream(
+            dict_inputs, limit, stream_mode=["updates", "custom"]
+        ):
+            if mode == "custom":
+                if "token" in event:
+                    print(event["token"], end="", flush=True)
+                elif "ttft" in event:
+                    print(f"\n[first token after {event['ttft']:.2f}s]")
+            elif verbose:
+                print("\nState Dictionary:", event)
+            else:
+                print("\n")
 
 
 if __name__ == "__main__":
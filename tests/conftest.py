@@ -0,0 +1,40 @@
+import os
+
+import pytest
+
+from benchmarks.fakes import FakeServices
+
+# settings.py insists on both keys; the stand-ins ignore them
+os.environ.setdefault("OPENAI_API_KEY", "offline")
+os.environ.setdefault("SERPER_API_KEY", "offline")
+# Not for imports: Settings requires the variable, and reads it when a node is
+# created
+os.environ.setdefault("PYTHONPATH", ".")
+
+
+@pytest.fixture(scope="module")
+def fakes():
+    """Offline OpenAI, Serper and web; the reviewer fails the first report."""
+    with FakeServices(review_loops=1) as services:
+        yield services
+
+
+@pytest.fixture(scope="module")
+def make_builder(fakes):
+    """Build graphs against ``fakes``; keyword arguments override the config."""
+    from src.builder.config import GraphConfig
+    from src.builder.graph import AgentGraphBuilder
+
+    def _make(**options):
+        config = {
+            "server": "openai",
+            "model": "gpt-4o-mini",
+            "model_endpoint": fakes.openai_url,
+            "serper_base_url": fakes.serper_url,
+            "serper_cache_path": None,
+            "prefetch_top_n": 0,
+            **options,
+        }
+        return AgentGraphBuilder(GraphConfig(**config))
+
+    return _make
@@ -0,0 +1,59 @@
+import asyncio
+import io
+import json
+
+import pytest
+
+from src.builder.batch import BatchRunner, completed_offsets, read_questions
+
+LINES = [
+    '{"id": "a", "research_question": "first?"}',
+    "{not json",
+    "42",
+    "null",
+    '["a", "list"]',
+    '"last?"',
+]
+
+
+class EchoWorkflow:
+    """Stands in for a compiled graph; the report repeats the question."""
+
+    def invoke(self, inputs, config):
+        return {"final_reports": [f"report on {inputs['research_question']}"]}
+
+    async def ainvoke(self, inputs, config):
+        return self.invoke(inputs, config)
+
+
+@pytest.fixture
+def questions(tmp_path):
+    path = tmp_path / "questions.jsonl"
+    path.write_text("\n".join(LINES) + "\n", encoding="utf-8")
+    return str(path)
+
+
+@pytest.mark.parametrize("mode", ["thread", "async"])
+def test_bad_lines_are_reported_and_the_batch_goes_on(questions, tmp_path, mode):
+    output = io.StringIO()
+    runner = BatchRunner(EchoWorkflow(), output, workers=2)
+    items = read_questions(questions)
+    stats = asyncio.run(runner.arun(items)) if mode == "async" else runner.run(items)
+
+    records = {
+        record["offset"]: record
+        for record in map(json.loads, output.getvalue().splitlines())
+    }
+    assert sorted(records) == list(range(len(LINES)))
+    assert stats["ok"] == 2 and stats["error"] == 4
+    assert records[0]["final_report"] == "report on first?"
+    assert records[5]["final_report"] == "report on last?"
+    assert "malformed JSON" in records[1]["error"]
+    assert "got int" in records[2]["error"]
+    assert "got NoneType" in records[3]["error"]
+    assert "got list" in records[4]["error"]
+
+    # A resumed batch tries the failed lines again
+    path = tmp_path / "out.jsonl"
+    path.write_text(output.getvalue(), encoding="utf-8")
+    assert completed_offsets(str(path)) == {0, 5}
@@ -0,0 +1,31 @@
+import pytest
+
+QUESTION = "How far does a small budget go? #1"
+
+
+def _run(make_builder, **options):
+    workflow = make_builder(**options).build().compile()
+    return workflow.invoke({"research_question": QUESTION}, {"recursion_limit": 40})
+
+
+@pytest.mark.parametrize(
+    "budget, ran, skipped",
+    [
+        # Spent by the planner: nothing else calls the model
+        (1, "planner_response", "selector_response"),
+        # Spent by the first report: it is not reviewed
+        (1000, "reporter_response", "reviewer_response"),
+    ],
+)
+def test_budget_is_checked_after_each_llm_node(make_builder, budget, ran, skipped):
+    state = _run(make_builder, token_budget=budget)
+    assert len(state[ran]) == 1
+    assert not state[skipped]
+    assert state["final_reports"]
+    # Only the node that crossed the budget overshoots it
+    assert state["usage"]["total"]["total_tokens"] < budget + 500
+
+
+def test_no_budget_runs_the_review_loop(make_builder):
+    state = _run(make_builder)
+    assert len(state["reviewer_response"]) == 2
@@ -0,0 +1,164 @@
+import asyncio
+import functools
+import json
+
+import pytest
+
+from benchmarks.fakes import FakeServices
+from src.builder.config import GraphConfig
+from src.builder.graph import aresume_run, resume_run, thread_config
+from src.nodes.reporter import ReporterMessage, ReporterNode
+from src.nodes.reviewer import ReviewerMessage
+from src.nodes.scraper import ScraperMessage
+from src.nodes.selector import SelectorMessage
+from src.nodes.serper import SerperMessage
+from src.states.checkpoint import MessageSerializer, SqliteCheckpointSaver
+
+QUESTION = "How are checkpoints pruned? #1"
+
+
+@pytest.fixture(scope="module")
+def fakes():
+    # Every report passes, so runs of the same question take the same path
+    with FakeServices() as services:
+        yield services
+
+
+def _workflow(make_builder, saver, async_mode=False):
+    # One fetch at a time: the scraper keeps the first page to finish, so
+    # runs would otherwise read whichever selected page won the race
+    return make_builder(
+        async_mode=async_mode, scraper_concurrency=1, scraper_per_host_limit=1
+    ).compile(checkpointer=saver)
+
+
+def _count(saver, table, thread_id):
+    return saver._conn.execute(
+        f"SELECT COUNT(*) FROM {table} WHERE thread_id = ?", (thread_id,)
+    ).fetchone()[0]
+
+
+def test_checkpoints_are_off_by_default():
+    assert GraphConfig().checkpoint_path is None
+
+
+@pytest.mark.parametrize("async_mode", [False, True])
+def test_keep_prunes_old_checkpoints(make_builder, tmp_path, async_mode):
+    pruned = SqliteCheckpointSaver(str(tmp_path / "pruned.sqlite"), keep=3)
+    full = SqliteCheckpointSaver(str(tmp_path / "full.sqlite"))
+    states = {}
+    for name, saver in (("pruned", pruned), ("full", full)):
+        workflow = _workflow(make_builder, saver, async_mode)
+        config = thread_config(name)
+        if async_mode:
+            asyncio.run(workflow.ainvoke({"research_question": QUESTION}, config))
+            states[name] = asyncio.run(workflow.aget_state(config)).values
+        else:
+            workflow.invoke({"research_question": QUESTION}, config)
+            states[name] = workflow.get_state(config).values
+
+    assert _count(pruned, "checkpoints", "pruned") == 3
+    assert _count(full, "checkpoints", "full") > 3
+    assert _count(pruned, "blobs", "pruned") < _count(full, "blobs", "full")
+    # The latest checkpoint still has every channel
+    assert set(states["pruned"]) == set(states["full"])
+    assert states["pruned"]["final_reports"]
+
+
+def _fail_once(monkeypatch, cls, name):
+    """Make ``cls.name`` raise on its first call, as if the process died there."""
+    original = getattr(cls, name)
+    calls = []
+
+    if asyncio.iscoroutinefunction(original):
+
+        @functools.wraps(original)
+        async def flaky(self, *args, **kwargs):
+            calls.append(1)
+            if len(calls) == 1:
+                raise RuntimeError("interrupted")
+            return await original(self, *args, **kwargs)
+
+    else:
+
+        @functools.wraps(original)
+        def flaky(self, *args, **kwargs):
+            calls.append(1)
+            if len(calls) == 1:
+                raise RuntimeError("interrupted")
+            return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(cls, name, flaky)
+
+
+def _messages(state):
+    """Message channels as (class, content) pairs; ids differ between runs."""
+    return {
+        channel: [(type(message).__name__, message.content) for message in value]
+        for channel, value in state.items()
+        if channel.endswith("_response") or channel == "final_reports"
+    }
+
+
+@pytest.mark.parametrize("async_mode", [False, True])
+def test_resume_continues_an_interrupted_run(
+    make_builder, tmp_path, monkeypatch, async_mode
+):
+    question = "Does a resumed run end like an uninterrupted one? #9"
+    path = str(tmp_path / "runs.sqlite")
+    inputs = {"research_question": question}
+    # One loop for the whole test: async clients stay bound to their loop
+    loop = asyncio.new_event_loop()
+
+    def invoke(workflow, config):
+        if async_mode:
+            return loop.run_until_complete(workflow.ainvoke(inputs, config))
+        return workflow.invoke(inputs, config)
+
+    try:
+        workflow = _workflow(make_builder, SqliteCheckpointSaver(path), async_mode)
+        expected = invoke(workflow, thread_config("uninterrupted"))
+
+        _fail_once(monkeypatch, ReporterNode, "aprocess" if async_mode else "process")
+        workflow = _workflow(make_builder, SqliteCheckpointSaver(path), async_mode)
+        with pytest.raises(RuntimeError, match="interrupted"):
+            invoke(workflow, thread_config("interrupted"))
+
+        # A fresh graph and saver on the same file, as after a restart
+        workflow = _workflow(make_builder, SqliteCheckpointSaver(path), async_mode)
+        snapshot = workflow.get_state(thread_config("interrupted"))
+        assert snapshot.next == ("reporter",)
+        assert type(snapshot.values["scraper_response"][-1]) is ScraperMessage
+        if async_mode:
+            resumed = loop.run_until_complete(aresume_run(workflow, "interrupted"))
+        else:
+            resumed = resume_run(workflow, "interrupted")
+    finally:
+        loop.close()
+
+    assert resumed["final_reports"]
+    assert _messages(resumed) == _messages(expected)
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        SerperMessage('{"organic": []}', prefetch_ticket="ticket"),
+        SelectorMessage(json.dumps({"selected_page_url": "https://example.com"})),
+        ScraperMessage("page text", source="a", sources=["a", "b"]),
+        ReporterMessage({"content": {"reporter_response": "report"}}),
+        ReviewerMessage({"content": {"reviewer_response": "{}"}}),
+    ],
+    ids=lambda message: type(message).__name__,
+)
+def test_serializer_round_trips_message_classes(message):
+    serde = MessageSerializer()
+    restored = serde.loads_typed(serde.dumps_typed({"channel": [message]}))
+    restored = restored["channel"][0]
+    assert type(restored) is type(message)
+    assert restored.content == message.content
+    assert restored.additional_kwargs == message.additional_kwargs
+    if isinstance(message, ScraperMessage):
+        assert (restored.source, restored.sources) == ("a", ["a", "b"])
+    if isinstance(message, (ReporterMessage, ReviewerMessage)):
+        assert restored.dict_content == message.dict_content
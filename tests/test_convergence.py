@@ -0,0 +1,121 @@
+import json
+
+import pytest
+
+from src.states.reducers import MAX_CONVERGENCE_ITERATIONS, merge_convergence
+from src.utils.convergence import ConvergenceMonitor
+
+
+def _state(search_term, urls, report, convergence=None):
+    return {
+        "planner_response": [json.dumps({"search_term": search_term})],
+        "selector_response": [json.dumps({"selected_page_urls": urls})],
+        "reporter_response": [report],
+        "convergence": convergence or {},
+    }
+
+
+def _run(monitor, iterations):
+    """Feed ``(search_term, urls, report, proposed)`` iterations; return the routes."""
+    progress, routes = {}, []
+    for search_term, urls, report, proposed in iterations:
+        route, update = monitor.check(
+            _state(search_term, urls, report, progress), proposed
+        )
+        progress = merge_convergence(progress, update)
+        routes.append(route)
+    return routes, progress
+
+
+def test_progress_is_left_alone():
+    routes, progress = _run(
+        ConvergenceMonitor(),
+        [
+            ("term", ["a"], "report 1", "reporter"),
+            ("term", ["a"], "report 2", "reporter"),
+            ("term", ["a"], "report 3", "final_report"),
+        ],
+    )
+    assert routes == ["reporter", "reporter", "final_report"]
+    assert progress["stalls"] == 0
+
+
+def test_review_loop_stall_escalates_to_selection_loop():
+    routes, progress = _run(
+        ConvergenceMonitor(),
+        [
+            ("term", ["a"], "report", "reporter"),
+            # The reporter wrote the same report again
+            ("term", ["a"], "Report ", "reporter"),
+        ],
+    )
+    assert routes == ["reporter", "selector"]
+    assert progress["iterations"][-1]["loop"] == "reporter"
+    assert progress["iterations"][-1]["stalled"] == "repeat"
+
+
+def test_review_loop_stall_never_jumps_to_planner():
+    # The router proposes the planner after a stalled review loop; the
+    # review loop is what stalled, so the selection loop is tried next
+    routes, _ = _run(
+        ConvergenceMonitor(max_stalls=3),
+        [
+            ("term", ["a"], "report", "reporter"),
+            ("term", ["a"], "report", "planner"),
+        ],
+    )
+    assert routes == ["reporter", "selector"]
+
+
+@pytest.mark.parametrize("proposed", ["selector", "reporter"])
+def test_selection_loop_stall_escalates_to_planning_loop(proposed):
+    routes, progress = _run(
+        ConvergenceMonitor(max_stalls=3),
+        [
+            ("term", ["a"], "report 1", "selector"),
+            # New report, but the selector picked the same pages
+            ("term", ["a"], "report 2", proposed),
+        ],
+    )
+    assert routes == ["selector", "planner"]
+    assert progress["iterations"][-1]["stalled"] == "same_urls"
+
+
+def test_router_escalating_itself_is_not_overridden():
+    routes, progress = _run(
+        ConvergenceMonitor(max_stalls=3),
+        [
+            ("term", ["a"], "report", "reporter"),
+            ("term", ["a"], "report", "selector"),
+        ],
+    )
+    assert routes == ["reporter", "selector"]
+    assert progress["iterations"][-1]["proposed"] == "selector"
+    assert progress["stalls"] == 1
+    assert progress["saved_iterations"] == 0
+
+
+def test_max_stalls_goes_to_final_report():
+    routes, progress = _run(
+        ConvergenceMonitor(max_stalls=2),
+        [
+            ("term", ["a"], "report", "reporter"),
+            ("term", ["a"], "report", "reporter"),
+            ("term", ["a"], "report 2", "selector"),
+        ],
+    )
+    assert routes == ["reporter", "selector", "final_report"]
+    assert progress["stalls"] == 2
+    assert progress["saved_iterations"] == 1
+
+
+def test_iteration_history_is_capped():
+    progress = {}
+    for n in range(MAX_CONVERGENCE_ITERATIONS + 5):
+        progress = merge_convergence(
+            progress, {"iterations": [{"n": n}], "stalls": 1}
+        )
+    assert len(progress["iterations"]) == MAX_CONVERGENCE_ITERATIONS
+    assert progress["iterations"][-1] == {"n": MAX_CONVERGENCE_ITERATIONS + 4}
+    # The counters still cover the whole run
+    assert progress["stalls"] == MAX_CONVERGENCE_ITERATIONS + 5
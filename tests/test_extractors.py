@@ -0,0 +1,94 @@
+import os
+
+import pytest
+
+from src.tools.extractors import EXTRACTORS, visible_text
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), "..", "benchmarks", "corpus")
+ARTICLE = "<article>" + (
+    "<p>The article body has enough text, with commas, to be picked as content.</p>"
+    * 12
+) + "</article>"
+FIXTURES = {
+    "void_element_with_hint": (
+        f'<html><body><div><img class="share-icon" src="x.png">'
+        f'<link id="cookie-css"><input class="newsletter"><p>intro</p></div>'
+        f"{ARTICLE}</body></html>"
+    ),
+    "hinted_body": (
+        f'<html><body class="single-post has-sidebar">'
+        f'<div class="post-body comments-enabled">{ARTICLE}</div></body></html>'
+    ),
+    "boilerplate_blocks": (
+        f'<html><body><div class="cookie-banner">Accept cookies</div>'
+        f'<nav>Home</nav>{ARTICLE}<div id="comments">First!</div>'
+        f"<footer>Legal</footer></body></html>"
+    ),
+    "implied_end_tags": (
+        f'<html><body><p>Intro line.<ul><li class="menu-item">Home'
+        f'<li class="menu-item">About</ul><p class="promo">Accept cookies'
+        f'<p>{ARTICLE}<dl><dt class="share">First!<dd class="social">Legal</dl></body></html>'
+    ),
+}
+
+
+def _extractors():
+    for name, extractor_class in EXTRACTORS.items():
+        try:
+            yield pytest.param(extractor_class(), id=name)
+        except ImportError:
+            yield pytest.param(None, id=name, marks=pytest.mark.skip("not installed"))
+
+
+def _corpus():
+    for name in sorted(os.listdir(CORPUS_DIR)):
+        with open(os.path.join(CORPUS_DIR, name), encoding="utf-8") as f:
+            yield pytest.param(f.read(), id=name)
+
+
+@pytest.mark.parametrize("extractor", list(_extractors()))
+@pytest.mark.parametrize("html", list(FIXTURES.values()), ids=list(FIXTURES))
+def test_fixture_keeps_article(extractor, html):
+    text = extractor.extract(html)
+    assert text.count("The article body has enough text") == 12
+    for boilerplate in ("Accept cookies", "First!", "Legal", "Home"):
+        assert boilerplate not in text
+
+
+@pytest.mark.parametrize("extractor", list(_extractors()))
+@pytest.mark.parametrize("html", list(_corpus()))
+def test_corpus_drops_boilerplate(extractor, html):
+    text = extractor.extract(html)
+    assert len(text) > 1000
+    for boilerplate in ("We use cookies", "Subscribe to our", "Related story"):
+        assert boilerplate not in text
+
+
+@pytest.mark.parametrize("html", list(_corpus()))
+def test_backends_agree_on_corpus(html):
+    lengths = {}
+    for name, extractor_class in EXTRACTORS.items():
+        try:
+            lengths[name] = len(extractor_class().extract(html))
+        except ImportError:
+            continue
+    assert max(lengths.values()) <= 1.2 * min(lengths.values()), lengths
+
+
+def test_stdlib_agrees_with_other_backends_on_implied_end_tags():
+    html = FIXTURES["implied_end_tags"]
+    texts = {}
+    for name, extractor_class in EXTRACTORS.items():
+        try:
+            texts[name] = extractor_class().extract(html)
+        except ImportError:
+            continue
+    # Before the fix the stdlib parser kept skipping after the first <li>
+    assert texts["stdlib"].count("The article body has enough text") == 12
+    lengths = {name: len(text) for name, text in texts.items()}
+    assert max(lengths.values()) <= 1.2 * min(lengths.values()), lengths
+
+
+def test_visible_text_ignores_hints():
+    html = '<body><div class="sidebar">kept</div><script>x = 1</script></body>'
+    assert visible_text(html) == "kept"
@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+from src.nodes.base import _history_lengths, check_delta
+
+QUESTION = "How do node deltas work? #1"
+# Every node, the router included, runs at least twice with one failed review
+NODES = [
+    "planner",
+    "serper_search",
+    "selector",
+    "scraper",
+    "reporter",
+    "reviewer",
+    "router",
+    "final_report",
+]
+
+
+@pytest.fixture(scope="module")
+def builder(make_builder):
+    def _builder(async_mode=False):
+        return make_builder(
+            async_mode=async_mode, router_fast_path=False, check_node_outputs=True
+        )
+
+    return _builder
+
+
+@pytest.fixture(scope="module")
+def state(builder):
+    """State at the end of a run that went round the review loop once."""
+    workflow = builder().build().compile()
+    return workflow.invoke({"research_question": QUESTION}, {"recursion_limit": 40})
+
+
+def test_run_checks_every_node(state):
+    # check_node_outputs raises NodeContractError inside the run otherwise
+    assert state["final_reports"]
+    assert len(state["reviewer_response"]) == 2
+
+
+def test_async_run_checks_every_node(builder):
+    workflow = builder(async_mode=True).build().compile()
+    state = asyncio.run(
+        workflow.ainvoke({"research_question": QUESTION}, {"recursion_limit": 40})
+    )
+    assert state["final_reports"]
+
+
+@pytest.mark.parametrize("name", NODES)
+def test_node_returns_only_its_outputs(builder, state, name):
+    node = builder()._create_nodes()[name]
+    state = dict(state)
+    lengths = _history_lengths(state)
+    update = node.process(state)
+    check_delta(node, state, lengths, update)
+    assert update
+    assert set(update) <= set(node.outputs)
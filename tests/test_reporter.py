@@ -0,0 +1,33 @@
+import json
+
+import pytest
+
+from src.nodes.scraper import ScraperMessage
+from src.nodes.selector import SelectorMessage
+
+SELECTION = SelectorMessage(
+    json.dumps({"selected_page_urls": ["https://a.test", "https://b.test"]})
+)
+
+
+@pytest.fixture(scope="module")
+def reporter(make_builder):
+    return make_builder()._create_nodes()["reporter"]
+
+
+def test_metadata_records_the_pages_the_scraper_read(reporter):
+    # The first pick failed to load; the scraper fell back to the second
+    scraped = ScraperMessage(
+        "text", source="https://b.test", sources=["https://b.test"]
+    )
+    _, metadata = reporter._prepare(
+        {"selector_response": [SELECTION], "scraper_response": [scraped]}
+    )
+    assert metadata["selected_url"] == "https://b.test"
+    assert metadata["sources"] == ["https://b.test"]
+
+
+def test_metadata_falls_back_to_the_selection(reporter):
+    _, metadata = reporter._prepare({"selector_response": [SELECTION]})
+    assert metadata["selected_url"] == "https://a.test"
+    assert metadata["sources"] == ["https://a.test", "https://b.test"]
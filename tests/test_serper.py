@@ -0,0 +1,53 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from langchain_core.messages import HumanMessage
+
+from src.nodes.serper import SerperNode
+
+PLAN = HumanMessage(json.dumps({"search_terms": ["first term", "second term"]}))
+
+
+class DownClient:
+    """Every query fails the way an unreachable Serper does."""
+
+    def search(self, query):
+        raise httpx.ConnectError(f"cannot reach serper for {query!r}")
+
+    async def asearch(self, query):
+        return self.search(query)
+
+
+class BrokenClient(DownClient):
+    def search(self, query):
+        raise RuntimeError("bug")
+
+
+def _process(fanout, async_mode):
+    node = SerperNode(search_fanout=fanout)
+    state = {"planner_response": [PLAN]}
+    if async_mode:
+        update = asyncio.run(node.aprocess(state))
+    else:
+        update = node.process(state)
+    return [message.content for message in update["serper_response"]]
+
+
+@pytest.mark.parametrize("async_mode", [False, True])
+def test_fanout_with_every_query_failing_reports_like_one_query(
+    monkeypatch, async_mode
+):
+    monkeypatch.setattr(SerperNode, "client", property(lambda self: DownClient()))
+    single = _process(1, async_mode)
+    assert single[0].startswith("Request error occurred")
+    assert _process(2, async_mode) == single
+
+
+@pytest.mark.parametrize("async_mode", [False, True])
+def test_fanout_raises_unexpected_errors_like_one_query(monkeypatch, async_mode):
+    monkeypatch.setattr(SerperNode, "client", property(lambda self: BrokenClient()))
+    for fanout in (1, 2):
+        with pytest.raises(RuntimeError, match="bug"):
+            _process(fanout, async_mode)